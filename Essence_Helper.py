@@ -1,6 +1,7 @@
 # essence_helper.py
 from enum import Enum, auto
-from typing import Dict, Set, List, overload
+from itertools import combinations
+from typing import Dict, Set, List, Tuple, overload
 
 
 # ----------------------
@@ -45,6 +46,20 @@ class Stat(Enum):
     EFFICACY = auto()
 
 
+# ----------------------
+# Stat bitmasks
+# ----------------------
+# one bit per stat; a weapon or a query is the OR of its stat bits
+STAT_BITS: Dict[Stat, int] = {s: 1 << i for i, s in enumerate(Stat)}
+
+
+def stat_mask(*stats: Stat) -> int:
+    mask = 0
+    for s in stats:
+        mask |= STAT_BITS[s]
+    return mask
+
+
 # ----------------------
 # Weapon Index
 # ----------------------
@@ -56,6 +71,12 @@ class WeaponIndex:
         # stat -> set of weapon names that require it
         self.index_stat: Dict[Stat, Set[str]] = {}
 
+        # weapon name -> stat mask
+        self.masks: Dict[str, int] = {}
+
+        # query mask (1-3 stats) -> prebuilt tuple of matching weapons
+        self._table: Dict[int, Tuple[str, ...]] = {}
+
     # ----------------------
     # Add weapon
     # ----------------------
@@ -65,11 +86,39 @@ class WeaponIndex:
         if len(stat_set) not in (2, 3):
             raise ValueError("Weapon must have either 2 or 3 unique stats")
 
+        if name in self.weapons:
+            self._remove(name)
+
         self.weapons[name] = stat_set
+        self.masks[name] = stat_mask(*stat_set)
 
         for s in stat_set:
             self.index_stat.setdefault(s, set()).add(name)
 
+        # every query that is a subset of this weapon's stats matches it
+        for key in self._subset_masks(stat_set):
+            self._table[key] = self._table.get(key, ()) + (name,)
+
+    @staticmethod
+    def _subset_masks(stat_set: frozenset[Stat]) -> List[int]:
+        return [
+            stat_mask(*combo)
+            for r in range(1, len(stat_set) + 1)
+            for combo in combinations(stat_set, r)
+        ]
+
+    def _remove(self, name: str) -> None:
+        stat_set = self.weapons.pop(name)
+        self.masks.pop(name, None)
+        for s in stat_set:
+            self.index_stat.get(s, set()).discard(name)
+        for key in self._subset_masks(stat_set):
+            remaining = tuple(n for n in self._table.get(key, ()) if n != name)
+            if remaining:
+                self._table[key] = remaining
+            else:
+                self._table.pop(key, None)
+
     # ----------------------
     # Lookup essence
     # ----------------------
@@ -102,6 +151,37 @@ class WeaponIndex:
 
     #     return list(result) if result is not None else []
 
+    # ----------------------
+    # Compiled form
+    # ----------------------
+    def to_tables(self) -> Tuple[Dict[str, Tuple[int, ...]], Dict[str, int], Dict[int, Tuple[str, ...]]]:
+        """Plain-type snapshot (weapon -> stat values, weapon -> mask, query mask -> names)."""
+        weapons = {name: tuple(sorted(s.value for s in stats)) for name, stats in self.weapons.items()}
+        return weapons, dict(self.masks), dict(self._table)
+
+    @classmethod
+    def from_tables(
+        cls,
+        weapons: Dict[str, Tuple[int, ...]],
+        masks: Dict[str, int],
+        table: Dict[int, Tuple[str, ...]],
+    ) -> "WeaponIndex":
+        """Rebuild from to_tables() output without recomputing masks or the subset table."""
+        by_value = {s.value: s for s in Stat}
+        index = cls()
+        index_stat = index.index_stat
+        for name, values in weapons.items():
+            stat_set = frozenset([by_value[v] for v in values])
+            index.weapons[name] = stat_set
+            for s in stat_set:
+                if s in index_stat:
+                    index_stat[s].add(name)
+                else:
+                    index_stat[s] = {name}
+        index.masks = dict(masks)
+        index._table = dict(table)
+        return index
+
     @overload
     def lookup(self, s1: Stat, s2: Stat) -> List[str]: ...
     @overload
@@ -113,17 +193,8 @@ class WeaponIndex:
         s2: Stat,
         s3: Stat | None = None,
     ) -> List[str]:
-        result = self.index_stat.get(s1, set()).copy()
-        if not result:
-            return []
-
-        result &= self.index_stat.get(s2, set())
-        if not result:
-            return []
-
+        # order-independent: one dict hit on the combined mask
+        mask = STAT_BITS[s1] | STAT_BITS[s2]
         if s3 is not None:
-            result &= self.index_stat.get(s3, set())
-            if not result:
-                return []
-
-        return list(result)
+            mask |= STAT_BITS[s3]
+        return list(self._table.get(mask, ()))
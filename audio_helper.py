@@ -1,7 +1,13 @@
 import os
+import queue
 import sys
-import winsound
-import pywin32_system32
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+SOUND_FILE = os.path.join("data", "sound.wav")
+
 
 def _resource_path(rel: str) -> str:
     base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
@@ -13,6 +19,99 @@ def _data_path(rel: str) -> str:
         return external
     return _resource_path(rel)
 
+
+class AudioSink(ABC):
+    """
+    Plays the hit sound without blocking the caller. The sound is loaded once;
+    play() hands it to a player thread and returns at once. A chime requested
+    while one is still pending or playing is dropped rather than queued behind it.
+    """
+
+    def __init__(self) -> None:
+        self.played = 0
+        self.dropped = 0
+        self._pending: "queue.Queue[bool]" = queue.Queue(maxsize=1)
+        # Held from play() until the chime has finished; released by the player thread
+        self._busy = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="audio-sink", daemon=True)
+        self._thread.start()
+
+    @abstractmethod
+    def _play_blocking(self) -> None:
+        """Play the sound once and return when it has finished (runs on the player thread)."""
+
+    def _run(self) -> None:
+        while self._pending.get():
+            try:
+                self._play_blocking()
+                self.played += 1
+            except Exception as exc:  # a broken audio device must not kill notifications
+                print(f"[WARN] Could not play sound: {exc}", file=sys.stderr)
+            finally:
+                self._busy.release()
+
+    def play(self) -> bool:
+        if not self._busy.acquire(blocking=False):
+            self.dropped += 1
+            return False
+        self._pending.put_nowait(True)  # empty: the previous chime released _busy after taking its item
+        return True
+
+    def close(self) -> None:
+        try:
+            self._pending.put(False, timeout=1.0)
+        except queue.Full:
+            return  # still playing; the daemon thread dies with the process
+        self._thread.join(1.0)
+
+
+class WinSoundSink(AudioSink):
+    """winsound playback from an in-memory copy of the wav file."""
+
+    def __init__(self, path: Optional[str] = None):
+        # Windows-only modules load here so main imports on other platforms
+        import winsound
+        import pywin32_system32
+
+        self._winsound = winsound
+        with open(path or _data_path(SOUND_FILE), "rb") as fh:
+            self._data = fh.read()
+        super().__init__()
+
+    def _play_blocking(self) -> None:
+        # SND_MEMORY cannot be combined with SND_ASYNC; the player thread makes it async
+        self._winsound.PlaySound(self._data, self._winsound.SND_MEMORY)
+
+
+class StubSink(AudioSink):
+    """Silent sink for Linux/tests: records when each chime would have played."""
+
+    def __init__(self, duration: float = 0.0):
+        self.duration = duration  # simulated length of the sound
+        self.times: List[float] = []
+        super().__init__()
+
+    def _play_blocking(self) -> None:
+        self.times.append(time.monotonic())
+        if self.duration:
+            time.sleep(self.duration)
+
+
+def make_sink() -> AudioSink:
+    if sys.platform == "win32":
+        try:
+            return WinSoundSink()
+        except (ImportError, OSError) as exc:
+            print(f"[WARN] Sound disabled: {exc}", file=sys.stderr)
+    return StubSink()
+
+
+_default_sink: Optional[AudioSink] = None
+
+
 def chime():
-    sound = _data_path(os.path.join("data", "sound.wav"))
-    winsound.PlaySound(sound, winsound.SND_FILENAME)
+    """Play the hit sound on the shared default sink (non-blocking)."""
+    global _default_sink
+    if _default_sink is None:
+        _default_sink = make_sink()
+    _default_sink.play()
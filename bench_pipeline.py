@@ -0,0 +1,524 @@
+"""
+Stage-level microbenchmarks for the recognition pipeline.
+
+    python bench_pipeline.py                          # synthetic frames built from data/
+    python bench_pipeline.py --frames path/to/frames  # recorded 1920x1080 screenshots
+    python bench_pipeline.py --size 2560x1440         # synthetic frames at another window size
+    python bench_pipeline.py --save-baseline bench_baseline.json
+    python bench_pipeline.py --baseline bench_baseline.json --tolerance 0.25
+    python bench_pipeline.py --alloc --max-alloc-bytes 16384
+
+Each stage is timed on its own and reported as p50/p95/p99 latency plus
+ops/sec. With --baseline the run exits non-zero when a stage's latency
+grows past the tolerance. --alloc instead replays the frames through
+read() under tracemalloc and reports what one steady-state frame allocates;
+with --max-alloc-bytes it exits non-zero when that grows past the limit.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from Essence_Helper import Stat, WeaponIndex
+from frame_source import DirectoryFrameSource, MemoryFrameSource
+from lookup_driver import (
+    HIT_RATIO_WINDOW,
+    LAYOUTS,
+    MATCHED_DIR,
+    MENU_TEMPLATES,
+    QUALITY_COLOR,
+    GuardMode,
+    LookupDriver,
+    OcrMode,
+    _choose_stat,
+    _low_contrast,
+    _norm_to_abs,
+    _preprocess_for_ocr,
+    _signature,
+    _to_gray,
+)
+from main import WEAPON_JSON, load_index_from_json
+from mappings import STAT_MAPPING
+from stat_matcher import StatMatcher
+
+# ---- Configuration ---------------------------------------------------------
+
+FRAME_SIZE = (1920, 1080)
+DEFAULT_ITERATIONS = 2000
+DEFAULT_OCR_ITERATIONS = 60
+DEFAULT_WARMUP = 20
+DEFAULT_TOLERANCE = 0.25  # allowed relative slowdown before a stage counts as regressed
+OCR_STAGES = {"guard_ocr", "ocr_text", "ocr_batch_rec"}
+DEFAULT_ALLOC_READS = 200
+# Typical OCR slips seen on real captures, used to exercise fuzzy matching
+OCR_NOISE = [("o", "0"), ("l", "1"), ("B", "8"), ("s", "5"), (" ", "")]
+
+
+# ---- Synthetic frames ------------------------------------------------------
+
+def _paste(frame: np.ndarray, img: np.ndarray, region: Dict[str, float]) -> None:
+    h, w = frame.shape[:2]
+    rect = _norm_to_abs(region, {"left": 0, "top": 0, "width": w, "height": h})
+    rw, rh = max(rect["width"], 1), max(rect["height"], 1)
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    img = cv2.resize(img[:, :, :3], (rw, rh), interpolation=cv2.INTER_AREA)
+    frame[rect["top"]:rect["top"] + rh, rect["left"]:rect["left"] + rw] = img
+
+
+def synthetic_frame(
+    layout_name: str,
+    stats: Sequence[str],
+    size: Tuple[int, int] = FRAME_SIZE,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Compose a BGR frame with the layout's menu guard and the given stat
+    templates pasted into place, on a dark noisy background.
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 48, size=(height, width, 3), dtype=np.uint8)
+    layout = next(l for l in LAYOUTS if l["name"] == layout_name)
+
+    guard = cv2.imread(str(MENU_TEMPLATES[layout["template_key"]]), cv2.IMREAD_COLOR)
+    if guard is not None:
+        _paste(frame, guard, layout["regions"][layout["menu_idx"]])
+    for region_idx, stat_name in zip(layout["stat_indices"], stats):
+        tpl = cv2.imread(str(MATCHED_DIR / f"{stat_name}.png"), cv2.IMREAD_GRAYSCALE)
+        if tpl is not None:
+            _paste(frame, tpl, layout["regions"][region_idx])
+    if layout["quality_idx"] is not None:
+        r, g, b = QUALITY_COLOR
+        pixel = np.full((1, 1, 3), (b, g, r), dtype=np.uint8)
+        _paste(frame, pixel, layout["regions"][layout["quality_idx"]])
+    return frame
+
+
+def synthetic_frames(count: int = 8, size: Tuple[int, int] = FRAME_SIZE) -> List[np.ndarray]:
+    names = sorted(p.stem for p in MATCHED_DIR.glob("*.png") if p.stem in Stat.__members__)
+    if len(names) < 3:
+        raise RuntimeError(f"Need at least 3 stat templates in {MATCHED_DIR}")
+    frames = []
+    for i in range(count):
+        layout = LAYOUTS[i % len(LAYOUTS)]["name"]
+        picks = [names[(i * 3 + k) % len(names)] for k in range(3)]
+        frames.append(synthetic_frame(layout, picks, size=size, seed=i))
+    return frames
+
+
+def _noisy_variants(text: str) -> List[str]:
+    out = [text, text.lower(), text.upper()]
+    for src, dst in OCR_NOISE:
+        if src in text:
+            out.append(text.replace(src, dst, 1))
+    return out
+
+
+# ---- Bench context ---------------------------------------------------------
+
+class BenchContext:
+    """Inputs shared by every stage, built once from the frame set."""
+
+    def __init__(self, frames: List[np.ndarray], index: WeaponIndex):
+        self.frames = frames
+        self.index = index
+        self.source = MemoryFrameSource(frames)
+        self.driver = LookupDriver(
+            guard_mode=GuardMode.IMAGE,
+            use_stat_cache=True,
+            frame_source=self.source,
+            scale_sets=True,
+        )
+        self.driver.use_quality_guard = False
+
+        self.guard_inputs: List[Tuple[Dict, np.ndarray]] = []
+        self.stat_crops: List[np.ndarray] = []
+        for frame in frames:
+            for layout in LAYOUTS:
+                self.guard_inputs.append((layout, self.driver._capture_region(layout, layout["menu_idx"], frame)))
+                imgs = self.driver._capture_all(layout, frame)
+                self.stat_crops.extend(imgs[i] for i in layout["stat_indices"])
+        self.stat_grays = [_to_gray(img) for img in self.stat_crops]
+
+        self.texts: List[str] = []
+        for values in STAT_MAPPING.values():
+            for opt in values if isinstance(values, list) else [values]:
+                self.texts.extend(_noisy_variants(opt))
+
+        self.stat_combos: List[Tuple[Stat, ...]] = []
+        for stats in index.weapons.values():
+            ordered = tuple(sorted(stats, key=lambda s: s.value))
+            self.stat_combos.append(ordered)
+            self.stat_combos.append(ordered[:2])
+        rng = np.random.default_rng(0)
+        members = list(Stat)
+        for _ in range(len(self.stat_combos)):
+            picks = rng.choice(len(members), size=3, replace=False)
+            self.stat_combos.append(tuple(members[i] for i in picks))
+
+    def reset(self) -> None:
+        self.driver.guard_mode = GuardMode.IMAGE
+        self.driver.ocr_mode = OcrMode.FULL
+        self.driver.frame_source = self.source
+        self.source.rewind()
+        self.driver.reset_delta()
+
+
+def _cycle(items: Sequence) -> Callable[[], object]:
+    it = itertools.cycle(items)
+    return lambda: next(it)
+
+
+# ---- Stages ----------------------------------------------------------------
+# Each factory takes the context and returns a zero-arg callable for one op.
+
+def _stage_guard(mode: GuardMode) -> Callable[[BenchContext], Callable[[], object]]:
+    def factory(ctx: BenchContext) -> Callable[[], object]:
+        ctx.driver.guard_mode = mode
+        nxt = _cycle(ctx.guard_inputs)
+
+        def op():
+            layout, img = nxt()
+            return ctx.driver._check_menu_guard(layout, img)
+
+        return op
+
+    return factory
+
+
+def _stage_low_contrast(ctx: BenchContext) -> Callable[[], object]:
+    nxt = _cycle(ctx.stat_crops)
+    return lambda: _low_contrast(nxt())
+
+
+def _stage_signature(ctx: BenchContext) -> Callable[[], object]:
+    nxt = _cycle(ctx.stat_grays)
+    return lambda: _signature(nxt())
+
+
+def _stage_stat_from_cache(ctx: BenchContext) -> Callable[[], object]:
+    nxt = _cycle(ctx.stat_crops)
+    return lambda: ctx.driver._stat_from_cache(nxt())
+
+
+def _stage_stat_slot(ctx: BenchContext) -> Callable[[], object]:
+    # One stat slot as read() handles it: contrast check, then cache lookup on the same Region
+    nxt = _cycle(ctx.stat_crops)
+
+    def op():
+        region = ctx.driver._region(nxt())
+        return _low_contrast(region) or ctx.driver._stat_from_cache(region)
+
+    return op
+
+
+def _stage_preprocess(ctx: BenchContext) -> Callable[[], object]:
+    nxt = _cycle(ctx.stat_crops)
+    return lambda: _preprocess_for_ocr(nxt())
+
+
+def _stage_ocr_text(ctx: BenchContext) -> Callable[[], object]:
+    nxt = _cycle(ctx.stat_crops)
+    return lambda: ctx.driver._ocr_text(nxt())
+
+
+def _stage_ocr_batch_rec(ctx: BenchContext) -> Callable[[], object]:
+    # One frame's three stat crops through the recognizer-only batch path
+    ctx.driver.ocr_mode = OcrMode.REC_ONLY
+    triples = [ctx.stat_crops[i:i + 3] for i in range(0, len(ctx.stat_crops) - 2, 3)]
+    nxt = _cycle(triples)
+    return lambda: ctx.driver._ocr_many(nxt())
+
+
+def _stage_choose_stat(ctx: BenchContext) -> Callable[[], object]:
+    nxt = _cycle(ctx.texts)
+    return lambda: _choose_stat(nxt(), STAT_MAPPING)
+
+
+def _stage_choose_stat_cold(ctx: BenchContext) -> Callable[[], object]:
+    # Memo disabled: every call pays the filtered fuzzy scoring
+    matcher = StatMatcher(STAT_MAPPING, memo_size=0)
+    nxt = _cycle(ctx.texts)
+    return lambda: matcher.match(nxt())
+
+
+def _stage_weapon_lookup(ctx: BenchContext) -> Callable[[], object]:
+    nxt = _cycle(ctx.stat_combos)
+    return lambda: ctx.index.lookup(*nxt())
+
+
+def _stage_read(ctx: BenchContext) -> Callable[[], object]:
+    return ctx.driver.read
+
+
+def _stage_read_unchanged(ctx: BenchContext) -> Callable[[], object]:
+    # Same frame every poll: measures the frame-delta short-circuit
+    ctx.driver.frame_source = MemoryFrameSource(ctx.frames[:1])
+    return ctx.driver.read
+
+
+STAGES: Dict[str, Callable[[BenchContext], Callable[[], object]]] = {
+    "guard_image": _stage_guard(GuardMode.IMAGE),
+    "guard_ocr": _stage_guard(GuardMode.OCR),
+    "low_contrast": _stage_low_contrast,
+    "signature": _stage_signature,
+    "stat_from_cache": _stage_stat_from_cache,
+    "stat_slot": _stage_stat_slot,
+    "preprocess_for_ocr": _stage_preprocess,
+    "ocr_text": _stage_ocr_text,
+    "ocr_batch_rec": _stage_ocr_batch_rec,
+    "choose_stat": _stage_choose_stat,
+    "choose_stat_cold": _stage_choose_stat_cold,
+    "weapon_lookup": _stage_weapon_lookup,
+    "read": _stage_read,
+    "read_unchanged": _stage_read_unchanged,
+}
+
+
+# ---- Timing ----------------------------------------------------------------
+
+def time_op(op: Callable[[], object], iterations: int, warmup: int = DEFAULT_WARMUP) -> np.ndarray:
+    for _ in range(warmup):
+        op()
+    samples = np.empty(iterations, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        start = clock()
+        op()
+        samples[i] = clock() - start
+    return samples
+
+
+def summarize(samples_ns: np.ndarray) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(samples_ns, [50, 95, 99]) / 1000.0
+    mean_s = float(samples_ns.mean()) / 1e9
+    return {
+        "n": int(samples_ns.size),
+        "p50_us": round(float(p50), 3),
+        "p95_us": round(float(p95), 3),
+        "p99_us": round(float(p99), 3),
+        "ops_per_sec": round(1.0 / mean_s, 1) if mean_s > 0 else float("inf"),
+    }
+
+
+def run_stages(
+    ctx: BenchContext,
+    names: Sequence[str],
+    iterations: int = DEFAULT_ITERATIONS,
+    ocr_iterations: int = DEFAULT_OCR_ITERATIONS,
+) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        ctx.reset()
+        op = STAGES[name](ctx)
+        n = ocr_iterations if name in OCR_STAGES else iterations
+        results[name] = summarize(time_op(op, n, warmup=min(DEFAULT_WARMUP, n)))
+    ctx.reset()
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = DEFAULT_TOLERANCE,
+    metric: str = "p50_us",
+) -> List[str]:
+    regressions = []
+    for name, summary in results.items():
+        ref = baseline.get(name)
+        if not ref or metric not in ref or ref[metric] <= 0:
+            continue
+        ratio = summary[metric] / ref[metric]
+        if ratio > 1.0 + tolerance:
+            regressions.append(f"{name}: {metric} {ref[metric]:.1f} -> {summary[metric]:.1f} ({ratio:.2f}x)")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'stage':<20}{'n':>7}{'p50 us':>12}{'p95 us':>12}{'p99 us':>12}{'ops/s':>12}")
+    for name, s in results.items():
+        print(f"{name:<20}{s['n']:>7}{s['p50_us']:>12.1f}{s['p95_us']:>12.1f}{s['p99_us']:>12.1f}{s['ops_per_sec']:>12.1f}")
+
+
+# ---- Allocations -----------------------------------------------------------
+
+def read_allocations(driver: LookupDriver, frames: int, reads: int = DEFAULT_ALLOC_READS) -> Dict[str, float]:
+    """
+    Per-read allocation under tracemalloc once pools and caches are warm:
+    peak traced bytes above the pre-read level (what a frame allocates at
+    once) and the bytes per read still held afterwards. frames is the length
+    of the source's replay cycle.
+    """
+    # Every frame twice, so buffers and scale sets exist, and enough reads to fill the
+    # rolling hit-ratio window, whose growth would otherwise count as retained
+    for _ in range(2 * frames + HIT_RATIO_WINDOW):
+        driver.read()
+    peaks = np.empty(reads, dtype=np.int64)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for i in range(reads):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            driver.read()
+            peaks[i] = tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return {
+        "reads": reads,
+        "peak_p50_bytes": int(np.percentile(peaks, 50)),
+        "peak_p95_bytes": int(np.percentile(peaks, 95)),
+        "peak_max_bytes": int(peaks.max()),
+        "retained_bytes_per_read": round(retained / reads, 1),
+    }
+
+
+def measure_allocations(ctx: BenchContext, reads: int = DEFAULT_ALLOC_READS) -> Dict[str, float]:
+    ctx.reset()
+    try:
+        alloc = read_allocations(ctx.driver, len(ctx.frames), reads)
+    finally:
+        ctx.reset()
+    return {**alloc, **{f"pool_{k}": v for k, v in ctx.driver.buffers.stats().items()}}
+
+
+# ---- Startup ---------------------------------------------------------------
+# Run in a fresh interpreter so module imports and model loads are cold.
+
+_STARTUP_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import lookup_driver
+from frame_source import DirectoryFrameSource
+t_import = time.perf_counter()
+src = DirectoryFrameSource(sys.argv[1], preload=True)
+t_src = time.perf_counter()
+driver = lookup_driver.LookupDriver(use_stat_cache=True, frame_source=src, lazy_ocr=sys.argv[2] != "eager")
+driver.use_quality_guard = False
+t_init = time.perf_counter()
+driver.read()
+t_read = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t_import - t0) * 1000,
+    "init_ms": (t_init - t_src) * 1000,
+    "first_read_ms": (t_read - t_init) * 1000,
+    # frame decoding is bench setup, not startup cost
+    "time_to_first_read_ms": ((t_read - t0) - (t_src - t_import)) * 1000,
+}))
+"""
+
+
+def measure_startup(frame: np.ndarray, runs: int = 3) -> Dict[str, Dict[str, float]]:
+    """Median cold time-to-first-read for lazy vs eager OCR construction."""
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cv2.imwrite(str(Path(tmp) / "frame.png"), frame)
+        for mode in ("lazy", "eager"):
+            samples = []
+            for _ in range(runs):
+                out = subprocess.run(
+                    [sys.executable, "-c", _STARTUP_CHILD, tmp, mode],
+                    capture_output=True, text=True, check=True, cwd=str(Path(__file__).resolve().parent),
+                )
+                samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            results[mode] = {
+                key: round(float(np.median([s[key] for s in samples])), 1)
+                for key in ("import_ms", "init_ms", "first_read_ms", "time_to_first_read_ms")
+            }
+    return results
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def _parse_size(text: str) -> Tuple[int, int]:
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+
+def load_frames(directory: Optional[Path], count: int, size: Tuple[int, int] = FRAME_SIZE) -> List[np.ndarray]:
+    if directory is None:
+        return synthetic_frames(count, size)
+    src = DirectoryFrameSource(directory, preload=True)
+    return [src.grab() for _ in range(min(len(src), count) if count > 0 else len(src))]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=Path, help="folder of recorded full-window captures")
+    parser.add_argument("--max-frames", type=int, default=16, help="frames to load (0 = all)")
+    parser.add_argument("--size", type=_parse_size, default=FRAME_SIZE, help="synthetic frame size, e.g. 2560x1440")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--skip-ocr", action="store_true", help="skip the RapidOCR-bound stages")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--ocr-iterations", type=int, default=DEFAULT_OCR_ITERATIONS)
+    parser.add_argument("--save-baseline", type=Path, help="write results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--metric", default="p50_us", choices=["p50_us", "p95_us", "p99_us"])
+    parser.add_argument("--startup", action="store_true", help="measure cold time-to-first-read instead")
+    parser.add_argument("--alloc", action="store_true", help="measure steady-state allocations per read instead")
+    parser.add_argument("--alloc-reads", type=int, default=DEFAULT_ALLOC_READS)
+    parser.add_argument("--max-alloc-bytes", type=int, help="with --alloc, fail when p95 per-read peak exceeds this")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.frames, args.max_frames, args.size)
+    if args.startup:
+        for mode, timings in measure_startup(frames[0]).items():
+            print(f"[STARTUP] {mode:<6} " + " ".join(f"{k}={v}" for k, v in timings.items()))
+        return 0
+    ctx = BenchContext(frames, load_index_from_json(WEAPON_JSON))
+    if args.alloc:
+        alloc = measure_allocations(ctx, args.alloc_reads)
+        print("[ALLOC] " + " ".join(f"{k}={v}" for k, v in alloc.items()))
+        if args.max_alloc_bytes is not None and alloc["peak_p95_bytes"] > args.max_alloc_bytes:
+            print(f"[REGRESSION] per-read peak {alloc['peak_p95_bytes']} B > {args.max_alloc_bytes} B", file=sys.stderr)
+            return 1
+        return 0
+    names = [n for n in args.stages if not (args.skip_ocr and n in OCR_STAGES)]
+
+    print(f"[INFO] {len(frames)} frames, {len(ctx.stat_crops)} stat crops, {len(ctx.texts)} texts")
+    results = run_stages(ctx, names, args.iterations, args.ocr_iterations)
+    print_table(results)
+
+    if args.save_baseline:
+        payload = {
+            "meta": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "frames": str(args.frames) if args.frames else "synthetic",
+            },
+            "stages": results,
+        }
+        args.save_baseline.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"[INFO] Saved baseline -> {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get("stages", {})
+        regressions = compare(results, baseline, args.tolerance, args.metric)
+        if regressions:
+            for line in regressions:
+                print(f"[REGRESSION] {line}", file=sys.stderr)
+            return 1
+        print(f"[INFO] No stage regressed more than {args.tolerance:.0%} on {args.metric}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
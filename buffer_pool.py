@@ -0,0 +1,41 @@
+"""
+Preallocated scratch arrays for LookupDriver's per-frame image path.
+
+Region grays, OCR upscales and fingerprint thumbnails are written into
+arrays handed out here (cv2 dst= / numpy out=) instead of fresh ones, so a
+steady stream of same-sized frames allocates no image memory. Buffers are
+keyed by name plus the region rectangle; a key asked for with a new shape
+gets a new buffer, and LookupDriver clears the pool when the window
+geometry changes.
+"""
+from __future__ import annotations
+
+from typing import Dict, Hashable, Tuple
+
+import numpy as np
+
+BufferKey = Tuple[str, Hashable]
+
+
+class BufferPool:
+    def __init__(self) -> None:
+        self._buffers: Dict[BufferKey, np.ndarray] = {}
+        self.allocations = 0
+
+    def get(self, name: str, key: Hashable, shape: Tuple[int, ...], dtype: np.dtype = np.uint8) -> np.ndarray:
+        """The buffer for (name, key), reallocated only when shape or dtype differ. Contents are undefined."""
+        buf = self._buffers.get((name, key))
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name, key] = np.empty(shape, dtype)
+            self.allocations += 1
+        return buf
+
+    def clear(self) -> None:
+        self._buffers.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffers": len(self._buffers),
+            "bytes": sum(b.nbytes for b in self._buffers.values()),
+            "allocations": self.allocations,
+        }
@@ -0,0 +1,223 @@
+"""
+Background writer for LookupDriver debug images.
+
+read() hands crops to submit(), which copies them into a bounded queue and
+returns; a single writer thread encodes and saves them. When the queue is
+full the oldest pending image is dropped, so a slow disk can never hold up
+recognition. Only 1 in sample_every frames is kept, and the output folder is
+a ring buffer: once it holds more than max_files images or max_bytes, the
+oldest files are deleted (including ones left over from earlier sessions).
+
+    python debug_writer.py info      # what is in data/tmp/ocr_debug
+    python debug_writer.py clear
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+# ---- Configuration ---------------------------------------------------------
+
+DEBUG_DIR = Path("data/tmp/ocr_debug")
+IMAGE_FORMAT = "png"  # png | jpg | webp
+QUALITY: Dict[str, int] = {
+    "png": 1,  # zlib level 0-9; low levels encode fastest, UI crops compress well anyway
+    "jpg": 90,  # 0-100
+    "webp": 90,  # 0-100 (101 = lossless)
+}
+QUEUE_SIZE = 64  # pending images before the oldest is dropped
+MAX_FILES = 500
+MAX_BYTES = 200 * 1024 * 1024
+SAMPLE_EVERY = 1  # keep 1 in N frames
+
+_PARAMS = {
+    "png": cv2.IMWRITE_PNG_COMPRESSION,
+    "jpg": cv2.IMWRITE_JPEG_QUALITY,
+    "webp": cv2.IMWRITE_WEBP_QUALITY,
+}
+
+
+class DebugImageWriter:
+    def __init__(
+        self,
+        directory: Union[str, Path] = DEBUG_DIR,
+        fmt: str = IMAGE_FORMAT,
+        quality: Optional[int] = None,
+        queue_size: int = QUEUE_SIZE,
+        max_files: int = MAX_FILES,
+        max_bytes: int = MAX_BYTES,
+        sample_every: int = SAMPLE_EVERY,
+    ):
+        if fmt not in _PARAMS:
+            raise ValueError(f"fmt must be one of {sorted(_PARAMS)}")
+        if sample_every < 1:
+            raise ValueError("sample_every must be >= 1")
+        self.directory = Path(directory)
+        self.fmt = fmt
+        self.params = [_PARAMS[fmt], QUALITY[fmt] if quality is None else quality]
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.sample_every = sample_every
+
+        self.frames = 0
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.deleted = 0
+        self._sampled = False
+        self._pending: Deque[Tuple[Path, np.ndarray]] = deque()
+        self._queue_size = queue_size
+        self._cond = threading.Condition()
+        self._closed = False
+        # File names carry the session start so a new run never reuses an earlier run's names
+        self.session = time.strftime("%Y%m%d-%H%M%S")
+        self._files: "OrderedDict[Path, int]" = OrderedDict()  # path -> bytes, oldest first
+        self._bytes = 0
+        self._thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+        self._thread.start()
+
+    # ---- Producer side (hot path) ---------------------------------------------
+
+    def begin_frame(self) -> bool:
+        """Start a new frame; returns whether its images will be kept."""
+        self.frames += 1
+        self._sampled = (self.frames - 1) % self.sample_every == 0
+        return self._sampled
+
+    def submit(self, name: str, img: np.ndarray) -> bool:
+        """Queue img as <session>_<frame>_<name>.<fmt> if the current frame is sampled."""
+        if not self._sampled or self._closed:
+            return False
+        # Regions are views into a frame buffer the source may reuse; keep a private copy
+        item = (self.directory / f"{self.session}_{self.frames:06d}_{name}.{self.fmt}", np.array(img))
+        with self._cond:
+            if len(self._pending) >= self._queue_size:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(item)
+            self.submitted += 1
+            self._cond.notify()
+        return True
+
+    # ---- Writer thread ------------------------------------------------------------
+
+    def _scan_existing(self) -> None:
+        files = []
+        for path in self.directory.iterdir():
+            if path.is_file() and path.suffix.lower() in (".png", ".jpg", ".webp"):
+                st = path.stat()
+                files.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(files):
+            self._track(path, size)
+
+    def _track(self, path: Path, size: int) -> None:
+        # A path written again (e.g. two sessions started in the same second) is counted once
+        old = self._files.pop(path, None)
+        if old is not None:
+            self._bytes -= old
+        self._files[path] = size
+        self._bytes += size
+
+    def _enforce_retention(self) -> None:
+        while self._files and (len(self._files) > self.max_files or self._bytes > self.max_bytes):
+            path, size = self._files.popitem(last=False)
+            self._bytes -= size
+            try:
+                path.unlink()
+                self.deleted += 1
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                print(f"[WARN] Could not delete debug image {path}: {exc}", file=sys.stderr)
+
+    def _write(self, path: Path, img: np.ndarray) -> None:
+        ok, buf = cv2.imencode(path.suffix, img, self.params)
+        if not ok:
+            self.failed += 1
+            return
+        try:
+            buf.tofile(str(path))
+        except OSError as exc:
+            self.failed += 1
+            print(f"[WARN] Could not write debug image {path}: {exc}", file=sys.stderr)
+            return
+        self.written += 1
+        self._track(path, buf.nbytes)
+        self._enforce_retention()
+
+    def _run(self) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._scan_existing()
+            self._enforce_retention()
+        except OSError as exc:
+            print(f"[WARN] Debug image folder {self.directory} unavailable: {exc}", file=sys.stderr)
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path, img = self._pending.popleft()
+            self._write(path, img)
+
+    # ---- Lifecycle ------------------------------------------------------------------
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush what is queued (up to timeout) and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames": self.frames,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "deleted": self.deleted,
+            "pending": len(self._pending),
+            "files": len(self._files),
+            "bytes": self._bytes,
+        }
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def _debug_files(directory: Path) -> List[Path]:
+    if not directory.exists():
+        return []
+    return [p for p in directory.iterdir() if p.is_file() and p.suffix.lower() in (".png", ".jpg", ".webp")]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cmd", choices=["info", "clear"])
+    parser.add_argument("--dir", type=Path, default=DEBUG_DIR)
+    args = parser.parse_args(argv)
+
+    files = _debug_files(args.dir)
+    if args.cmd == "info":
+        total = sum(p.stat().st_size for p in files)
+        print(f"[INFO] {args.dir}: {len(files)} images, {total / 1024 / 1024:.1f} MB")
+        return 0
+    for path in files:
+        os.remove(path)
+    print(f"[INFO] Removed {len(files)} images from {args.dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Online stat-cache learning from confident OCR reads.
+
+A stat slot the signature cache cannot resolve goes to OCR. When OCR is sure
+of it (recognizer score >= min_ocr_score, and the text beats every other
+stat's aliases by min_text_margin, well above the matcher's own margin), the
+crop is added to the template store as an exemplar of that stat, so the next
+sighting is a cache hit. Learned exemplars live in the store's user layer,
+never in the shipped store; TemplateStore caps them per stat and evicts the
+least recently used one. LookupDriver only learns in learning mode
+(learn_stat_cache=True, LEARN_STAT_CACHE in main.py).
+
+A crop within conflict_hamming bits of an exemplar of a *different* stat is
+claimed by both and is not learned. A learned exemplar that confident OCR
+contradicts evict_after times is evicted, letting the crop be learned the next
+time it is seen. New exemplars are saved at most once per save_interval while running,
+and by flush() (LookupDriver.close) on shutdown.
+
+    python exemplar_learner.py                        # synthetic frames, store starting empty
+    python exemplar_learner.py --frames path/to/frames --passes 5
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from collections import Counter as TallyCounter
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Essence_Helper import Stat
+from metrics import MetricsRegistry
+from stat_matcher import StatMatcher
+from template_store import TemplateStore
+
+# ---- Configuration ---------------------------------------------------------
+
+MIN_OCR_SCORE = 0.90  # recognizer confidence
+MIN_TEXT_MARGIN = 0.15  # alias score lead over any other stat (matcher accepts at 0.07)
+CONFLICT_HAMMING = 12  # another stat's exemplar this close claims the same crop
+EVICT_AFTER = 3  # confident contradictions before a conflicting exemplar is dropped
+SAVE_INTERVAL = 60.0  # seconds between store saves while learning
+OUTCOMES = ("unsure", "known", "learned", "conflict", "evicted")
+
+
+class ExemplarLearner:
+    def __init__(
+        self,
+        store: TemplateStore,
+        matcher: StatMatcher,
+        metrics: Optional[MetricsRegistry] = None,
+        path: Optional[Path] = None,
+        min_ocr_score: float = MIN_OCR_SCORE,
+        min_text_margin: float = MIN_TEXT_MARGIN,
+        conflict_hamming: int = CONFLICT_HAMMING,
+        evict_after: int = EVICT_AFTER,
+        save_interval: float = SAVE_INTERVAL,
+    ):
+        self.store = store
+        self.matcher = matcher
+        self.path = path
+        self.min_ocr_score = min_ocr_score
+        self.min_text_margin = min_text_margin
+        self.conflict_hamming = conflict_hamming
+        self.evict_after = evict_after
+        self.save_interval = save_interval
+        self.saves = 0
+        # (stat name, signature bytes) of a stored exemplar -> confident contradictions
+        self._contradicted: TallyCounter = TallyCounter()
+        self._next_save = time.monotonic() + save_interval
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._m_offers = {
+            outcome: metrics.counter("exemplar_offers_total", "OCR-resolved stat crops offered to the learner", outcome=outcome)
+            for outcome in OUTCOMES
+        }
+        self._m_saves = metrics.counter("stat_store_saves_total", "template store saves by the learner")
+
+    def confident(self, text: str, ocr_score: Optional[float]) -> Optional[Stat]:
+        """The stat text reads as, if OCR and the alias match are both sure enough to learn from."""
+        if ocr_score is None or ocr_score < self.min_ocr_score:
+            return None
+        stat, score, margin = self.matcher.scored(text)
+        if stat is None or score < self.matcher.threshold or margin < self.min_text_margin:
+            return None
+        return stat
+
+    def offer(
+        self,
+        stat: Stat,
+        text: str,
+        ocr_score: Optional[float],
+        gray: np.ndarray,
+        sig: np.ndarray,
+        dists: np.ndarray,
+        ids: np.ndarray,
+        rows: np.ndarray,
+    ) -> str:
+        """
+        Learn gray (the crop at its 1080p reference size) as an exemplar of
+        stat, which OCR read as text. sig is the crop's live signature;
+        dists/ids/rows give its distance to every signature the cache matches
+        against, with its Stat value and store row.
+        Returns one of OUTCOMES; "learned" and "evicted" changed the store.
+        """
+        outcome = self._offer(stat, text, ocr_score, gray, sig, dists, ids, rows)
+        self._m_offers[outcome].inc()
+        return outcome
+
+    def _offer(self, stat, text, ocr_score, gray, sig, dists, ids, rows) -> str:
+        if self.confident(text, ocr_score) is not stat:
+            return "unsure"
+        claimed = np.flatnonzero((ids != stat.value) & (dists <= self.conflict_hamming))
+        if claimed.size:
+            nearest = int(rows[claimed[int(dists[claimed].argmin())]])
+            key = (self.store.stat_names[nearest], self.store.signatures()[nearest].tobytes())
+            self._contradicted[key] += 1
+            if self._contradicted[key] < self.evict_after:
+                return "conflict"
+            del self._contradicted[key]
+            idx = self.store.find(key[0], np.frombuffer(key[1], dtype=np.uint8))
+            if idx is None or self.store.is_seed(idx):
+                return "conflict"  # shipped exemplars are read-only
+            self.store.remove(idx)
+            return "evicted"
+        if self.store.add(stat.name, gray) is None:
+            return "known"  # a near-identical exemplar exists; add() bumped its hits
+        return "learned"
+
+    def maybe_save(self, now: Optional[float] = None) -> bool:
+        """Save the store if exemplars changed and save_interval has passed."""
+        now = time.monotonic() if now is None else now
+        if not self.store.dirty or now < self._next_save:
+            return False
+        self._next_save = now + self.save_interval
+        return self.flush()
+
+    def flush(self) -> bool:
+        """Save exemplars learned since the last save now, e.g. on shutdown."""
+        if not self.store.dirty:
+            return False
+        try:
+            self.store.save(self.path)
+        except OSError as exc:
+            print(f"[WARN] Could not save learned exemplars: {exc}", file=sys.stderr)
+            return False
+        self.saves += 1
+        self._m_saves.inc()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {outcome: m.value for outcome, m in self._m_offers.items()}
+
+
+# ---- Demo ------------------------------------------------------------------
+
+def _jittered(frames: Sequence[np.ndarray], seed: int) -> Tuple[np.ndarray, ...]:
+    """Brightness/contrast/noise variants, so a later pass is not a pixel-exact replay."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for frame in frames:
+        gain = rng.uniform(0.85, 1.15)
+        noise = rng.normal(0.0, 3.0, frame.shape)
+        out.append(np.clip(frame * gain + rng.uniform(-12, 12) + noise, 0, 255).astype(np.uint8))
+    return tuple(out)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from bench_pipeline import load_frames
+    from frame_source import MemoryFrameSource
+    from lookup_driver import GuardMode, LookupDriver, OcrMode
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=Path, help="folder of recorded captures (synthetic if omitted)")
+    parser.add_argument("--max-frames", type=int, default=16)
+    parser.add_argument("--passes", type=int, default=4, help="replays of the frame set, each with new jitter")
+    parser.add_argument("--seed-store", action="store_true", help="start from data/stat_templates.npy instead of empty")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.frames, args.max_frames)
+    with tempfile.TemporaryDirectory() as tmp:
+        driver = LookupDriver(
+            guard_mode=GuardMode.IMAGE,
+            use_stat_cache=True,
+            learn_stat_cache=True,
+            ocr_mode=OcrMode.REC_ONLY,
+            frame_source=MemoryFrameSource(frames),
+            skip_unchanged=False,
+        )
+        driver.use_quality_guard = False
+        # Learn into a scratch copy; neither the shipped nor the user store is written
+        store_path = Path(tmp) / "stat_templates.npy"
+        if not args.seed_store:
+            driver.stat_store = TemplateStore(path=store_path)
+        driver.stat_store.path = store_path
+        driver.learner.store = driver.stat_store  # type: ignore[union-attr]
+        driver.learner.path = store_path  # type: ignore[union-attr]
+        driver._rebuild_stat_matrix()
+
+        for n in range(args.passes):
+            driver.frame_source = MemoryFrameSource(_jittered(frames, n) if n else frames)
+            cache = {k: driver.metrics.value("stat_cache_total", result=k) for k in ("strict", "margin", "miss")}
+            t0 = time.perf_counter()
+            for _ in frames:
+                driver.read()
+            took = time.perf_counter() - t0
+            done = {k: driver.metrics.value("stat_cache_total", result=k) - v for k, v in cache.items()}
+            slots = sum(done.values())
+            ocr_share = done["miss"] / slots if slots else 0.0
+            print(
+                f"[INFO] pass {n + 1}: ocr_share={ocr_share:.2f} cache={done} "
+                f"exemplars={len(driver.stat_store)} ms_per_read={took * 1000 / len(frames):.1f}"
+            )
+        hit_ratio = driver.metrics.snapshot()["gauges"]["stat_cache_hit_ratio"][0]["value"]
+        print(f"[INFO] learner {driver.learner.stats()} saves={driver.learner.saves} hit_ratio={hit_ratio:.2f}")  # type: ignore[union-attr]
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
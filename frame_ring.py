@@ -0,0 +1,516 @@
+"""
+Shared-memory frame ring between a capture process and recognition workers.
+
+The capture process grabs frames from any FrameSource and copies each one
+into the next free slot of a multiprocessing.shared_memory ring, stamped with
+a sequence number. Readers (LookupDriver via RingFrameSource) pin the newest
+slot and copy it out - one memcpy, no pickling - and simply skip any
+sequence numbers they were too slow to see. A slow OCR call therefore never
+delays the next grab.
+
+    python frame_ring.py                         # synthetic producer, 1 worker
+    python frame_ring.py --frames path/to/frames --workers 2 --seconds 10
+
+Single producer. Each reader owns a pin row (held slot, candidate slot); the
+writer skips pinned slots and the newest published one, so
+slots >= 2 * readers + 2 always leaves it somewhere to write.
+
+Pins only make slot reuse under a reader rare, they do not rule it out. The
+handshake (writer: mark busy, then read the pins; reader: pin, then read the
+slot's sequence number) is a store followed by a load of another location on
+both sides, with no fence in between, and every CPU - x86 TSO included - may
+let that load see a stale value. So both sides can miss each other and the
+writer can refill a slot a reader has just pinned.
+
+What frames rely on instead is a seqlock: the writer sets the slot's sequence
+number to -1 before touching its pixels and to the new number after, and a
+reader re-reads it once it is done with the frame; any change means the frame
+may be torn. RingFrameSource copies each frame and re-checks before returning
+it, discarding torn copies. With copy=False it returns the slot in place, and
+the caller must check intact() after using the frame and discard whatever it
+computed when that fails. The re-check needs loads and stores to stay in
+program order, which x86/x86-64 (TSO) guarantees; weakly ordered CPUs (ARM)
+would need barriers that Python cannot emit.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import multiprocessing
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from frame_source import FrameSource, FrameSourceExhausted
+
+# ---- Configuration ---------------------------------------------------------
+
+DEFAULT_READERS = 2
+DEFAULT_SLOTS = 2 * DEFAULT_READERS + 2
+CAPTURE_FPS = 30.0  # cap for the capture loop; 0 = as fast as the source allows
+READ_WAIT = 0.05  # seconds a reader waits for a newer frame before reusing the current one
+START_TIMEOUT = 10.0  # seconds to wait for the capture process's first frame
+
+_MAGIC = 0x52464845  # "EHFR"
+# control block (int64): magic, latest seq, latest slot, slots, readers, max_h, max_w, max_c, oversize
+_MAGIC_F, _LATEST, _LATEST_SLOT, _SLOTS, _READERS, _MAX_H, _MAX_W, _MAX_C, _OVERSIZE = range(9)
+_CTRL_FIELDS = 9
+_META_FIELDS = 4  # per slot: h, w, c (0 = 2-D), capture time (ns)
+_PIN_RETRIES = 8
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    # Attaching must not hand the block to another resource tracker, or it
+    # would be unlinked when that tracker shuts down. Python >= 3.13 can opt
+    # out; before that, attach only from processes started by start_capture's
+    # family (spawned children share the creator's tracker, whose set of names
+    # simply dedupes the registration).
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class FrameRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+        ctrl = np.ndarray((_CTRL_FIELDS,), dtype=np.int64, buffer=buf)
+        if int(ctrl[_MAGIC_F]) != _MAGIC:
+            raise ValueError(f"{shm.name} is not a frame ring")
+        self.slots = int(ctrl[_SLOTS])
+        self.readers = int(ctrl[_READERS])
+        self.max_shape = (int(ctrl[_MAX_H]), int(ctrl[_MAX_W]), int(ctrl[_MAX_C]))
+        self.slot_bytes = int(np.prod([d for d in self.max_shape if d]))
+
+        offset = _CTRL_FIELDS * 8
+        self._ctrl = ctrl
+        self._slot_seq = np.ndarray((self.slots,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.slots * 8
+        self._meta = np.ndarray((self.slots, _META_FIELDS), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.slots * _META_FIELDS * 8
+        self._pins = np.ndarray((self.readers, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.readers * 2 * 8
+        offset = -(-offset // 64) * 64  # cache-line align the pixel data
+        self._data = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8, buffer=buf, offset=offset)
+        self._next = 0
+
+    @staticmethod
+    def _size(slots: int, readers: int, slot_bytes: int) -> int:
+        head = (_CTRL_FIELDS + slots + slots * _META_FIELDS + readers * 2) * 8
+        return -(-head // 64) * 64 + slots * slot_bytes
+
+    @classmethod
+    def create(
+        cls,
+        max_shape: Tuple[int, ...],
+        slots: int = DEFAULT_SLOTS,
+        readers: int = DEFAULT_READERS,
+        name: Optional[str] = None,
+    ) -> "FrameRing":
+        if slots < 2 * readers + 2:
+            raise ValueError("slots must be at least 2 * readers + 2")
+        h, w = max_shape[:2]
+        c = max_shape[2] if len(max_shape) > 2 else 0
+        slot_bytes = h * w * max(c, 1)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls._size(slots, readers, slot_bytes))
+        ctrl = np.ndarray((_CTRL_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        ctrl[:] = (_MAGIC, -1, -1, slots, readers, h, w, c, 0)
+        ring = cls(shm, owner=True)
+        ring._slot_seq[:] = -1
+        ring._pins[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        return cls(_attach_shm(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self._ctrl[_LATEST])
+
+    @property
+    def oversize(self) -> int:
+        return int(self._ctrl[_OVERSIZE])
+
+    # ---- Producer -----------------------------------------------------------
+
+    def _claim_slot(self) -> int:
+        latest = int(self._ctrl[_LATEST_SLOT])
+        for step in range(self.slots):
+            slot = (self._next + step) % self.slots
+            if slot == latest or slot in self._pins:
+                continue
+            old = int(self._slot_seq[slot])
+            self._slot_seq[slot] = -1  # busy first, then re-check: a racing reader sees -1 and retries
+            if slot in self._pins:
+                self._slot_seq[slot] = old
+                continue
+            self._next = slot + 1
+            return slot
+        raise RuntimeError("No free slot; slots must be at least 2 * readers + 2")
+
+    def write(self, frame: np.ndarray) -> int:
+        """Publish one frame; returns its sequence number (-1 if it does not fit a slot)."""
+        if frame.nbytes > self.slot_bytes or frame.ndim not in (2, 3):
+            self._ctrl[_OVERSIZE] += 1
+            return -1
+        slot = self._claim_slot()
+        dst = self._data[slot, : frame.nbytes].reshape(frame.shape)
+        np.copyto(dst, frame)
+        h, w = frame.shape[:2]
+        self._meta[slot] = (h, w, frame.shape[2] if frame.ndim == 3 else 0, time.time_ns())
+        seq = int(self._ctrl[_LATEST]) + 1
+        self._slot_seq[slot] = seq
+        self._ctrl[_LATEST_SLOT] = slot
+        self._ctrl[_LATEST] = seq
+        return seq
+
+    # ---- Readers ------------------------------------------------------------
+
+    def acquire_latest(self, reader: int, after: int = -1) -> Optional[Tuple[int, np.ndarray, int]]:
+        """
+        Pin the newest frame with a sequence number above after and return
+        (seq, zero-copy view, capture time ns), or None if there is none yet.
+        The previously acquired view stays pinned until a newer one is, so it
+        is valid until the next successful acquire or release(reader).
+        """
+        pin = self._pins[reader]
+        for _ in range(_PIN_RETRIES):
+            seq = int(self._ctrl[_LATEST])
+            slot = int(self._ctrl[_LATEST_SLOT])
+            if seq <= after or slot < 0:
+                return None
+            pin[1] = slot  # candidate pin, then validate
+            if int(self._slot_seq[slot]) == seq:
+                pin[0] = slot
+                pin[1] = -1
+                h, w, c, t_ns = (int(v) for v in self._meta[slot])
+                shape = (h, w, c) if c else (h, w)
+                view = self._data[slot, : h * w * max(c, 1)].reshape(shape)
+                return seq, view, t_ns
+            pin[1] = -1  # overwritten under us; go again
+        return None
+
+    def is_current(self, reader: int, seq: int) -> bool:
+        """Whether the slot reader has pinned still holds frame seq (the seqlock re-check, after reading it)."""
+        slot = int(self._pins[reader, 0])
+        return slot >= 0 and int(self._slot_seq[slot]) == seq
+
+    def release(self, reader: int) -> None:
+        self._pins[reader] = -1
+
+    def close(self) -> None:
+        # drop our views before closing the mapping
+        self._ctrl = self._slot_seq = self._meta = self._pins = self._data = None  # type: ignore[assignment]
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a caller still holds a frame view; the mapping goes with the process
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingFrameSource(FrameSource):
+    """
+    FrameSource for LookupDriver backed by a FrameRing reader slot. grab()
+    returns a private copy of the newest frame, re-checked after copying; a
+    copy the writer overwrote midway is counted as torn and replaced by the
+    next frame. Frames published in between are dropped and counted.
+
+    copy=False returns the slot in place instead. Such a view can be
+    overwritten while it is in use, so check intact() once done with it and
+    throw the result away if it fails.
+    """
+
+    def __init__(
+        self,
+        ring: FrameRing,
+        reader: int = 0,
+        wait: float = READ_WAIT,
+        timeout: float = START_TIMEOUT,
+        copy: bool = True,
+    ):
+        if not 0 <= reader < ring.readers:
+            raise ValueError(f"reader must be in [0, {ring.readers})")
+        self.ring = ring
+        self.reader = reader
+        self.wait = wait
+        self.timeout = timeout
+        self.copy = copy
+        self.last_seq = -1
+        self.last_capture_ns = 0
+        self.frames = 0
+        self.dropped = 0
+        self.repeats = 0
+        self.torn = 0
+        self._view: Optional[np.ndarray] = None
+
+    def grab(self) -> np.ndarray:
+        deadline = time.monotonic() + (self.wait if self._view is not None else self.timeout)
+        while True:
+            got = self.ring.acquire_latest(self.reader, self.last_seq)
+            if got is not None and self.copy:
+                got = self._validated_copy(*got)
+            if got is not None:
+                break
+            if time.monotonic() >= deadline:
+                if self._view is None:
+                    raise FrameSourceExhausted
+                # capture is idle or paused: hand back the frame we still hold
+                self.repeats += 1
+                return self._view
+            time.sleep(0.001)
+
+        seq, view, t_ns = got
+        if self.last_seq >= 0:
+            self.dropped += max(seq - self.last_seq - 1, 0)
+        self.last_seq = seq
+        self.last_capture_ns = t_ns
+        self.frames += 1
+        self._view = view
+        return view
+
+    def _validated_copy(self, seq: int, view: np.ndarray, t_ns: int) -> Optional[Tuple[int, np.ndarray, int]]:
+        frame = view.copy()
+        if not self.ring.is_current(self.reader, seq):
+            self.torn += 1  # rewritten while we copied; the next frame replaces it
+            return None
+        return seq, frame, t_ns
+
+    def intact(self) -> bool:
+        """Whether the last grabbed frame's slot has not been rewritten; required after using a copy=False view."""
+        return self.last_seq >= 0 and self.ring.is_current(self.reader, self.last_seq)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "repeats": self.repeats,
+            "torn": self.torn,
+            "last_seq": self.last_seq,
+        }
+
+    def close(self) -> None:
+        self._view = None
+        self.ring.release(self.reader)
+
+
+# ---- Capture process -------------------------------------------------------
+
+def _capture_main(
+    make_source: Callable[[], FrameSource],
+    slots: int,
+    readers: int,
+    max_shape: Optional[Tuple[int, ...]],
+    max_fps: float,
+    ready: "multiprocessing.Queue",
+    running: "multiprocessing.synchronize.Event",
+    stop: "multiprocessing.synchronize.Event",
+    counters: "multiprocessing.sharedctypes.Synchronized",
+) -> None:
+    try:
+        source = make_source()
+        first = source.grab()
+        ring = FrameRing.create(max_shape or first.shape, slots, readers)
+    except Exception as exc:  # reported to the parent instead of a silent dead child
+        ready.put(("error", repr(exc)))
+        return
+    ready.put(("ok", ring.name))
+
+    interval = 1.0 / max_fps if max_fps > 0 else 0.0
+    frame: Optional[np.ndarray] = first
+    try:
+        while not stop.is_set():
+            if not running.wait(0.1):
+                continue
+            t0 = time.perf_counter()
+            try:
+                if frame is None:
+                    frame = source.grab()
+            except FrameSourceExhausted:
+                break
+            except Exception as exc:  # window gone/minimised: keep the ring, try again shortly
+                print(f"[WARN] Capture failed: {exc}", file=sys.stderr)
+                stop.wait(0.5)
+                continue
+            ring.write(frame)
+            frame = None
+            counters.value += 1
+            spare = interval - (time.perf_counter() - t0)
+            if spare > 0:
+                stop.wait(spare)
+    finally:
+        source.close()
+        # Readers keep their own mapping; unlinking only removes the name
+        ring.close()
+
+
+class CaptureProcess:
+    """Handle on a running capture process and the ring it publishes into."""
+
+    def __init__(self, process: multiprocessing.Process, ring: FrameRing, running, stop, counters):
+        self.process = process
+        self.ring = ring
+        self._running = running
+        self._stop = stop
+        self._counters = counters
+
+    @property
+    def frames(self) -> int:
+        return int(self._counters.value)
+
+    def pause(self) -> None:
+        self._running.clear()
+
+    def resume(self) -> None:
+        self._running.set()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._running.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.ring.close()
+
+
+def start_capture(
+    make_source: Callable[[], FrameSource],
+    slots: int = DEFAULT_SLOTS,
+    readers: int = DEFAULT_READERS,
+    max_shape: Optional[Tuple[int, ...]] = None,
+    max_fps: float = CAPTURE_FPS,
+    paused: bool = False,
+) -> CaptureProcess:
+    """
+    Start a capture process that publishes make_source() frames into a new
+    ring. make_source must be picklable (e.g. functools.partial of a
+    FrameSource class) and is called in the child, so mss and window handles
+    are never shared across processes. Slots are sized to the first frame
+    unless max_shape is given.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    running, stop = ctx.Event(), ctx.Event()
+    counters = ctx.Value("q", 0)
+    if not paused:
+        running.set()
+    process = ctx.Process(
+        target=_capture_main,
+        args=(make_source, slots, readers, max_shape, max_fps, ready, running, stop, counters),
+        name="frame-capture",
+        daemon=True,
+    )
+    process.start()
+    try:
+        status, detail = ready.get(timeout=START_TIMEOUT)
+    except queue.Empty:
+        process.terminate()
+        raise RuntimeError("Capture process did not deliver a first frame") from None
+    if status != "ok":
+        process.join()
+        raise RuntimeError(f"Capture process failed to start: {detail}")
+    return CaptureProcess(process, FrameRing.attach(detail), running, stop, counters)
+
+
+# ---- Demo / benchmark ------------------------------------------------------
+
+def _synthetic_source(count: int) -> FrameSource:
+    from bench_pipeline import synthetic_frames
+    from frame_source import MemoryFrameSource
+
+    return MemoryFrameSource(synthetic_frames(count), loop=True)
+
+
+def _directory_source(directory: str) -> FrameSource:
+    from frame_source import DirectoryFrameSource
+
+    return DirectoryFrameSource(directory, loop=True, preload=True)
+
+
+def _worker_main(name: str, reader: int, seconds: float, results: "multiprocessing.Queue") -> None:
+    from lookup_driver import GuardMode, LookupDriver
+
+    ring = FrameRing.attach(name)
+    source = RingFrameSource(ring, reader, copy=False)  # in place; every read is checked with intact()
+    driver = LookupDriver(
+        guard_mode=GuardMode.IMAGE, use_stat_cache=True, skip_unchanged=False, scale_sets=True, frame_source=source
+    )
+    driver.use_quality_guard = False
+    reads = hits = stale = 0
+    lag_ms: List[float] = []
+    driver.read()  # first read loads the OCR models; keep it out of the measurement
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            result = driver.read()
+            if not source.intact():
+                stale += 1  # the slot was refilled while we read it; the result may mix two frames
+                continue
+            lag_ms.append((time.time_ns() - source.last_capture_ns) / 1e6)
+            reads += 1
+            hits += bool(driver.stat_tuple_from(result))
+    except FrameSourceExhausted:
+        pass
+    stats: Dict[str, object] = dict(source.stats(), reader=reader, reads=reads, hits=hits, stale=stale)
+    stats["lag_ms_p50"] = round(float(np.median(lag_ms)), 2) if lag_ms else None
+    # no driver.close(): a demo run must not write hit counters into the user store
+    source.close()
+    ring.close()
+    results.put(stats)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=str, help="replay screenshots from this folder (synthetic if omitted)")
+    parser.add_argument("--count", type=int, default=16, help="synthetic frames to generate")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=CAPTURE_FPS, help="capture cap (0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    make_source = (
+        functools.partial(_directory_source, args.frames) if args.frames
+        else functools.partial(_synthetic_source, args.count)
+    )
+    readers = max(1, args.workers)
+    capture = start_capture(make_source, slots=2 * readers + 2, readers=readers, max_fps=args.fps)
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=_worker_main, args=(capture.ring.name, i, args.seconds, results), daemon=True)
+        for i in range(readers)
+    ]
+    t0 = time.perf_counter()
+    for proc in workers:
+        proc.start()
+    stats = [results.get() for _ in workers]
+    for proc in workers:
+        proc.join()
+    wall = time.perf_counter() - t0
+    frames = capture.frames
+    oversize = capture.ring.oversize
+    capture.stop()
+
+    print(f"[INFO] capture {frames} frames in {wall:.2f}s ({frames / wall:.1f} fps) oversize={oversize}")
+    for s in sorted(stats, key=lambda s: s["reader"]):  # type: ignore[arg-type,return-value]
+        print("[INFO] " + " ".join(f"{k}={v}" for k, v in s.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
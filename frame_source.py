@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+# ---- Configuration ---------------------------------------------------------
+
+WINDOW_TITLE = "Endfield"
+FRAME_PATTERNS = ("*.png", "*.jpg", "*.bmp")
+GEOMETRY_TTL = 0.5  # seconds a cached window rect is trusted before re-validating
+
+
+class FrameSourceExhausted(Exception):
+    """Raised by replay sources once every frame has been handed out."""
+
+
+# ---- Live capture helpers --------------------------------------------------
+
+def _find_window(window_title: str = WINDOW_TITLE) -> int:
+    import win32gui  # type: ignore  # Windows only; loaded on first live grab
+
+    hwnd = win32gui.FindWindow(None, window_title)
+    if not hwnd:
+        raise RuntimeError("Game window not found")
+    return hwnd
+
+
+def _client_rect(hwnd: int) -> Dict[str, int]:
+    import win32gui  # type: ignore
+
+    left, top = win32gui.ClientToScreen(hwnd, (0, 0))
+    right, bottom = win32gui.ClientToScreen(hwnd, win32gui.GetClientRect(hwnd)[2:])
+
+    return {
+        "left": left,
+        "top": top,
+        "width": right - left,
+        "height": bottom - top,
+    }
+
+
+def _get_game_rect(window_title: str = WINDOW_TITLE) -> Dict[str, int]:
+    return _client_rect(_find_window(window_title))
+
+
+class _ScreenGrabber:
+    """
+    Holds a single mss handle across frames. The handle is rebuilt on the rare
+    AttributeError seen in some PyInstaller builds instead of opening a fresh
+    instance per grab.
+    """
+
+    def __init__(self) -> None:
+        self._sct = None
+
+    def _grab_once(self, rect: Dict[str, int]) -> np.ndarray:
+        if self._sct is None:
+            import mss
+
+            self._sct = mss.mss()
+        shot = self._sct.grab(rect)  # BGRA
+        return np.frombuffer(shot.bgra, dtype=np.uint8).reshape((shot.height, shot.width, 4))
+
+    def grab(self, rect: Dict[str, int]) -> np.ndarray:
+        for _ in range(2):  # retry once on rare handle errors
+            try:
+                return self._grab_once(rect)
+            except AttributeError:
+                self.close()
+        # If it still fails, raise to surface the issue
+        return self._grab_once(rect)
+
+    def close(self) -> None:
+        if self._sct is not None:
+            try:
+                self._sct.close()
+            except AttributeError:
+                pass
+            self._sct = None
+
+
+# ---- Frame sources ---------------------------------------------------------
+
+class FrameSource(ABC):
+    """
+    Produces full client-area frames (HxWx3 BGR or HxWx4 BGRA, uint8).
+    LookupDriver slices every layout region out of the returned frame.
+    """
+
+    @abstractmethod
+    def grab(self) -> np.ndarray:
+        """The next frame; replay sources raise FrameSourceExhausted when done."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "FrameSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class LiveFrameSource(FrameSource):
+    """
+    Live mss capture of the game window's client area. The window handle and
+    client rect are cached; within geometry_ttl no window API is called, after
+    it a single GetWindowRect decides whether the window moved or resized.
+    """
+
+    def __init__(self, window_title: str = WINDOW_TITLE, geometry_ttl: float = GEOMETRY_TTL):
+        self.window_title = window_title
+        self.geometry_ttl = geometry_ttl
+        self.rect_invalidations = 0
+        self._grabber = _ScreenGrabber()
+        self._hwnd: Optional[int] = None
+        self._outer: Optional[Tuple[int, int, int, int]] = None
+        self._rect: Optional[Dict[str, int]] = None
+        self._checked_at = 0.0
+
+    def window_rect(self) -> Dict[str, int]:
+        now = time.monotonic()
+        if self._rect is not None and now - self._checked_at < self.geometry_ttl:
+            return self._rect
+
+        import win32gui  # type: ignore
+
+        self._checked_at = now
+        if self._hwnd and win32gui.IsWindow(self._hwnd):
+            outer = tuple(win32gui.GetWindowRect(self._hwnd))
+            if outer == self._outer and self._rect is not None:
+                return self._rect
+        if self._rect is not None:
+            self.rect_invalidations += 1  # moved, resized or reopened
+
+        try:
+            self._hwnd = _find_window(self.window_title)
+        except RuntimeError:
+            self._hwnd = self._outer = self._rect = None
+            raise
+        self._outer = tuple(win32gui.GetWindowRect(self._hwnd))
+        self._rect = _client_rect(self._hwnd)
+        return self._rect
+
+    def grab(self) -> np.ndarray:
+        return self._grabber.grab(self.window_rect())
+
+    def close(self) -> None:
+        self._grabber.close()
+
+
+class MemoryFrameSource(FrameSource):
+    """Replays an in-memory list of frames, optionally looping forever."""
+
+    def __init__(self, frames: Iterable[np.ndarray], loop: bool = True):
+        self.frames: List[np.ndarray] = list(frames)
+        if not self.frames:
+            raise ValueError("MemoryFrameSource needs at least one frame")
+        self.loop = loop
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def grab(self) -> np.ndarray:
+        if self._pos >= len(self.frames):
+            if not self.loop:
+                raise FrameSourceExhausted
+            self._pos = 0
+        frame = self.frames[self._pos]
+        self._pos += 1
+        return frame
+
+    def rewind(self) -> None:
+        self._pos = 0
+
+
+class PushFrameSource(FrameSource):
+    """Hands out whichever frame was pushed last (batch/video drivers feed it)."""
+
+    def __init__(self) -> None:
+        self.frame: Optional[np.ndarray] = None
+
+    def push(self, frame: np.ndarray) -> None:
+        self.frame = frame
+
+    def grab(self) -> np.ndarray:
+        if self.frame is None:
+            raise FrameSourceExhausted
+        return self.frame
+
+
+class DirectoryFrameSource(FrameSource):
+    """
+    Replays recorded screenshots from a folder in filename order. With
+    preload=True every frame is decoded up front so replay runs at full speed.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        loop: bool = False,
+        preload: bool = False,
+        patterns: Sequence[str] = FRAME_PATTERNS,
+    ):
+        self.directory = Path(directory)
+        self.paths: List[Path] = sorted({p for pat in patterns for p in self.directory.glob(pat)})
+        if not self.paths:
+            raise FileNotFoundError(f"No frames found in {self.directory}")
+        self.loop = loop
+        self._pos = 0
+        self._cache: Optional[List[np.ndarray]] = None
+        self.last_path: Optional[Path] = None
+        if preload:
+            self._cache = [self._decode(p) for p in self.paths]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @staticmethod
+    def _decode(path: Path) -> np.ndarray:
+        img = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError(f"Could not decode frame {path}")
+        return img
+
+    def grab(self) -> np.ndarray:
+        if self._pos >= len(self.paths):
+            if not self.loop:
+                raise FrameSourceExhausted
+            self._pos = 0
+        idx = self._pos
+        self._pos += 1
+        self.last_path = self.paths[idx]
+        if self._cache is not None:
+            return self._cache[idx]
+        return self._decode(self.paths[idx])
+
+    def rewind(self) -> None:
+        self._pos = 0
@@ -0,0 +1,159 @@
+"""
+Compiled weapon index cache.
+
+The first start after data/weapons.json changes parses it into a WeaponIndex
+as before and writes the result (weapon list with stat values, stat masks,
+subset lookup table) next to it as weapons.idx. Later starts load that file
+straight back while the JSON is unchanged: same size and mtime, or the same
+SHA-1 when only the mtime moved (fresh checkout, copy). Anything else - a stale or corrupt
+file, a different Stat enum, another Python version - falls back to parsing
+the JSON and rewrites the artifact.
+
+    python index_cache.py build [--json data/weapons.json]
+    python index_cache.py info  [--json data/weapons.json]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from Essence_Helper import Stat, WeaponIndex
+
+# ---- Configuration ---------------------------------------------------------
+
+FORMAT_VERSION = 1
+ARTIFACT_SUFFIX = ".idx"
+# marshal output is only guaranteed readable by the interpreter that wrote it
+_PY_TAG = f"{sys.implementation.cache_tag}/{marshal.version}"
+
+
+def artifact_path(json_path: Path) -> Path:
+    return json_path.with_suffix(ARTIFACT_SUFFIX)
+
+
+def _stat_key(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _stat_names() -> Tuple[str, ...]:
+    # masks and stat values are positional; any enum change invalidates the artifact
+    return tuple(s.name for s in Stat)
+
+
+def compile_index(index: WeaponIndex, json_path: Path, out: Optional[Path] = None) -> Optional[Path]:
+    """Write the compiled form of index for json_path; returns None if it cannot be written."""
+    out = out or artifact_path(json_path)
+    weapons, masks, table = index.to_tables()
+    mtime_ns, size = _stat_key(json_path)
+    payload = {
+        "format": FORMAT_VERSION,
+        "python": _PY_TAG,
+        "stats": _stat_names(),
+        "source_mtime_ns": mtime_ns,
+        "source_size": size,
+        "source_sha1": _digest(json_path),
+        "weapons": weapons,
+        "masks": masks,
+        "table": table,
+    }
+    tmp = out.with_name(out.name + ".tmp")
+    try:
+        tmp.write_bytes(marshal.dumps(payload))
+        os.replace(tmp, out)
+    except OSError as exc:
+        # e.g. read-only install dir; the JSON path still works, just slower
+        print(f"[WARN] Could not write compiled index {out}: {exc}", file=sys.stderr)
+        return None
+    return out
+
+
+def _read_payload(path: Path) -> Optional[Dict]:
+    try:
+        payload = marshal.loads(path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get("format") != FORMAT_VERSION or payload.get("python") != _PY_TAG:
+        return None
+    if payload.get("stats") != _stat_names():
+        return None
+    return payload
+
+
+def load_compiled(json_path: Path, path: Optional[Path] = None) -> Optional[WeaponIndex]:
+    """The compiled index for json_path, or None when missing or stale."""
+    path = path or artifact_path(json_path)
+    if not path.exists():
+        return None
+    payload = _read_payload(path)
+    if payload is None:
+        return None
+
+    mtime_ns, size = _stat_key(json_path)
+    if (payload["source_mtime_ns"], payload["source_size"]) != (mtime_ns, size):
+        if size != payload["source_size"] or _digest(json_path) != payload["source_sha1"]:
+            return None
+        # Touched but identical: trust it and refresh the recorded mtime
+        payload["source_mtime_ns"] = mtime_ns
+        try:
+            path.write_bytes(marshal.dumps(payload))
+        except OSError:
+            pass
+
+    try:
+        return WeaponIndex.from_tables(payload["weapons"], payload["masks"], payload["table"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def load_or_build(json_path: Path, parse: Callable[[Path], WeaponIndex]) -> Tuple[WeaponIndex, bool]:
+    """(index, from_cache): the compiled index if current, else parse(json_path) and recompile."""
+    index = load_compiled(json_path)
+    if index is not None:
+        return index, True
+    index = parse(json_path)
+    compile_index(index, json_path)
+    return index, False
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import WEAPON_JSON, load_index_from_json
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cmd", choices=["build", "info"])
+    parser.add_argument("--json", type=Path, default=WEAPON_JSON)
+    args = parser.parse_args(argv)
+
+    out = artifact_path(args.json)
+    if args.cmd == "build":
+        written = compile_index(load_index_from_json(args.json), args.json)
+        if written is None:
+            return 1
+        print(f"[INFO] Compiled {args.json} -> {written} ({written.stat().st_size} bytes)")
+        return 0
+
+    payload = _read_payload(out) if out.exists() else None
+    if payload is None:
+        print(f"[INFO] {out}: missing or unreadable by this interpreter")
+        return 1
+    current = load_compiled(args.json, out) is not None
+    print(f"[INFO] {out}: {len(payload['weapons'])} weapons, {len(payload['table'])} query masks, "
+          f"{'current' if current else 'stale'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
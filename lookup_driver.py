@@ -1,26 +1,47 @@
 from __future__ import annotations
 
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import cv2
-import mss
 import numpy as np
-import win32gui  # type: ignore
-from difflib import SequenceMatcher
 from pathlib import Path
 import sys
-import time
-from typing import Dict, List, Optional, Sequence, Tuple, Union
+import threading
+from collections import deque
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
 from enum import Enum
 
-from rapidocr_onnxruntime import RapidOCR
+# rapidocr_onnxruntime (ONNX model load) is imported on first use
 
 
 from Essence_Helper import Stat
+from buffer_pool import BufferPool
+from debug_writer import DEBUG_DIR, DebugImageWriter
+from exemplar_learner import ExemplarLearner
+from frame_source import FrameSource, LiveFrameSource, WINDOW_TITLE
 from mappings import STAT1_MAPPING, STAT2_MAPPING, STAT3_MAPPING
+from metrics import MetricsRegistry
+from profiler import PROFILE_EVERY, ReadProfiler
+from signatures import (
+    CANONICAL_TEXT_HEIGHT,
+    REFERENCE_SIZE,
+    SIG_BYTES,
+    SIG_SIZE,
+    canonical_size as _canonical_size,
+    canonicalize as _canonicalize,
+    hamming_many as _hamming_many,
+    resample as _resample,
+    signature as _signature,
+)
+from stat_matcher import matcher_for
+from template_store import TemplateStore, migrate_png_dir
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 # ---- Configuration ---------------------------------------------------------
 
-WINDOW_TITLE = "Endfield"
-
 QUALITY_COLOR = (255, 186, 3)  # #ffba03
 COLOR_TOLERANCE = 10
 def resource_path(rel: str) -> Path:
@@ -34,8 +55,9 @@ def data_path(rel: str) -> Path:
     return resource_path(rel)
 
 
-DEBUG_DIR = Path("data/tmp/ocr_debug")
-MATCHED_DIR = Path("data/matched")
+MATCHED_DIR = Path("data/matched")  # legacy one-PNG-per-stat cache
+STAT_STORE_PATH = data_path("data/stat_templates.npy")  # packed multi-exemplar store, shipped read-only
+USER_STAT_STORE_PATH = Path("data/tmp/stat_templates.user.npy")  # hit counters and added exemplars, layered on top
 
 MENU_TEMPLATES = {
     "inventory": data_path("data/Menu_Guard_Inventory.png"),
@@ -43,18 +65,25 @@ MENU_TEMPLATES = {
 }
 
 # Lightweight signature params for guard hashing
-GUARD_SIG_SIZE = 16  # resize to 16x16
+GUARD_SIG_SIZE = SIG_SIZE  # resize to 16x16
 GUARD_HAMMING_THRESH = 40  # max differing bits (of 256) to accept
 STAT_HAMMING_THRESH = 24
 STAT_HAMMING_STRICT = 6
 STAT_HAMMING_MARGIN = 12  # best must beat runner-up by this to accept loose match
 STAT_CONTRAST_MIN = 25  # skip OCR when text is still fading (low contrast)
+DELTA_THUMB_SIZE = (48, 8)  # per-region downsample (w, h) for the frame-delta fingerprint
+DELTA_THRESH = 1.5  # mean abs gray difference per region below which a frame counts as unchanged
+HIT_RATIO_WINDOW = 200  # stat slots behind the rolling stat_cache_hit_ratio gauge
 
 class GuardMode(Enum):
     NONE = "none"
     OCR = "ocr"
     IMAGE = "image"
 
+class OcrMode(Enum):
+    FULL = "full"  # RapidOCR det + cls + rec per crop
+    REC_ONLY = "rec"  # recognizer only, stat crops batched
+
 LAYOUTS = [
     {
         "name": "inventory",
@@ -88,22 +117,6 @@ LAYOUTS = [
 
 # ---- Utility helpers ------------------------------------------------------
 
-def _get_game_rect(window_title: str = WINDOW_TITLE) -> Dict[str, int]:
-    hwnd = win32gui.FindWindow(None, window_title)
-    if not hwnd:
-        raise RuntimeError("Game window not found")
-
-    left, top = win32gui.ClientToScreen(hwnd, (0, 0))
-    right, bottom = win32gui.ClientToScreen(hwnd, win32gui.GetClientRect(hwnd)[2:])
-
-    return {
-        "left": left,
-        "top": top,
-        "width": right - left,
-        "height": bottom - top,
-    }
-
-
 def _norm_to_abs(region: Dict[str, float], win: Dict[str, int]) -> Dict[str, int]:
     return {
         "left": int(win["left"] + region["x"] * win["width"]),
@@ -113,39 +126,41 @@ def _norm_to_abs(region: Dict[str, float], win: Dict[str, int]) -> Dict[str, int
     }
 
 
-def _grab_region(rect: Dict[str, int]) -> np.ndarray:
-    """
-    Grab a region with a fresh mss instance to avoid thread-local handle issues
-    seen in some PyInstaller builds.
-    """
-    for _ in range(2):  # retry once on rare handle errors
-        try:
-            with mss.mss() as sct:
-                grab = sct.grab(rect)  # BGRA
-                arr = np.frombuffer(grab.bgra, dtype=np.uint8).reshape((grab.height, grab.width, 4))
-                return cv2.cvtColor(arr, cv2.COLOR_BGRA2BGR)
-        except AttributeError:
-            continue
-    # If it still fails, raise to surface the issue
-    with mss.mss() as sct:
-        grab = sct.grab(rect)
-        arr = np.frombuffer(grab.bgra, dtype=np.uint8).reshape((grab.height, grab.width, 4))
-        return cv2.cvtColor(arr, cv2.COLOR_BGRA2BGR)
-
-
-def _preprocess_for_ocr(img: np.ndarray) -> np.ndarray:
-    # img is BGR
-    h, w, _ = img.shape
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    scale = 3 if min(h, w) < 120 else 2
-    gray = cv2.resize(gray, (w * scale, h * scale), interpolation=cv2.INTER_CUBIC)
-    gray = cv2.medianBlur(gray, 3)
-    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    return thresh
+def _region_bounds(region: Dict[str, float], width: int, height: int) -> Tuple[int, int, int, int]:
+    """(top, bottom, left, right) of a normalised region in frame coordinates."""
+    rect = _norm_to_abs(region, {"left": 0, "top": 0, "width": width, "height": height})
+    top, left = rect["top"], rect["left"]
+    return top, top + max(rect["height"], 1), left, left + max(rect["width"], 1)
 
 
-def _normalize(text: str) -> str:
-    return "".join(ch.lower() for ch in text if ch.isalnum() or ch.isspace()).strip()
+def _slice_region(frame: np.ndarray, region: Dict[str, float]) -> np.ndarray:
+    """Return a view (no copy) of a normalised region inside a full client frame."""
+    h, w = frame.shape[:2]
+    top, bottom, left, right = _region_bounds(region, w, h)
+    return frame[top:bottom, left:right]
+
+
+def _to_gray(img: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    # Regions are BGRA views of the grabbed frame; saved templates may be BGR
+    if img.ndim == 2:
+        return img
+    code = cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(img, code, dst=dst)
+
+
+def _preprocess_for_ocr(img: np.ndarray, pool: Optional[BufferPool] = None, key: Hashable = None) -> np.ndarray:
+    # img is BGR/BGRA or already gray; with a pool the result lives in its buffers
+    h, w = img.shape[:2]
+    gray = _to_gray(img)
+    scale = 3 if min(h, w) < 120 else 2
+    up = blur = None
+    if pool is not None:
+        up = pool.get("ocr_up", key, (h * scale, w * scale))
+        blur = pool.get("ocr_blur", key, (h * scale, w * scale))
+    up = cv2.resize(gray, (w * scale, h * scale), dst=up, interpolation=cv2.INTER_CUBIC)
+    blur = cv2.medianBlur(up, 3, dst=blur)
+    _, thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=up)
+    return thresh
 
 
 def _pixel_matches(img: np.ndarray, target: Tuple[int, int, int], tolerance: int) -> bool:
@@ -153,21 +168,141 @@ def _pixel_matches(img: np.ndarray, target: Tuple[int, int, int], tolerance: int
     return all(abs(c - t) <= tolerance for c, t in zip((r, g, b), target))
 
 
-def _signature(img_gray: np.ndarray) -> np.ndarray:
-    resized = cv2.resize(img_gray, (GUARD_SIG_SIZE, GUARD_SIG_SIZE), interpolation=cv2.INTER_AREA)
-    thresh = resized.mean()
-    bits = (resized >= thresh).astype(np.uint8)
-    return np.packbits(bits.reshape(-1))
+def _low_contrast(img: Union[np.ndarray, "Region"], threshold: float = STAT_CONTRAST_MIN) -> bool:
+    # img is BGR/BGRA or a Region
+    region = img if isinstance(img, Region) else Region(img)
+    return region.std < threshold
 
 
-def _hamming(sig1: np.ndarray, sig2: np.ndarray) -> int:
-    return int(np.unpackbits(np.bitwise_xor(sig1, sig2)).sum())
+class Region:
+    """
+    One crop of the current frame. Its grayscale (taken straight from the
+    BGRA view), std-dev, canonical signature and OCR input are each computed
+    on first use and then shared by the guard, contrast, cache and OCR stages.
+    With a pool, the images are written into its buffers for key (the
+    region's rectangle), so they are only valid until the next frame.
+    """
 
+    __slots__ = (
+        "img", "key", "_canonicalize", "_pool",
+        "_gray", "_std", "_canonical", "_signature", "_ocr_input", "_ocr_bgr",
+    )
 
-def _low_contrast(img: np.ndarray, threshold: float = STAT_CONTRAST_MIN) -> bool:
-    # img is BGR
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    return float(gray.std()) < threshold
+    def __init__(
+        self,
+        img: np.ndarray,
+        canonicalize: Optional[Callable[[np.ndarray, Hashable], np.ndarray]] = None,
+        pool: Optional[BufferPool] = None,
+        key: Hashable = None,
+    ):
+        self.img = img
+        self.key = key
+        self._canonicalize = canonicalize
+        self._pool = pool
+        self._gray: Optional[np.ndarray] = None
+        self._std: Optional[float] = None
+        self._canonical: Optional[np.ndarray] = None
+        self._signature: Optional[np.ndarray] = None
+        self._ocr_input: Optional[np.ndarray] = None
+        self._ocr_bgr: Optional[np.ndarray] = None
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            dst = None
+            if self._pool is not None and self.img.ndim == 3:
+                dst = self._pool.get("gray", self.key, self.img.shape[:2])
+            self._gray = _to_gray(self.img, dst)
+        return self._gray
+
+    @property
+    def std(self) -> float:
+        if self._std is None:
+            # meanStdDev is the population std like ndarray.std(), without numpy's reduction overhead
+            self._std = float(cv2.meanStdDev(self.gray)[1][0, 0])
+        return self._std
+
+    @property
+    def canonical(self) -> np.ndarray:
+        """Gray resized into the 1080p reference space (what templates are stored as)."""
+        if self._canonical is None:
+            gray = self.gray
+            self._canonical = self._canonicalize(gray, self.key) if self._canonicalize is not None else gray
+        return self._canonical
+
+    @property
+    def signature(self) -> np.ndarray:
+        if self._signature is None:
+            dst = self._pool.get("sig", None, (SIG_SIZE, SIG_SIZE)) if self._pool is not None else None
+            self._signature = _signature(self.canonical, dst)
+        return self._signature
+
+    @property
+    def ocr_input(self) -> np.ndarray:
+        if self._ocr_input is None:
+            self._ocr_input = _preprocess_for_ocr(self.gray, self._pool, self.key)
+        return self._ocr_input
+
+    @property
+    def ocr_input_bgr(self) -> np.ndarray:
+        """ocr_input as 3 channels, the recognizer's batch input format."""
+        if self._ocr_bgr is None:
+            src = self.ocr_input
+            dst = self._pool.get("ocr_bgr", self.key, src.shape + (3,)) if self._pool is not None else None
+            self._ocr_bgr = cv2.cvtColor(src, cv2.COLOR_GRAY2BGR, dst=dst)
+        return self._ocr_bgr
+
+
+class FrameRegions:
+    """Lazily built Region objects for one frame, one per distinct rectangle."""
+
+    __slots__ = ("frame", "bounds", "_canonicalize", "_pool", "_regions")
+
+    def __init__(
+        self,
+        frame: np.ndarray,
+        bounds: Dict[str, List[Tuple[int, int, int, int]]],
+        canonicalize: Optional[Callable[[np.ndarray, Hashable], np.ndarray]] = None,
+        pool: Optional[BufferPool] = None,
+    ):
+        self.frame = frame
+        self.bounds = bounds
+        self._canonicalize = canonicalize
+        self._pool = pool
+        self._regions: Dict[Tuple[int, int, int, int], Region] = {}
+
+    def _get(self, rect: Tuple[int, int, int, int]) -> Region:
+        region = self._regions.get(rect)
+        if region is None:
+            top, bottom, left, right = rect
+            region = self._regions[rect] = Region(
+                self.frame[top:bottom, left:right], self._canonicalize, self._pool, rect
+            )
+        return region
+
+    def region(self, layout_name: str, idx: int) -> Region:
+        return self._get(self.bounds[layout_name][idx])
+
+    def layout(self, layout_name: str) -> List[Region]:
+        return [self._get(rect) for rect in self.bounds[layout_name]]
+
+    def all(self) -> List[Region]:
+        """Every distinct region across layouts, in a stable order."""
+        return [self._get(rect) for rect in dict.fromkeys(r for rects in self.bounds.values() for r in rects)]
+
+
+def _timings(t0: float, t_grab: float, *marks: float) -> Dict[str, float]:
+    # marks: [t_end] after a guard miss, or [t_cap, t_after_cap, t_end]
+    out = {"capture_ms": (t_grab - t0) * 1000}
+    if len(marks) == 1:
+        out["menu_check_ms"] = (marks[0] - t_grab) * 1000
+    else:
+        t_cap, t_after_cap, t_end = marks
+        out["menu_check_ms"] = (t_cap - t_grab) * 1000
+        out["slice_ms"] = (t_after_cap - t_cap) * 1000
+        out["ocr_ms"] = (t_end - t_after_cap) * 1000
+    out["total_ms"] = (marks[-1] - t0) * 1000
+    return out
 
 
 def _choose_stat(
@@ -176,31 +311,8 @@ def _choose_stat(
     threshold: float = 0.90,
     margin: float = 0.07,
 ) -> Optional[Stat]:
-    if not text:
-        return None
-
-    norm_text = _normalize(text)
-    best: Optional[Tuple[Stat, float]] = None
-    second: Optional[Tuple[Stat, float]] = None
-
-    for key, values in mapping.items():
-        opts = values if isinstance(values, list) else [values]
-        for opt in opts:
-            norm_opt = _normalize(opt)
-            if norm_text == norm_opt:
-                return Stat[key]
-
-            score = SequenceMatcher(None, norm_text, norm_opt).ratio()
-            if best is None or score > best[1]:
-                second = best
-                best = (Stat[key], score)
-            elif second is None or score > second[1]:
-                second = (Stat[key], score)
-
-    if best and best[1] >= threshold:
-        if second is None or (best[1] - second[1] >= margin):
-            return best[0]
-    return None
+    # Precompiled, memoised matcher shared per mapping; same accept rules as a full scan
+    return matcher_for(mapping).match(text, threshold, margin)
 
 
 # ---- Public driver --------------------------------------------------------
@@ -214,22 +326,78 @@ class LookupDriver:
         guard_mode: GuardMode = GuardMode.IMAGE,
         use_stat_cache: bool = False,
         create_stat_cache: bool = False,
+        learn_stat_cache: bool = False,
         require_three_stats: bool = True,
+        frame_source: Optional[FrameSource] = None,
+        skip_unchanged: bool = True,
+        delta_threshold: float = DELTA_THRESH,
+        ocr_mode: OcrMode = OcrMode.FULL,
+        lazy_ocr: bool = True,
+        warm_ocr: bool = False,
+        scale_sets: bool = False,
+        ocr_threads: Optional[int] = None,
+        debug_writer: Optional[DebugImageWriter] = None,
+        profile: Optional[str] = None,
+        profile_every: int = PROFILE_EVERY,
     ):
         self.window_title = window_title
+        # Live capture by default; replay sources let read() run without the game
+        self.frame_source = frame_source or LiveFrameSource(window_title)
         self.save_images = save_images
         self.log_debug = log_debug
         self.guard_mode = guard_mode
         self.use_stat_cache = use_stat_cache
         self.create_stat_cache = create_stat_cache
         self.require_three_stats = require_three_stats
-        self.ocr = RapidOCR()
-        self._last_logs: List[str] = []
-        self._debug_counter = 0
+        # Frame-delta short-circuit: reuse the last result while regions are unchanged
+        self.skip_unchanged = skip_unchanged
+        self.delta_threshold = delta_threshold
+        self.metrics = MetricsRegistry()
+        self._init_metrics()
+        # Opt-in field profiling of every Nth read(): "cprofile" | "sample" (see profiler.py)
+        self.profiler = ReadProfiler(profile, profile_every) if profile else None
+        # Scratch arrays for the per-frame image path, reused while the window size holds
+        self.buffers = BufferPool()
+        self._last_fingerprint: Optional[List[np.ndarray]] = None
+        self._last_result: Optional[Dict[str, object]] = None
+        self.last_read: Optional[Dict[str, object]] = None  # most recent read(), skipped or not
+        # Region bounds cached per frame size; last matched layout is tried first
+        self._bounds: Dict[str, List[Tuple[int, int, int, int]]] = {}
+        self._bounds_shape: Optional[Tuple[int, int]] = None
+        self.geometry_invalidations = 0
+        self._layout_order: List[Dict] = list(LAYOUTS)
+        # Regions are resized to their 1920x1080 size before hashing; with scale_sets,
+        # templates are also resampled through each new window size on first sight
+        self.scale_sets = scale_sets
+        self._canon_sizes: Dict[Tuple[int, int], Tuple[int, int]] = {}  # native (h, w) -> reference (w, h)
+        self._region_scales: Dict[str, Tuple[float, float]] = {}  # native / reference size per layout
+        self._scale_sets: Dict[Tuple[int, int], Dict[str, object]] = {}
+        # RapidOCR is built on first use (or warmed on a background thread);
+        # IMAGE guard + stat cache frames never need it
+        self._ocr = None
+        self._ocr_lock = threading.Lock()
+        self.startup_timings: Dict[str, Optional[float]] = {
+            "imports_ms": IMPORT_SECONDS * 1000,
+            "ocr_load_ms": None,
+        }
+        self.ocr_mode = ocr_mode
+        self.ocr_threads = ocr_threads  # onnxruntime intra-op threads; None = one per core
+        # Guard misses (save_images or log_debug) and regions (save_images) are saved off the hot path
+        if debug_writer is None and (save_images or log_debug):
+            debug_writer = DebugImageWriter(DEBUG_DIR)
+        self.debug_writer = debug_writer
         self._templates: Dict[str, Optional[np.ndarray]] = {}
         self._template_sigs: Dict[str, Optional[np.ndarray]] = {}
-        self._stat_templates: Dict[str, np.ndarray] = {}
-        self._stat_sigs: Dict[str, np.ndarray] = {}
+        self._guard_sigs: Dict[str, np.ndarray] = {}  # (k, 32) per template, canonical + active scale set
+        self.stat_store = TemplateStore()
+        self._hit_window: "deque[int]" = deque(maxlen=HIT_RATIO_WINDOW)
+        self._hit_sum = 0
+        # store signatures packed row-wise (one row per exemplar) for the vectorised search
+        self._stat_sig_names: List[str] = []
+        self._stat_sig_ids = np.empty(0, dtype=np.int16)
+        self._stat_sig_matrix = np.empty((0, SIG_BYTES), dtype=np.uint8)
+        self._stat_sig_rows = np.empty(0, dtype=np.intp)  # store row behind each matrix row
+        t_tpl = time.perf_counter()
         for key, path in MENU_TEMPLATES.items():
             if path.exists():
                 self._templates[key] = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
@@ -238,41 +406,330 @@ class LookupDriver:
                 self._templates[key] = None
                 self._template_sigs[key] = None
 
+        t_stat = time.perf_counter()
         self._load_stat_cache()
+        t_done = time.perf_counter()
+        self.startup_timings["guard_templates_ms"] = (t_stat - t_tpl) * 1000
+        self.startup_timings["stat_cache_ms"] = (t_done - t_stat) * 1000
+        # Confident OCR reads become new exemplars (see exemplar_learner.py)
+        self.learner: Optional[ExemplarLearner] = None
+        if learn_stat_cache and use_stat_cache:
+            self.learner = ExemplarLearner(
+                self.stat_store, matcher_for(STAT1_MAPPING), self.metrics, self.stat_store.path or USER_STAT_STORE_PATH
+            )
+
+        if not lazy_ocr:
+            self._build_ocr()
+        elif warm_ocr:
+            self.warm_ocr()
+
+    # ---- Metrics ------------------------------------------------------------
+
+    def _init_metrics(self) -> None:
+        # Handles are bound once so the hot path is a plain attribute add
+        m = self.metrics
+        self._m_frames = {
+            outcome: m.counter("frames_total", "read() calls by outcome", outcome=outcome)
+            for outcome in ("unchanged", "no_menu", "quality_fail", "recognised")
+        }
+        self._m_guard = {
+            (layout["name"], hit): m.counter(
+                "guard_checks_total", "menu guard checks per layout", layout=layout["name"],
+                result="hit" if hit else "miss",
+            )
+            for layout in LAYOUTS
+            for hit in (True, False)
+        }
+        self._m_sticky = m.counter("guard_sticky_hits_total", "guard hits on the first layout tried")
+        self._m_cache = {
+            result: m.counter("stat_cache_total", "stat cache lookups by result", result=result)
+            for result in ("strict", "margin", "miss")
+        }
+        self._m_ocr_calls = {
+            kind: m.counter("ocr_calls_total", "OCR engine invocations", kind=kind) for kind in ("line", "batch")
+        }
+        self._m_ocr_ms = m.histogram("ocr_engine_ms", "time inside the OCR engine per invocation")
+        self._m_low_contrast = m.counter("low_contrast_skips_total", "stat regions skipped as low contrast")
+        self._m_hit_ratio = m.gauge(
+            "stat_cache_hit_ratio", f"share of the last {HIT_RATIO_WINDOW} stat slots resolved by the cache"
+        )
+        self._m_refetch = m.counter("duplicate_refetches_total", "stat slots re-read by OCR after a duplicate/empty match")
+        self._m_stage = {
+            key: m.histogram("stage_latency_ms", "per-stage latency of recognised frames", stage=key[:-3])
+            for key in ("capture_ms", "menu_check_ms", "slice_ms", "ocr_ms", "total_ms")
+        }
+        self._m_frame_ms = {
+            outcome: m.histogram("frame_latency_ms", "read() latency by outcome", outcome=outcome)
+            for outcome in self._m_frames
+        }
+
+    def _observe_cache_slots(self, hits: Sequence[bool]) -> None:
+        window = self._hit_window
+        for hit in hits:
+            if len(window) == window.maxlen:
+                self._hit_sum -= window[0]
+            window.append(int(hit))
+            self._hit_sum += hit
+        if window:
+            self._m_hit_ratio.set(self._hit_sum / len(window))
+
+    def _observe_frame(self, outcome: str, timings: Dict[str, float]) -> None:
+        self._m_frames[outcome].inc()
+        self._m_frame_ms[outcome].observe(timings["total_ms"])
+        if outcome == "recognised":
+            for key, value in timings.items():
+                self._m_stage[key].observe(value)
+
+    @property
+    def frames_read(self) -> int:
+        return self.metrics.value("frames_total")
+
+    @property
+    def frames_skipped(self) -> int:
+        return self._m_frames["unchanged"].value
+
+    @property
+    def guard_checks(self) -> int:
+        return self.metrics.value("guard_checks_total")
+
+    @property
+    def sticky_hits(self) -> int:
+        return self._m_sticky.value
+
+    @property
+    def ocr_calls(self) -> int:
+        return self.metrics.value("ocr_calls_total")
+
+    # ---- OCR lifecycle ----------------------------------------------------
+
+    @property
+    def ocr(self):
+        if self._ocr is None:
+            self._build_ocr()
+        return self._ocr
+
+    @ocr.setter
+    def ocr(self, engine) -> None:
+        self._ocr = engine
+
+    def _build_ocr(self) -> None:
+        with self._ocr_lock:
+            if self._ocr is not None:
+                return
+            t0 = time.perf_counter()
+            from rapidocr_onnxruntime import RapidOCR
+
+            kwargs = {}
+            if self.ocr_threads is not None:
+                kwargs = {"intra_op_num_threads": self.ocr_threads, "inter_op_num_threads": 1}
+            self._ocr = RapidOCR(**kwargs)
+            self.startup_timings["ocr_load_ms"] = (time.perf_counter() - t0) * 1000
+
+    def warm_ocr(self) -> threading.Thread:
+        """Load the OCR models on a daemon thread; a read needing OCR waits on the lock."""
+        thread = threading.Thread(target=self._build_ocr, name="ocr-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def ocr_ready(self) -> bool:
+        return self._ocr is not None
+
+    def startup_report(self) -> Dict[str, Optional[float]]:
+        return {k: (round(v, 1) if v is not None else None) for k, v in self.startup_timings.items()}
 
     def _make_signature(self, tpl_gray: np.ndarray) -> np.ndarray:
         return _signature(tpl_gray)
 
     def _load_stat_cache(self) -> None:
         MATCHED_DIR.mkdir(parents=True, exist_ok=True)
-        for path in MATCHED_DIR.glob("*.png"):
-            stat_name = path.stem
+        if STAT_STORE_PATH.exists():
             try:
-                Stat[stat_name]  # validate
-            except KeyError:
-                continue
-            gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
-            if gray is None:
-                continue
-            self._stat_templates[stat_name] = gray
-            self._stat_sigs[stat_name] = _signature(gray)
+                self.stat_store = TemplateStore.load(STAT_STORE_PATH)
+            except ValueError as exc:
+                print(f"[WARN] {exc}; falling back to {MATCHED_DIR}", file=sys.stderr)
+        if not len(self.stat_store):
+            # No packed store yet: pack the PNG folder in memory (see template_store.py migrate)
+            self.stat_store = TemplateStore(path=STAT_STORE_PATH)
+            migrate_png_dir(MATCHED_DIR, self.stat_store)
+            self.stat_store.dirty = False
+        # The shipped store is never written; this session's changes go to the user store
+        try:
+            self.stat_store.layer(USER_STAT_STORE_PATH)
+        except ValueError as exc:
+            print(f"[WARN] {exc}; starting a new user store", file=sys.stderr)
+        self._rebuild_stat_matrix()
+
+    def _rebuild_stat_matrix(self) -> None:
+        for entry in self._scale_sets.values():
+            entry.pop("stat", None)  # exemplars changed; resampled copies are rebuilt lazily
+        self._activate_scale_set()
+
+    def _signature_as_captured(self, tpl: np.ndarray, scale: Tuple[float, float]) -> np.ndarray:
+        # Same path a live region takes: captured at this window size, then canonicalised
+        return _signature(self._canonical(_resample(tpl, *scale)))
+
+    def _build_scale_set(self, shape: Tuple[int, int]) -> Dict[str, object]:
+        entry = self._scale_sets.setdefault(shape, {})
+        if "guard" not in entry:
+            guard: Dict[str, np.ndarray] = {}
+            for layout in LAYOUTS:
+                tpl = self._templates.get(layout["template_key"])
+                if tpl is not None:
+                    scale = self._region_scales[layout["name"] + ":menu"]
+                    guard[layout["template_key"]] = self._signature_as_captured(tpl, scale)
+            entry["guard"] = guard
+        if "stat" not in entry:
+            store = self.stat_store
+            scale = self._region_scales[LAYOUTS[0]["name"] + ":stat"]
+            entry["stat"] = np.array(
+                [self._signature_as_captured(store.exemplar(i), scale) for i in range(len(store))], dtype=np.uint8
+            ).reshape(-1, SIG_BYTES)
+        return entry
+
+    def _activate_scale_set(self) -> None:
+        """Point the guard/stat signature tables at the current window size."""
+        names = self.stat_store.stat_names
+        ids = np.array([Stat[n].value for n in names], dtype=np.int16)
+        matrix = self.stat_store.signatures()
+        rows = np.arange(len(names), dtype=np.intp)
+        guard = {key: sig[None, :] for key, sig in self._template_sigs.items() if sig is not None}
+
+        shape = self._bounds_shape
+        if self.scale_sets and shape is not None and shape != REFERENCE_SIZE[::-1]:
+            entry = self._build_scale_set(shape)
+            matrix = np.vstack([matrix, entry["stat"]])
+            rows = np.concatenate([rows, rows])
+            ids = np.concatenate([ids, ids])
+            names = names + names
+            for key, sig in entry["guard"].items():  # type: ignore[union-attr]
+                guard[key] = np.vstack([guard[key], sig[None, :]])
+
+        self._stat_sig_names = names
+        self._stat_sig_ids = ids
+        self._stat_sig_matrix = matrix
+        self._stat_sig_rows = rows
+        self._guard_sigs = guard
+
+    def _grab_frame(self) -> np.ndarray:
+        """Grab the whole client rect once; every region is sliced from this buffer."""
+        return self.frame_source.grab()
+
+    def _region_bounds(self, frame: np.ndarray) -> Dict[str, List[Tuple[int, int, int, int]]]:
+        shape = frame.shape[:2]
+        if shape != self._bounds_shape:
+            if self._bounds_shape is not None:
+                self.geometry_invalidations += 1
+            self.buffers.clear()  # every region rect (buffer key) just changed
+            h, w = shape
+            self._bounds = {
+                layout["name"]: [_region_bounds(r, w, h) for r in layout["regions"]]
+                for layout in LAYOUTS
+            }
+            self._bounds_shape = shape
+            self._update_scale(w, h)
+        return self._bounds
+
+    def _update_scale(self, width: int, height: int) -> None:
+        """Map each region's native size to its size at the 1920x1080 reference."""
+        ref_w, ref_h = REFERENCE_SIZE
+        self._canon_sizes = {}
+        self._region_scales = {}
+        for layout in LAYOUTS:
+            for idx, region in enumerate(layout["regions"]):
+                t, b, l, r = _region_bounds(region, width, height)
+                rt, rb, rl, rr = _region_bounds(region, ref_w, ref_h)
+                self._canon_sizes[(b - t, r - l)] = (rr - rl, rb - rt)
+                scale = ((r - l) / (rr - rl), (b - t) / (rb - rt))
+                if idx == layout["menu_idx"]:
+                    self._region_scales[layout["name"] + ":menu"] = scale
+                elif idx in layout["stat_indices"]:
+                    self._region_scales.setdefault(layout["name"] + ":stat", scale)
+        self._activate_scale_set()
+
+    def _canonical(self, gray: np.ndarray, key: Hashable = None) -> np.ndarray:
+        # Larger-than-1080p regions are area-reduced to their reference size (exact for
+        # known region shapes, canonical text height otherwise). Smaller ones are left
+        # native: upsampling only blurs, and the signature resize already normalises them.
+        # A key (a frame region's rect) puts the result in that region's pooled buffer.
+        if gray.shape[0] <= CANONICAL_TEXT_HEIGHT:
+            return gray
+        size = self._canon_sizes.get(gray.shape[:2])
+        dst = None
+        if key is not None:
+            w, h = _canonical_size(gray.shape, size)
+            dst = self.buffers.get("canonical", key, (h, w))
+        return _canonicalize(gray, size, dst=dst)
+
+    def _reference(self, region: Region) -> np.ndarray:
+        """
+        A region's gray at its 1920x1080 reference size, upsampling sub-1080p
+        crops that _canonical leaves native. Exemplars are stored this way, so
+        scale sets can resample every one of them from the same scale.
+        """
+        gray = region.gray
+        if gray.shape[0] > CANONICAL_TEXT_HEIGHT:
+            return region.canonical
+        size = self._canon_sizes.get(gray.shape[:2])
+        return _canonicalize(gray, size) if size is not None else _canonicalize(gray)
+
+    def _capture_region(self, layout: Dict, idx: int, frame: np.ndarray) -> np.ndarray:
+        top, bottom, left, right = self._region_bounds(frame)[layout["name"]][idx]
+        return frame[top:bottom, left:right]
+
+    def _capture_all(self, layout: Dict, frame: np.ndarray) -> List[np.ndarray]:
+        return [frame[t:b, l:r] for t, b, l, r in self._region_bounds(frame)[layout["name"]]]
+
+    def _frame_regions(self, frame: np.ndarray) -> FrameRegions:
+        return FrameRegions(frame, self._region_bounds(frame), self._canonical, self.buffers)
+
+    def _region(self, img: Union[np.ndarray, Region]) -> Region:
+        return img if isinstance(img, Region) else Region(img, self._canonical)
+
+    def geometry_stats(self) -> Dict[str, int]:
+        return {
+            "region_invalidations": self.geometry_invalidations,
+            "window_invalidations": getattr(self.frame_source, "rect_invalidations", 0),
+            "guard_checks": self.guard_checks,
+            "sticky_layout_hits": self.sticky_hits,
+            "scale_sets": len(self._scale_sets),
+        }
 
-    def _capture_region(self, layout: Dict, idx: int, win: Optional[Dict[str, int]] = None) -> np.ndarray:
-        win = win or _get_game_rect(self.window_title)
-        rect = _norm_to_abs(layout["regions"][idx], win)
-        return _grab_region(rect)
+    def reset_delta(self) -> None:
+        """Forget the last frame so the next read() runs full recognition."""
+        self._last_fingerprint = None
+        self._last_result = None
+
+    def close(self) -> None:
+        self.frame_source.close()
+        if self.debug_writer is not None:
+            self.debug_writer.close()
+        if self.profiler is not None:
+            self.profiler.close()
+        if self.learner is not None:
+            self.learner.flush()  # exemplars learned since the last periodic save
+        # Hit counters and last-used times drive LRU eviction, so they are kept across sessions
+        # (in the user store; the shipped one stays read-only)
+        if self.stat_store.dirty or self.stat_store.hits_dirty:
+            path = self.stat_store.path or USER_STAT_STORE_PATH
+            try:
+                self.stat_store.save(path)
+            except OSError as exc:
+                print(f"[WARN] Could not save {path}: {exc}", file=sys.stderr)
 
-    def _capture_all(self, layout: Dict, win: Optional[Dict[str, int]] = None) -> List[np.ndarray]:
-        win = win or _get_game_rect(self.window_title)
-        abs_regions = [_norm_to_abs(r, win) for r in layout["regions"]]
-        return [_grab_region(rect) for rect in abs_regions]
+    def _ocr_text(self, img: Union[np.ndarray, Region]) -> str:
+        return self._ocr_text_scored(img)[0]
 
-    def _ocr_text(self, img: np.ndarray) -> str:
-        processed = _preprocess_for_ocr(img)
-        result, _ = self.ocr(processed)
+    def _ocr_text_scored(self, img: Union[np.ndarray, Region]) -> Tuple[str, float]:
+        processed = self._region(img).ocr_input
+        engine = self.ocr
+        self._m_ocr_calls["line"].inc()
+        t0 = time.perf_counter()
+        result, _ = engine(processed)
+        self._m_ocr_ms.observe((time.perf_counter() - t0) * 1000)
 
         if not result:
-            return ""
+            return "", 0.0
 
         # result can be list of [bbox, text, score] or [text, score, box]; be defensive
         best_text = ""
@@ -293,32 +750,60 @@ class LookupDriver:
                 best_score = score
                 best_text = text
 
-        return best_text.strip()
-
-    def _check_menu_guard(self, layout: Dict, img: np.ndarray) -> bool:
+        return best_text.strip(), max(best_score, 0.0)
+
+    def _ocr_many(self, imgs: Sequence[Union[np.ndarray, Region]]) -> List[Tuple[str, float]]:
+        """
+        OCR several stat crops, returning (text, score) per crop. In REC_ONLY
+        mode the crops skip detection/classification and go to the recognizer
+        as one batch, since each stat region is already a single text line.
+        """
+        if not imgs:
+            return []
+        text_rec = getattr(self.ocr, "text_rec", None)
+        if self.ocr_mode != OcrMode.REC_ONLY or text_rec is None:
+            return [self._ocr_text_scored(img) for img in imgs]
+
+        batch = [self._region(img).ocr_input_bgr for img in imgs]
+        self._m_ocr_calls["batch"].inc()
+        t0 = time.perf_counter()
+        rec_res, _ = text_rec(batch)
+        self._m_ocr_ms.observe((time.perf_counter() - t0) * 1000)
+        min_score = getattr(self.ocr, "text_score", 0.0)
+        out: List[Tuple[str, float]] = []
+        for text, score in rec_res:
+            score = float(score)
+            out.append((str(text).strip(), score) if score >= min_score else ("", score))
+        return out
+
+    def _check_menu_guard(self, layout: Dict, img: Union[np.ndarray, Region]) -> bool:
         if self.guard_mode == GuardMode.NONE:
             self._last_guard_text = ""
             return True
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        tpl = self._templates.get(layout["template_key"])
-        tpl_sig = self._template_sigs.get(layout["template_key"])
-
+        region = self._region(img)
         if self.guard_mode == GuardMode.IMAGE:
-            if tpl_sig is not None:
-                sig = _signature(gray)
-                dist = _hamming(sig, tpl_sig)
-                if dist <= GUARD_HAMMING_THRESH:
+            tpl = self._templates.get(layout["template_key"])
+            tpl_sigs = self._guard_sigs.get(layout["template_key"])
+
+            if tpl_sigs is not None:
+                if int(self._distances(region.signature, tpl_sigs, layout["template_key"]).min()) <= GUARD_HAMMING_THRESH:
                     return True
 
             if tpl is not None:
-                res = cv2.matchTemplate(gray, tpl, cv2.TM_CCOEFF_NORMED)
-                if res.size > 0 and res.max() >= 0.6:
-                    return True
+                gray = region.canonical
+                # matchTemplate needs one image to contain the other in both dimensions
+                fits = (tpl.shape[0] <= gray.shape[0]) == (tpl.shape[1] <= gray.shape[1])
+                if fits:
+                    shape = (abs(gray.shape[0] - tpl.shape[0]) + 1, abs(gray.shape[1] - tpl.shape[1]) + 1)
+                    dst = self.buffers.get("match", layout["template_key"], shape, np.float32)
+                    res = cv2.matchTemplate(gray, tpl, cv2.TM_CCOEFF_NORMED, result=dst)
+                    if res.size > 0 and res.max() >= 0.6:
+                        return True
             return False
 
         # OCR-only guard detection
-        text = self._ocr_text(img).lower()
+        text = self._ocr_text(region).lower()
         self._last_guard_text = text  # debug
         if "essence" not in text:
             return False
@@ -329,109 +814,214 @@ class LookupDriver:
             return "etch essence" in text or "essence" in text
         return True
 
-    def _stat_from_cache(self, img: np.ndarray) -> Optional[Stat]:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        sig = _signature(gray)
-        best: Tuple[str, int] | None = None
-        second_best: Tuple[str, int] | None = None
-        for stat_name, tpl_sig in self._stat_sigs.items():
-            dist = _hamming(sig, tpl_sig)
-            if best is None or dist < best[1]:
-                second_best = best
-                best = (stat_name, dist)
-            elif second_best is None or dist < second_best[1]:
-                second_best = (stat_name, dist)
-
-        if best is None:
+    def _distances(self, sig: np.ndarray, sig_matrix: np.ndarray, key: Hashable) -> np.ndarray:
+        """hamming_many into pooled scratch; the result is overwritten by the next call for key."""
+        n = len(sig_matrix)
+        scratch = self.buffers.get("xor", key, (n, SIG_BYTES))
+        return _hamming_many(sig, sig_matrix, scratch, self.buffers.get("dist", key, (n, 1), np.int32))
+
+    def _stat_from_cache(self, img: Union[np.ndarray, Region]) -> Optional[Stat]:
+        sig = self._region(img).signature
+        n = len(self._stat_sig_names)
+        if n == 0:
+            self._m_cache["miss"].inc()
             return None
 
+        dists = self._distances(sig, self._stat_sig_matrix, "stat")
+        # argmin keeps the first-registered template on ties, like the old scan
+        best_idx = int(dists.argmin())
+        best = (self._stat_sig_names[best_idx], int(dists[best_idx]))
+        # runner-up is the nearest exemplar of a *different* stat
+        others = dists[self._stat_sig_ids != self._stat_sig_ids[best_idx]]
+        runner = int(others.min()) if others.size else 256
+
         # Strict accept
         if best[1] <= STAT_HAMMING_STRICT:
+            self._m_cache["strict"].inc()
+            self.stat_store.record_hit(int(self._stat_sig_rows[best_idx]))
             return Stat[best[0]]
 
         # Margin accept
-        runner = second_best[1] if second_best else 256
         if best[1] <= STAT_HAMMING_THRESH and (runner - best[1] >= STAT_HAMMING_MARGIN):
+            self._m_cache["margin"].inc()
+            self.stat_store.record_hit(int(self._stat_sig_rows[best_idx]))
             return Stat[best[0]]
 
+        self._m_cache["miss"].inc()
         return None
 
-    def _persist_stat_template(self, stat: Stat, img: np.ndarray) -> None:
-        name = stat.name
-        path = MATCHED_DIR / f"{name}.png"
-        if path.exists():
+    def _persist_stat_template(self, stat: Stat, img: Union[np.ndarray, Region]) -> None:
+        # Adds a new exemplar unless a near-identical one exists (capped + LRU per stat)
+        if self.stat_store.add(stat.name, self._reference(self._region(img))) is None:
             return
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        cv2.imwrite(str(path), gray)
-        self._stat_templates[name] = gray
-        self._stat_sigs[name] = _signature(gray)
+        self._rebuild_stat_matrix()
+        self.stat_store.save(self.stat_store.path or USER_STAT_STORE_PATH)
+
+    def _learn_exemplars(
+        self,
+        stats: List[Optional[Stat]],
+        raw_texts: List[str],
+        ocr_scores: List[Optional[float]],
+        from_cache: List[bool],
+        stat_regions: List[Region],
+    ) -> None:
+        # Only slots OCR resolved to a stat no other slot claims; a duplicate means one read is wrong
+        for idx, stat in enumerate(stats):
+            if stat is None or from_cache[idx] or ocr_scores[idx] is None or stats.count(stat) > 1:
+                continue
+            region = stat_regions[idx]
+            dists = self._distances(region.signature, self._stat_sig_matrix, "stat")
+            outcome = self.learner.offer(
+                stat, raw_texts[idx], ocr_scores[idx], self._reference(region), region.signature,
+                dists, self._stat_sig_ids, self._stat_sig_rows,
+            )
+            if outcome in ("learned", "evicted"):
+                self._rebuild_stat_matrix()
+        self.learner.maybe_save()
+
+    def _fingerprint(self, regions: FrameRegions) -> List[np.ndarray]:
+        # The grays made here are the ones the guard and stat stages reuse on a changed frame.
+        # Thumbs live in pooled buffers; _keep_fingerprint copies the ones to compare against.
+        thumbs = []
+        for i, region in enumerate(regions.all()):
+            gray = region.gray
+            h, w = gray.shape
+            size = (min(w, DELTA_THUMB_SIZE[0]), min(h, DELTA_THUMB_SIZE[1]))
+            dst = self.buffers.get("thumb", i, (size[1], size[0]))
+            thumbs.append(cv2.resize(gray, size, dst=dst, interpolation=cv2.INTER_AREA))
+        return thumbs
+
+    def _keep_fingerprint(self, fingerprint: List[np.ndarray]) -> None:
+        kept = []
+        for i, thumb in enumerate(fingerprint):
+            buf = self.buffers.get("thumb_last", i, thumb.shape)
+            np.copyto(buf, thumb)
+            kept.append(buf)
+        self._last_fingerprint = kept
+
+    def _frame_changed(self, fingerprint: List[np.ndarray]) -> bool:
+        last = self._last_fingerprint
+        if last is None or len(last) != len(fingerprint):
+            return True
+        for prev, cur in zip(last, fingerprint):
+            if prev.shape != cur.shape:
+                return True
+            # uint8 absdiff is exact (|a - b| <= 255), so this is the plain mean abs difference
+            diff = cv2.absdiff(cur, prev, dst=self.buffers.get("thumb_diff", cur.shape, cur.shape))
+            if cv2.mean(diff)[0] > self.delta_threshold:
+                return True
+        return False
 
     def read(self) -> Dict[str, object]:
+        if self.profiler is not None:
+            return self.profiler.call(self._read)
+        return self._read()
+
+    def _read(self) -> Dict[str, object]:
         t0 = time.perf_counter()
-        win = _get_game_rect(self.window_title)
+        frame = self._grab_frame()
+        t_grab = time.perf_counter()
+        regions = self._frame_regions(frame)
+
+        if self.skip_unchanged:
+            fingerprint = self._fingerprint(regions)
+            if self._last_result is not None and not self._frame_changed(fingerprint):
+                # Guard and stat regions unchanged since the last recognised frame
+                self._observe_frame("unchanged", _timings(t0, t_grab, time.perf_counter()))
+                logs = ["[SKIP] Frame unchanged, reusing last read"] if self.log_debug else []
+                self.last_read = {**self._last_result, "logs": logs, "unchanged": True}
+                return self.last_read
+            self._keep_fingerprint(fingerprint)
+
+        result = self._recognise(frame, t0, t_grab, regions)
+        self._last_result = result
+        self.last_read = result
+        return result
+
+    def _recognise(
+        self,
+        frame: np.ndarray,
+        t0: Optional[float] = None,
+        t_grab: Optional[float] = None,
+        regions: Optional[FrameRegions] = None,
+    ) -> Dict[str, object]:
+        t0 = t0 if t0 is not None else time.perf_counter()
+        t_grab = t_grab if t_grab is not None else t0
+        regions = regions if regions is not None else self._frame_regions(frame)
 
         logs: List[str] = []
         chosen_layout = None
-        menu_img_cache: Optional[np.ndarray] = None
+        debug = self.debug_writer if self.debug_writer is not None and self.debug_writer.begin_frame() else None
 
-        # Try layouts in order; release unneeded images ASAP
-        for layout in LAYOUTS:
-            menu_img = self._capture_region(layout, layout["menu_idx"], win)
-            menu_ok = self._check_menu_guard(layout, menu_img)
+        # Try layouts against the same frame, last matched layout first
+        for pos, layout in enumerate(self._layout_order):
+            menu_region = regions.region(layout["name"], layout["menu_idx"])
+            menu_ok = self._check_menu_guard(layout, menu_region)
+            self._m_guard[layout["name"], menu_ok].inc()
             if menu_ok:
                 chosen_layout = layout
-                menu_img_cache = menu_img
+                if pos == 0:
+                    self._m_sticky.inc()
+                else:
+                    self._layout_order.remove(layout)
+                    self._layout_order.insert(0, layout)
                 if self.log_debug:
                     logs.append(f"[HIT] Menu Guard detected: {layout['name']} menu")
                 break
             else:
-                if self.save_images or self.log_debug:
-                    DEBUG_DIR.mkdir(parents=True, exist_ok=True)
-                    fname = DEBUG_DIR / f"guard_{layout['name']}_{self._debug_counter}.png"
-                    cv2.imwrite(str(fname), menu_img)
-                del menu_img
+                if debug is not None:
+                    debug.submit(f"guard_{layout['name']}", menu_region.img)
                 if self.log_debug:
                     logs.append(f"[MISS] Guard OCR '{getattr(self,'_last_guard_text','')}' for layout {layout['name']}")
-                self._debug_counter += 1
 
         if chosen_layout is None:
-            self._last_logs = logs
-            return {"quality_ok": False, "menu_ok": False, "logs": logs, "menu_text": "", "raw_texts": ["", "", ""], "stats": [None, None, None]}
+            timings = _timings(t0, t_grab, time.perf_counter())
+            self._observe_frame("no_menu", timings)
+            return {"quality_ok": False, "menu_ok": False, "logs": logs, "menu_text": "", "raw_texts": ["", "", ""], "stats": [None, None, None], "timings": timings}
 
-        # Capture all regions in one shot to keep stat lines in sync
+        # Slice all regions from the guard's frame to keep stat lines in sync
         t_cap = time.perf_counter()
-        imgs = self._capture_all(chosen_layout, win)
+        layout_regions = regions.layout(chosen_layout["name"])
         t_after_cap = time.perf_counter()
 
-        if self.save_images:
-            DEBUG_DIR.mkdir(parents=True, exist_ok=True)
-            for i, img in enumerate(imgs):
-                cv2.imwrite(str(DEBUG_DIR / f"{chosen_layout['name']}_region_{i}.png"), img)
+        if self.save_images and debug is not None:
+            for i, region in enumerate(layout_regions):
+                debug.submit(f"{chosen_layout['name']}_region_{i}", region.img)
 
         quality_ok = True
         if chosen_layout["quality_idx"] is not None and getattr(self, "use_quality_guard", True):
-            qimg = imgs[chosen_layout["quality_idx"]]
+            qimg = layout_regions[chosen_layout["quality_idx"]].img
             quality_ok = _pixel_matches(qimg, QUALITY_COLOR, COLOR_TOLERANCE)
             if quality_ok and self.log_debug:
                 logs.append("[HIT] Quality pixel matches #ffba03")
             if not quality_ok:
-                self._last_logs = logs
-                return {"quality_ok": False, "menu_ok": True, "logs": logs, "menu_text": "", "raw_texts": ["", "", ""], "stats": [None, None, None]}
+                timings = _timings(t0, t_grab, t_cap, t_after_cap, time.perf_counter())
+                self._observe_frame("quality_fail", timings)
+                return {"quality_ok": False, "menu_ok": True, "logs": logs, "menu_text": "", "raw_texts": ["", "", ""], "stats": [None, None, None], "timings": timings, "layout": chosen_layout["name"]}
 
+        # OCR-ing the guard region for the debug dump cost a full OCR call per frame;
+        # the region itself is saved with the others, so menu_text stays empty
         menu_text = ""
-        if self.save_images:
-            menu_img_src = menu_img_cache if menu_img_cache is not None else imgs[chosen_layout["menu_idx"]]
-            menu_text = self._ocr_text(menu_img_src)
 
         raw_texts: List[str] = ["", "", ""]
         stats: List[Optional[Stat]] = [None, None, None]
+        ocr_scores: List[Optional[float]] = [None, None, None]
         from_cache: List[bool] = [False, False, False]
         low_contrast_flags: List[bool] = [False, False, False]
+        stat_regions = [layout_regions[i] for i in chosen_layout["stat_indices"]]
 
-        for idx_out, region_idx in enumerate(chosen_layout["stat_indices"]):
-            region_img = imgs[region_idx]
+        # OCR is deterministic per crop, so each slot is read at most once per frame
+        ocr_results: Dict[int, Tuple[str, float]] = {}
 
-            if _low_contrast(region_img):
+        def ocr_slots(slots: List[int]) -> None:
+            todo = [i for i in slots if i not in ocr_results]
+            for i, res in zip(todo, self._ocr_many([stat_regions[i] for i in todo])):
+                ocr_results[i] = res
+
+        pending: List[int] = []
+        for idx_out, region in enumerate(stat_regions):
+            if _low_contrast(region):
+                self._m_low_contrast.inc()
                 if self.log_debug:
                     logs.append(f"[SKIP] Stat region {idx_out+1} low contrast (fading)")
                 stats[idx_out] = None
@@ -441,7 +1031,7 @@ class LookupDriver:
 
             # Fast cache lookup
             if self.use_stat_cache:
-                cached_stat = self._stat_from_cache(region_img)
+                cached_stat = self._stat_from_cache(region)
                 if cached_stat:
                     stats[idx_out] = cached_stat
                     raw_texts[idx_out] = cached_stat.name
@@ -450,59 +1040,80 @@ class LookupDriver:
                     from_cache[idx_out] = True
                     continue
 
-            raw = self._ocr_text(region_img)
+            pending.append(idx_out)
+
+        if self.use_stat_cache:
+            self._observe_cache_slots([i not in pending for i in range(len(stat_regions)) if not low_contrast_flags[i]])
+
+        # Cache misses go to OCR together
+        ocr_slots(pending)
+        for idx_out in pending:
+            raw, score = ocr_results[idx_out]
             raw_texts[idx_out] = raw
-            stats[idx_out] = _choose_stat(raw, STAT_MAPPING := STAT1_MAPPING)  # mappings all unified
+            ocr_scores[idx_out] = score
+            stats[idx_out] = _choose_stat(raw, STAT1_MAPPING)  # mappings all unified
 
             if stats[idx_out] and self.create_stat_cache:
-                self._persist_stat_template(stats[idx_out], region_img)
+                self._persist_stat_template(stats[idx_out], stat_regions[idx_out])
 
-        # If any duplicates or None, fall back to OCR-only for those slots to avoid stale cache
+        # If any duplicates or None, fall back to OCR-only for those slots to avoid stale cache.
+        # Cached duplicates are prefetched in one batch; the loop reads any stragglers.
+        refetch = [i for i, st in enumerate(stats) if from_cache[i] and stats.count(st) > 1]
+        self._m_refetch.inc(len(refetch))
+        ocr_slots(refetch)
         seen = set()
         for idx, stat in enumerate(stats):
             if stat is None or stat in seen:
-                if _low_contrast(imgs[chosen_layout["stat_indices"][idx]]):
+                if low_contrast_flags[idx]:
                     if self.log_debug:
                         logs.append(f"[SKIP] Stat region {idx+1} low contrast (refetch)")
                     stats[idx] = None
                     raw_texts[idx] = ""
                     continue
-                raw = self._ocr_text(imgs[chosen_layout["stat_indices"][idx]])
+                if idx not in ocr_results:
+                    self._m_refetch.inc()
+                ocr_slots([idx])
+                raw, score = ocr_results[idx]
                 raw_texts[idx] = raw
-                stats[idx] = _choose_stat(raw, STAT_MAPPING := STAT1_MAPPING)
+                ocr_scores[idx] = score
+                stats[idx] = _choose_stat(raw, STAT1_MAPPING)
                 from_cache[idx] = False
                 low_contrast_flags[idx] = False
             if stats[idx]:
                 seen.add(stats[idx])
 
+        if self.learner is not None:
+            self._learn_exemplars(stats, raw_texts, ocr_scores, from_cache, stat_regions)
+
         if not self.save_images:
             # release captured images promptly
-            del imgs
+            del layout_regions, stat_regions, regions, frame
 
+        timings = _timings(t0, t_grab, t_cap, t_after_cap, time.perf_counter())
+        self._observe_frame("recognised", timings)
         if self.log_debug:
-            t_end = time.perf_counter()
             logs.append(
-                "[TIMING] menu_check={:.1f}ms capture={:.1f}ms ocr={:.1f}ms total={:.1f}ms".format(
-                    (t_cap - t0) * 1000,
-                    (t_after_cap - t_cap) * 1000,
-                    (t_end - t_after_cap) * 1000,
-                    (t_end - t0) * 1000,
-                )
+                "[TIMING] capture={capture_ms:.1f}ms menu_check={menu_check_ms:.1f}ms slice={slice_ms:.1f}ms "
+                "ocr={ocr_ms:.1f}ms total={total_ms:.1f}ms".format(**timings)
             )
 
-        self._last_logs = logs
         return {
             "quality_ok": quality_ok,
             "menu_ok": True,
             "menu_text": menu_text,
             "raw_texts": raw_texts,
+            "ocr_scores": ocr_scores,
             "stats": stats,
             "logs": logs,
             "layout": chosen_layout["name"],
+            "timings": timings,
         }
 
     def stat_tuple(self) -> Optional[Union[Tuple[Stat, Stat], Tuple[Stat, Stat, Stat]]]:
-        result = self.read()
+        return self.stat_tuple_from(self.read())
+
+    def stat_tuple_from(self, result: Dict[str, object]) -> Optional[Union[Tuple[Stat, Stat], Tuple[Stat, Stat, Stat]]]:
+        """The lookup key stat_tuple() would return for an already computed read() result."""
         if not result["quality_ok"]:
             return None
 
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
+import functools
 import importlib
 import json
+import multiprocessing
 import sys
 import time
 from pathlib import Path
 import sys
-from typing import Iterable, List, Tuple, Union
+from typing import Iterable, List, Optional, Tuple, Union
 
 from Essence_Helper import Stat, WeaponIndex
-from audio_helper import chime
-from lookup_driver import LookupDriver, GuardMode
+from audio_helper import make_sink
+from debug_writer import DEBUG_DIR, DebugImageWriter
+from frame_ring import CaptureProcess, RingFrameSource, start_capture
+from frame_source import FrameSource, LiveFrameSource, PushFrameSource, WINDOW_TITLE
+from index_cache import artifact_path, compile_index, load_or_build
+from lookup_driver import LookupDriver, GuardMode, OcrMode
+from metrics import SnapshotWriter
+from pipeline import LookupPipeline
+from scheduler import CaptureScheduler
 
 def resource_path(rel: str) -> Path:
     base = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent))
@@ -29,11 +38,27 @@ WEAPON_JSON = data_path("data/weapons.json")
 HOTKEY = "f10"  # user-changeable toggle
 LOG_DEBUG = False  # verbose logging toggle
 SAVE_IMAGES = False  # set True when you need dumps in data/tmp/ocr_debug
+DEBUG_IMAGE_FORMAT = "png"    # png | jpg | webp for debug dumps
+DEBUG_SAMPLE_EVERY = 1        # keep debug images for 1 in N frames
+DEBUG_MAX_FILES = 500         # oldest debug images are deleted past this many...
+DEBUG_MAX_MB = 200            # ...or this much disk
 GUARD_MODE = GuardMode.IMAGE  # IMAGE | OCR | NONE
 USE_STAT_CACHE = True        # use cache lookups
-CREATE_STAT_CACHE = False     # if True, save matched stat images to data/matched
+CREATE_STAT_CACHE = False     # if True, add matched stat exemplars to the user store (data/tmp)
+LEARN_STAT_CACHE = False      # learning mode: add stat lines OCR reads with high confidence as new exemplars
 USE_QUALITY_GUARD = False     # set False to skip gold pixel check (e.g., to see lower rarity)
 REQUIRE_THREE_STATS = True    # require all 3 stats before lookup
+SKIP_UNCHANGED_FRAMES = True  # reuse the last read while guard/stat regions are unchanged
+CPU_BUDGET = 0.25             # max share of wall time the capture loop may spend working
+OCR_MODE = OcrMode.REC_ONLY   # REC_ONLY batches stat lines through the recognizer | FULL
+WARM_OCR = True               # load OCR models in the background at startup instead of on first use
+SCALE_SETS = True             # resample templates for non-1080p windows on first sight
+CAPTURE_PROCESS = False       # grab frames in a separate process via a shared-memory ring
+CAPTURE_FPS = 30              # frame cap for the capture process
+METRICS_PATH = None           # e.g. "data/tmp/metrics.json" or "data/tmp/metrics.prom" (Prometheus text)
+METRICS_INTERVAL = 10.0       # seconds between metrics snapshots
+PROFILE = None                # "sample" | "cprofile": profile every PROFILE_EVERY-th read into data/tmp/profile
+PROFILE_EVERY = 10
 
 
 # ---------- Persistence helpers ----------
@@ -74,13 +99,16 @@ def export_index_to_json(index: WeaponIndex, path: Path) -> None:
 
 def bootstrap_index(path: Path) -> WeaponIndex:
     if path.exists():
-        print(f"[INFO] Loading weapons from {path}")
-        return load_index_from_json(path)
+        index, cached = load_or_build(path, load_index_from_json)
+        source = artifact_path(path) if cached else path
+        print(f"[INFO] Loading weapons from {source}")
+        return index
 
     print("[INFO] weapons.json not found, importing from setup.py")
     setup = importlib.import_module("setup")
     index: WeaponIndex = setup.index  # uses the populated index from setup.py
     export_index_to_json(index, path)
+    compile_index(index, path)
     return index
 
 
@@ -93,62 +121,104 @@ def run_lookup_loop(index: WeaponIndex, hotkey: str = HOTKEY) -> None:
         print("Please install `keyboard` for hotkey support: pip install keyboard")
         sys.exit(1)
 
+    capture: Optional[CaptureProcess] = None
+    source: FrameSource = LiveFrameSource(WINDOW_TITLE)
+    if CAPTURE_PROCESS:
+        try:
+            capture = start_capture(
+                functools.partial(LiveFrameSource, WINDOW_TITLE), readers=1, max_fps=CAPTURE_FPS, paused=True
+            )
+            source = RingFrameSource(capture.ring, 0)
+        except RuntimeError as exc:
+            print(f"[WARN] {exc}; capturing in-process instead", file=sys.stderr)
+
+    debug_writer = None
+    if SAVE_IMAGES or LOG_DEBUG:
+        debug_writer = DebugImageWriter(
+            DEBUG_DIR,
+            fmt=DEBUG_IMAGE_FORMAT,
+            max_files=DEBUG_MAX_FILES,
+            max_bytes=DEBUG_MAX_MB * 1024 * 1024,
+            sample_every=DEBUG_SAMPLE_EVERY,
+        )
+
+    # The pipeline's capture stage owns the real source and pushes frames to the driver
     driver = LookupDriver(
         save_images=SAVE_IMAGES,
         log_debug=LOG_DEBUG,
         guard_mode=GUARD_MODE,
         use_stat_cache=USE_STAT_CACHE,
         create_stat_cache=CREATE_STAT_CACHE,
+        learn_stat_cache=LEARN_STAT_CACHE,
         require_three_stats=REQUIRE_THREE_STATS,
+        skip_unchanged=SKIP_UNCHANGED_FRAMES,
+        ocr_mode=OCR_MODE,
+        warm_ocr=WARM_OCR,
+        scale_sets=SCALE_SETS,
+        frame_source=PushFrameSource(),
+        debug_writer=debug_writer,
+        profile=PROFILE,
+        profile_every=PROFILE_EVERY,
     )
     driver.use_quality_guard = USE_QUALITY_GUARD
-    active = False
+    sink = make_sink()
+    pipeline = LookupPipeline(
+        driver,
+        index,
+        source,
+        sink,
+        scheduler=CaptureScheduler(cpu_budget=CPU_BUDGET),
+        log_debug=LOG_DEBUG,
+    )
+    metrics_writer = SnapshotWriter(driver.metrics, METRICS_PATH, METRICS_INTERVAL) if METRICS_PATH else None
 
     def toggle():
-        nonlocal active
-        active = not active
-        state = "ON" if active else "OFF"
-        print(f"[INFO] Toggled capture {state}")
+        active = pipeline.toggle()
+        print(f"[INFO] Toggled capture {'ON' if active else 'OFF'}")
+        if capture is not None and active:
+            capture.resume()
+        elif capture is not None:
+            capture.pause()
 
     keyboard.add_hotkey(hotkey, toggle)
     print(f"[INFO] Press {hotkey.upper()} to toggle continuous capture. Ctrl+C to exit.")
+    if LOG_DEBUG:
+        print(f"[INFO] Startup {driver.startup_report()}")
 
+    pipeline.start()
     try:
-        while True:
-            if not active:
-                time.sleep(0.1)
-                continue
-
-            stats_tuple = driver.stat_tuple()
-            if not stats_tuple:
-                if LOG_DEBUG and getattr(driver, "_last_logs", None):
-                    for line in driver._last_logs:
-                        print(line)
-                    driver._last_logs = []
-                time.sleep(0.1)
-                continue
-
-            matches = index.lookup(*stats_tuple)
-            if matches:
-                human_stats = ", ".join(stat.name for stat in stats_tuple)
-                print(f"[HIT] {human_stats} -> {', '.join(matches)}")
-                chime()
-            else:
-                if LOG_DEBUG:
-                    print("[INFO] No weapon match for detected stats.")
-
-            # Print debug logs collected during read
-            result_logs = getattr(driver, "_last_logs", None)
-            if LOG_DEBUG and result_logs:
-                for line in result_logs:
-                    print(line)
-                driver._last_logs = []  # reset
-
-            time.sleep(0.1)
+        while pipeline.running:
+            time.sleep(0.5)
+            if metrics_writer is not None and pipeline.active:
+                metrics_writer.maybe_write()
+        if pipeline.error is not None:
+            print(f"[ERROR] Lookup pipeline stopped: {pipeline.error!r}", file=sys.stderr)
     except KeyboardInterrupt:
         print("\n[INFO] Exiting...")
+    finally:
+        pipeline.stop()
+        sink.close()
+        if LOG_DEBUG:
+            print(f"[INFO] Frames read={driver.frames_read} skipped unchanged={driver.frames_skipped}")
+            print(f"[INFO] Pipeline {pipeline.metrics()}")
+            print(f"[INFO] Scheduler {pipeline.scheduler.metrics()}")
+            print(f"[INFO] Geometry {driver.geometry_stats()}")
+            print(f"[INFO] Startup {driver.startup_report()}")
+            if capture is not None:
+                print(f"[INFO] Capture process frames={capture.frames} ring {source.stats()}")  # type: ignore[attr-defined]
+            if debug_writer is not None:
+                print(f"[INFO] Debug images {debug_writer.stats()}")
+        # Flushes debug images and the profile, and saves exemplar hit counters / last-used times
+        # to the user store (data/tmp/stat_templates.user.npy)
+        driver.close()
+        if metrics_writer is not None:
+            metrics_writer.flush()
+        source.close()
+        if capture is not None:
+            capture.stop()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # the capture process is spawned; needed in the PyInstaller exe
     idx = bootstrap_index(WEAPON_JSON)
     run_lookup_loop(idx, HOTKEY)
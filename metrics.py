@@ -0,0 +1,298 @@
+"""
+In-process counters, gauges and latency histograms for the recognition pipeline.
+
+LookupDriver.metrics is a MetricsRegistry. Metric handles are created once
+(per label set) and updated with a single integer/float add on the hot path;
+nothing is formatted until a snapshot is asked for. Snapshots export as JSON
+or as Prometheus text exposition (node_exporter's textfile collector picks up
+a .prom file as-is).
+
+    python metrics.py data/tmp/metrics.json          # pretty-print a JSON snapshot
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# ---- Configuration ---------------------------------------------------------
+
+NAMESPACE = "essence_helper"
+# upper bounds in ms; a cache-hit frame lands in the first few, an OCR frame in the tail
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0)
+PROMETHEUS_SUFFIXES = (".prom", ".txt")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prom_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _json_bound(v: Optional[float]) -> Union[float, str, None]:
+    # inf is not valid JSON
+    return "+Inf" if v == float("inf") else v
+
+
+def _prom_number(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket upper bound the q-quantile falls in (None when empty, inf past the last bound)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = NAMESPACE):
+        self.namespace = namespace
+        self.started = time.time()
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[LabelKey, Counter]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, Gauge]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def counter(self, name: str, help: str = "", **labels: object) -> Counter:
+        family = self._counters.setdefault(name, {})
+        if help:
+            self._help.setdefault(name, help)
+        key = _label_key(labels)
+        metric = family.get(key)
+        if metric is None:
+            metric = family[key] = Counter()
+        return metric
+
+    def gauge(self, name: str, help: str = "", **labels: object) -> Gauge:
+        family = self._gauges.setdefault(name, {})
+        if help:
+            self._help.setdefault(name, help)
+        key = _label_key(labels)
+        metric = family.get(key)
+        if metric is None:
+            metric = family[key] = Gauge()
+        return metric
+
+    def histogram(
+        self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS_MS, **labels: object
+    ) -> Histogram:
+        family = self._histograms.setdefault(name, {})
+        if help:
+            self._help.setdefault(name, help)
+        key = _label_key(labels)
+        metric = family.get(key)
+        if metric is None:
+            metric = family[key] = Histogram(buckets)
+        return metric
+
+    def value(self, name: str, **labels: object) -> int:
+        """Counter value for one label set, or the sum over all of them when no labels are given."""
+        family = self._counters.get(name, {})
+        if labels:
+            metric = family.get(_label_key(labels))
+            return metric.value if metric is not None else 0
+        return sum(m.value for m in family.values())
+
+    def reset(self) -> None:
+        """Zero every metric, keeping the handles callers already hold valid."""
+        for family in self._counters.values():
+            for c in family.values():
+                c.value = 0
+        for family in self._gauges.values():
+            for g in family.values():
+                g.value = 0.0
+        for family in self._histograms.values():
+            for h in family.values():
+                h.counts = [0] * len(h.counts)
+                h.sum = 0.0
+                h.count = 0
+        self.started = time.time()
+
+    # ---- Export ---------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, object]:
+        counters: Dict[str, List[Dict[str, object]]] = {}
+        for name, family in self._counters.items():
+            counters[name] = [{"labels": dict(key), "value": c.value} for key, c in family.items()]
+        gauges: Dict[str, List[Dict[str, object]]] = {}
+        for name, family in self._gauges.items():
+            gauges[name] = [{"labels": dict(key), "value": round(g.value, 6)} for key, g in family.items()]
+        histograms: Dict[str, List[Dict[str, object]]] = {}
+        for name, family in self._histograms.items():
+            rows = []
+            for key, h in family.items():
+                rows.append({
+                    "labels": dict(key),
+                    "count": h.count,
+                    "sum": round(h.sum, 3),
+                    "mean": round(h.sum / h.count, 3) if h.count else None,
+                    "p50_le": _json_bound(h.quantile(0.5)),
+                    "p95_le": _json_bound(h.quantile(0.95)),
+                    "buckets": dict(zip([str(b) for b in h.bounds] + ["+Inf"], h.counts)),
+                })
+            histograms[name] = rows
+        return {
+            "time": round(time.time(), 3),
+            "uptime_s": round(time.time() - self.started, 3),
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": histograms,
+        }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        ns = self.namespace
+        lines: List[str] = []
+        for name, family in self._counters.items():
+            full = f"{ns}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} counter")
+            for key, c in family.items():
+                lines.append(f"{full}{_prom_labels(key)} {c.value}")
+        for name, family in self._gauges.items():
+            full = f"{ns}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} gauge")
+            for key, g in family.items():
+                lines.append(f"{full}{_prom_labels(key)} {_prom_number(g.value)}")
+        for name, family in self._histograms.items():
+            full = f"{ns}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} histogram")
+            for key, h in family.items():
+                cumulative = 0
+                for bound, n in zip(h.bounds, h.counts):
+                    cumulative += n
+                    lines.append(f"{full}_bucket{_prom_labels(key, ('le', _prom_number(bound)))} {cumulative}")
+                lines.append(f"{full}_bucket{_prom_labels(key, ('le', '+Inf'))} {h.count}")
+                lines.append(f"{full}_sum{_prom_labels(key)} {_prom_number(h.sum)}")
+                lines.append(f"{full}_count{_prom_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Union[str, Path]) -> Path:
+        """Atomically write a snapshot; .prom/.txt get Prometheus text, anything else JSON."""
+        path = Path(path)
+        text = self.to_prometheus() if path.suffix.lower() in PROMETHEUS_SUFFIXES else self.to_json(indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+class SnapshotWriter:
+    """Writes registry snapshots to path at most once per interval; call maybe_write() from the poll loop."""
+
+    def __init__(self, registry: MetricsRegistry, path: Union[str, Path], interval: float = 10.0):
+        self.registry = registry
+        self.path = Path(path)
+        self.interval = interval
+        self._next = 0.0
+
+    def maybe_write(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        return self.flush()
+
+    def flush(self) -> bool:
+        try:
+            self.registry.write(self.path)
+        except OSError as exc:
+            print(f"[WARN] Could not write metrics to {self.path}: {exc}", file=sys.stderr)
+            return False
+        return True
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("snapshot", type=Path, help="JSON snapshot written by MetricsRegistry.write")
+    args = parser.parse_args(argv)
+
+    data = json.loads(args.snapshot.read_text(encoding="utf-8"))
+    print(f"[INFO] uptime {data['uptime_s']}s")
+    for name, rows in sorted(data["counters"].items()):
+        for row in rows:
+            labels = ",".join(f"{k}={v}" for k, v in sorted(row["labels"].items()))
+            print(f"{name:<28}{labels:<32}{row['value']}")
+    for name, rows in sorted(data.get("gauges", {}).items()):
+        for row in rows:
+            labels = ",".join(f"{k}={v}" for k, v in sorted(row["labels"].items()))
+            print(f"{name:<28}{labels:<32}{row['value']}")
+    for name, rows in sorted(data["histograms"].items()):
+        for row in rows:
+            labels = ",".join(f"{k}={v}" for k, v in sorted(row["labels"].items()))
+            if not row["count"]:
+                print(f"{name:<28}{labels:<32}n=0")
+                continue
+            print(f"{name:<28}{labels:<32}n={row['count']} mean={row['mean']}ms "
+                  f"p50<={row['p50_le']}ms p95<={row['p95_le']}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Staged lookup pipeline: capture -> recognise -> lookup -> notify.
+
+Each stage runs on its own thread, joined by bounded queues, so a slow
+stage never stalls the ones before it:
+
+    capture    grabs a frame, hands it over once recognition has taken the
+               previous one, then waits the CaptureScheduler delay; so the
+               next grab overlaps recognition of the current frame
+    recognise  LookupDriver.read() on the grabbed frame, feeds the scheduler
+    lookup     WeaponIndex.lookup on complete stat sets
+    notify     prints hits / debug lines and plays the chime via an AudioSink,
+               which returns immediately
+
+    python pipeline.py                        # synthetic frames, stub audio sink
+    python pipeline.py --frames path/to/frames --seconds 10 --chime-ms 800
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from Essence_Helper import Stat, WeaponIndex
+from audio_helper import AudioSink, StubSink
+from frame_source import FrameSource, FrameSourceExhausted, PushFrameSource
+from lookup_driver import LookupDriver
+from scheduler import CaptureScheduler
+
+# ---- Configuration ---------------------------------------------------------
+
+FRAME_QUEUE_SIZE = 1  # one frame in flight; recognition never works on a stale backlog
+STAGE_QUEUE_SIZE = 8
+IDLE_POLL = 0.1  # seconds between checks while paused
+SYNTHETIC_FRAMES = 16
+
+_DONE = object()
+
+
+def _put(q: "queue.Queue", item: object, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue", stop: threading.Event) -> object:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+class LookupPipeline:
+    def __init__(
+        self,
+        driver: LookupDriver,
+        index: WeaponIndex,
+        source: FrameSource,
+        sink: AudioSink,
+        scheduler: Optional[CaptureScheduler] = None,
+        log_debug: bool = False,
+        on_hit: Optional[Callable[[Tuple[Stat, ...], List[str]], None]] = None,
+        copy_frames: bool = False,
+    ):
+        if not isinstance(driver.frame_source, PushFrameSource):
+            raise ValueError("driver must read from a PushFrameSource; the capture stage owns the real source")
+        self.driver = driver
+        self.index = index
+        self.source = source
+        self.sink = sink
+        self.scheduler = scheduler or CaptureScheduler()
+        self.log_debug = log_debug
+        self.on_hit = on_hit
+        # Sources that reuse their buffer (RingFrameSource(copy=False)) invalidate a frame on
+        # the next grab, which here overlaps recognition of that frame
+        self.copy_frames = copy_frames
+
+        self._frames: "queue.Queue" = queue.Queue(FRAME_QUEUE_SIZE)
+        self._lookups: "queue.Queue" = queue.Queue(STAGE_QUEUE_SIZE)
+        self._notices: "queue.Queue" = queue.Queue(STAGE_QUEUE_SIZE)
+        self._active = threading.Event()
+        self._stop = threading.Event()
+        self._wake = threading.Event()  # cuts a long backoff sleep short on resume
+        self._taken = threading.Event()  # recognition picked up the last handed-over frame
+        self._taken.set()
+        self._delay = 0.0
+        self._threads: List[threading.Thread] = []
+        self.counters: Dict[str, int] = {
+            "captured": 0,
+            "recognised": 0,
+            "lookups": 0,
+            "hits": 0,
+            "notified": 0,
+        }
+        self.error: Optional[BaseException] = None
+
+    # ---- Control --------------------------------------------------------------
+
+    @property
+    def active(self) -> bool:
+        return self._active.is_set()
+
+    def start(self, active: bool = False) -> "LookupPipeline":
+        stages = [
+            ("capture", self._capture),
+            ("recognise", self._recognise),
+            ("lookup", self._lookup),
+            ("notify", self._notify),
+        ]
+        for name, target in stages:
+            thread = threading.Thread(target=self._guarded, args=(target,), name=f"pipeline-{name}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        if active:
+            self.resume()
+        return self
+
+    def resume(self) -> None:
+        self.scheduler.reset()
+        self._delay = self.scheduler.fast_interval
+        self._active.set()
+        self._wake.set()
+
+    def pause(self) -> None:
+        self._active.clear()
+        self._wake.set()
+
+    def toggle(self) -> bool:
+        if self.active:
+            self.pause()
+        else:
+            self.resume()
+        return self.active
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._active.set()  # release a paused capture stage
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads) and not self._stop.is_set()
+
+    def _guarded(self, target: Callable[[], None]) -> None:
+        try:
+            target()
+        except BaseException as exc:  # surface the failure instead of a silently dead stage
+            self.error = exc
+            self._stop.set()
+            self._wake.set()
+
+    def metrics(self) -> Dict[str, object]:
+        return {
+            **self.counters,
+            "chimes_played": self.sink.played,
+            "chimes_dropped": self.sink.dropped,
+            "error": repr(self.error) if self.error is not None else None,
+        }
+
+    # ---- Stages ---------------------------------------------------------------
+
+    def _capture(self) -> None:
+        while not self._stop.is_set():
+            if not self._active.wait(IDLE_POLL):
+                continue
+            t0 = time.perf_counter()
+            try:
+                frame = self.source.grab()
+            except FrameSourceExhausted:
+                break
+            if self.copy_frames:
+                frame = frame.copy()
+            grab_s = time.perf_counter() - t0
+            self.counters["captured"] += 1
+            # At most one frame in flight: wait for recognition to take the previous one
+            while not self._taken.wait(IDLE_POLL):
+                if self._stop.is_set():
+                    break
+            self._taken.clear()
+            if not _put(self._frames, (frame, grab_s), self._stop):
+                break
+            self._wake.wait(self._delay)
+            self._wake.clear()
+        _put(self._frames, _DONE, self._stop)
+
+    def _recognise(self) -> None:
+        slot: PushFrameSource = self.driver.frame_source  # type: ignore[assignment]
+        while True:
+            item = _get(self._frames, self._stop)
+            self._taken.set()
+            if item is _DONE:
+                break
+            frame, grab_s = item  # type: ignore[misc]
+            t0 = time.perf_counter()
+            slot.push(frame)
+            result = self.driver.read()
+            stats_tuple = self.driver.stat_tuple_from(result)
+            work = grab_s + time.perf_counter() - t0
+            self._delay = self.scheduler.record(self.scheduler.classify(result), work)
+            self.counters["recognised"] += 1
+            if self.log_debug and result["logs"]:
+                _put(self._notices, ("log", list(result["logs"]) + [f"[SCHED] {self.scheduler.last_decision}"]), self._stop)  # type: ignore[arg-type]
+            if stats_tuple:
+                _put(self._lookups, stats_tuple, self._stop)
+        _put(self._lookups, _DONE, self._stop)
+
+    def _lookup(self) -> None:
+        while True:
+            stats_tuple = _get(self._lookups, self._stop)
+            if stats_tuple is _DONE:
+                break
+            self.counters["lookups"] += 1
+            matches = self.index.lookup(*stats_tuple)  # type: ignore[misc]
+            if matches:
+                self.counters["hits"] += 1
+                _put(self._notices, ("hit", (stats_tuple, matches)), self._stop)
+            elif self.log_debug:
+                _put(self._notices, ("log", ["[INFO] No weapon match for detected stats."]), self._stop)
+        _put(self._notices, _DONE, self._stop)
+
+    def _notify(self) -> None:
+        while True:
+            item = _get(self._notices, self._stop)
+            if item is _DONE:
+                break
+            kind, payload = item  # type: ignore[misc]
+            if kind == "log":
+                for line in payload:
+                    print(line)
+                continue
+            stats_tuple, matches = payload
+            print(f"[HIT] {', '.join(stat.name for stat in stats_tuple)} -> {', '.join(matches)}")
+            self.sink.play()
+            self.counters["notified"] += 1
+            if self.on_hit is not None:
+                self.on_hit(stats_tuple, matches)
+
+
+# ---- Demo ------------------------------------------------------------------
+
+def _demo_index(count: int) -> WeaponIndex:
+    """An index where every other synthetic frame's stat set is a weapon, so hits actually chime."""
+    from bench_pipeline import MATCHED_DIR
+
+    names = sorted(p.stem for p in MATCHED_DIR.glob("*.png") if p.stem in Stat.__members__)
+    index = WeaponIndex()
+    for i in range(0, count, 2):
+        index.add_weapon(f"Synthetic {i}", *(Stat[names[(i * 3 + k) % len(names)]] for k in range(3)))
+    return index
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from bench_pipeline import synthetic_frames
+    from frame_source import DirectoryFrameSource, MemoryFrameSource
+    from lookup_driver import GuardMode
+    from main import WEAPON_JSON, bootstrap_index
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=str, help="replay screenshots from this folder (synthetic if omitted)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--chime-ms", type=float, default=800.0, help="simulated length of the hit sound")
+    parser.add_argument("--quiet", action="store_true", help="do not print hits")
+    args = parser.parse_args(argv)
+
+    if args.frames:
+        with contextlib.redirect_stdout(sys.stderr):
+            index = bootstrap_index(WEAPON_JSON)
+        source: FrameSource = DirectoryFrameSource(args.frames, loop=True, preload=True)
+    else:
+        index = _demo_index(SYNTHETIC_FRAMES)
+        source = MemoryFrameSource(synthetic_frames(SYNTHETIC_FRAMES), loop=True)
+    driver = LookupDriver(
+        guard_mode=GuardMode.IMAGE, use_stat_cache=True, scale_sets=True, frame_source=PushFrameSource()
+    )
+    driver.use_quality_guard = False
+    sink = StubSink(duration=args.chime_ms / 1000)
+    pipeline = LookupPipeline(driver, index, source, sink)
+
+    with contextlib.ExitStack() as stack:
+        if args.quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        pipeline.start(active=True)
+        time.sleep(args.seconds)
+        pipeline.stop()
+    sink.close()
+    capture_fps = pipeline.counters["captured"] / args.seconds
+    print(f"[INFO] {pipeline.metrics()} capture_fps={capture_fps:.1f}", file=sys.stderr)
+    print(f"[INFO] Scheduler {pipeline.scheduler.metrics()}", file=sys.stderr)
+    return 1 if pipeline.error is not None else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Opt-in field profiler for LookupDriver.read().
+
+Every Nth read runs under either cProfile ("cprofile", aggregated into one
+pstats file) or a stack sampler ("sample", a background thread that records
+the reading thread's Python stack every few ms into a collapsed-stack file
+for flamegraph.pl / speedscope). Profiled reads are skipped whenever their
+measured extra cost would push total profiling overhead above max_overhead
+of session wall time, so it is safe to leave on at a user's machine. The
+file is written on close() or at interpreter exit.
+
+    python profiler.py show data/tmp/profile/read.prof          # top functions
+    python profiler.py show data/tmp/profile/read.collapsed     # hottest frames
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, TypeVar, Union
+
+# ---- Configuration ---------------------------------------------------------
+
+PROFILE_DIR = Path("data/tmp/profile")
+PROFILE_EVERY = 10  # profile one read in N
+MAX_OVERHEAD = 0.02  # max share of session wall time spent on profiling overhead
+SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+BASELINE_ALPHA = 0.1  # EMA weight for the unprofiled read time
+MODES = ("cprofile", "sample")
+SUFFIXES = {"cprofile": ".prof", "sample": ".collapsed"}
+
+T = TypeVar("T")
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class _StackSampler:
+    """Samples one thread's stack while active is set; stacks are stored root-first."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target: Optional[int] = None
+        self._switch: Optional[float] = None
+        self._active = threading.Event()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="read-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._active.wait()
+            if self._stop:
+                return
+            # Random gaps (mean = interval) so reads shorter than the interval are
+            # not always caught at the same point, e.g. their first GIL release
+            time.sleep(random.uniform(0.0, 2 * self.interval))
+            if not self._active.is_set():
+                continue
+            frame = sys._current_frames().get(self._target)  # type: ignore[arg-type]
+            if frame is not None:
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(labels))] += 1
+                self.samples += 1
+            del frame
+
+    def start(self) -> None:
+        self._target = threading.get_ident()
+        # Without a shorter GIL switch interval (default 5 ms) the sampler only
+        # runs when the reader happens to release the GIL, so a ~1 ms read
+        # would always be sampled at its first cv2 call
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch, self.interval / 4))
+        self._active.set()
+
+    def stop(self) -> None:
+        self._active.clear()
+        if self._switch is not None:
+            sys.setswitchinterval(self._switch)
+            self._switch = None
+
+    def close(self) -> None:
+        self._stop = True
+        self._active.set()
+        self._thread.join(1.0)
+
+    def dump(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+class ReadProfiler:
+    def __init__(
+        self,
+        mode: str = "sample",
+        every: int = PROFILE_EVERY,
+        path: Optional[Union[str, Path]] = None,
+        max_overhead: float = MAX_OVERHEAD,
+        interval: float = SAMPLE_INTERVAL,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        self.mode = mode
+        self.every = every
+        self.path = Path(path) if path is not None else PROFILE_DIR / f"read{SUFFIXES[mode]}"
+        self.max_overhead = max_overhead
+        self.calls = 0
+        self.profiled = 0
+        self.skipped_budget = 0
+        self.overhead_s = 0.0
+        self._baseline: Optional[float] = None  # EMA of unprofiled call time
+        self._started = time.perf_counter()
+        self._closed = False
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._sampler = _StackSampler(interval) if mode == "sample" else None
+        atexit.register(self.close)
+
+    def _due(self) -> bool:
+        if self._baseline is None or self.calls % self.every:
+            return False
+        wall = time.perf_counter() - self._started
+        if self.overhead_s > self.max_overhead * wall:
+            self.skipped_budget += 1
+            return False
+        return True
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run fn(), profiled if this call is due and the overhead budget allows."""
+        self.calls += 1
+        if self._closed or not self._due():
+            t0 = time.perf_counter()
+            out = fn()
+            took = time.perf_counter() - t0
+            base = self._baseline
+            self._baseline = took if base is None else base + BASELINE_ALPHA * (took - base)
+            return out
+
+        t0 = time.perf_counter()
+        if self._profile is not None:
+            self._profile.enable()
+        else:
+            self._sampler.start()  # type: ignore[union-attr]
+        try:
+            return fn()
+        finally:
+            if self._profile is not None:
+                self._profile.disable()
+            else:
+                self._sampler.stop()  # type: ignore[union-attr]
+            took = time.perf_counter() - t0
+            # The baseline is a running mean, so a read that is slow on its own
+            # (OCR instead of a cache hit) is over-charged; that only errs safe.
+            self.overhead_s += max(took - (self._baseline or 0.0), 0.0)
+            self.profiled += 1
+
+    def report(self) -> Dict[str, object]:
+        wall = time.perf_counter() - self._started
+        return {
+            "mode": self.mode,
+            "calls": self.calls,
+            "profiled": self.profiled,
+            "skipped_budget": self.skipped_budget,
+            "overhead_fraction": round(self.overhead_s / wall, 4) if wall > 0 else 0.0,
+            "samples": self._sampler.samples if self._sampler is not None else None,
+            "path": str(self.path),
+        }
+
+    def close(self) -> Optional[Path]:
+        """Write the aggregated profile; returns its path, or None if nothing was profiled."""
+        if self._closed:
+            return None
+        self._closed = True
+        atexit.unregister(self.close)
+        if self._sampler is not None:
+            self._sampler.close()
+        if not self.profiled:
+            return None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self._profile is not None:
+                self._profile.dump_stats(str(self.path))
+            else:
+                self._sampler.dump(self.path)  # type: ignore[union-attr]
+        except OSError as exc:
+            print(f"[WARN] Could not write profile {self.path}: {exc}", file=sys.stderr)
+            return None
+        print(f"[INFO] Profile {self.report()}", file=sys.stderr)
+        return self.path
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def _show_collapsed(path: Path, top: int) -> None:
+    own: Counter = Counter()
+    inclusive: Counter = Counter()
+    total = 0
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            n = int(count)
+            frames = stack.split(";")
+            total += n
+            own[frames[-1]] += n
+            for label in set(frames):
+                inclusive[label] += n
+    print(f"[INFO] {total} samples")
+    print(f"{'self%':>7}{'total%':>8}  frame")
+    for label, n in own.most_common(top):
+        print(f"{100 * n / total:7.1f}{100 * inclusive[label] / total:8.1f}  {label}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_show = sub.add_parser("show", help="summarise a .prof or .collapsed file")
+    p_show.add_argument("profile", type=Path)
+    p_show.add_argument("--top", type=int, default=25)
+    p_show.add_argument("--sort", default="cumulative", help="pstats sort key for .prof files")
+    args = parser.parse_args(argv)
+
+    if args.profile.suffix == SUFFIXES["cprofile"]:
+        pstats.Stats(str(args.profile)).strip_dirs().sort_stats(args.sort).print_stats(args.top)
+    else:
+        _show_collapsed(args.profile, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Offline batch scan over a folder of full-window screenshots.
+
+    python scan_batch.py path/to/screenshots                       # JSONL to stdout
+    python scan_batch.py path/to/screenshots --out report.jsonl
+    python scan_batch.py path/to/screenshots --out report.csv --workers 4
+
+Every frame goes through the same LookupDriver.read() recognition and
+WeaponIndex.lookup as the live loop. Frames are fanned out to a process pool
+(one driver, and so one OCR engine, per worker) and the per-frame records
+stream back in filename order. The summary line doubles as a throughput
+benchmark.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO
+
+import cv2
+
+from Essence_Helper import WeaponIndex
+from frame_source import FRAME_PATTERNS, PushFrameSource
+from lookup_driver import GuardMode, LookupDriver, OcrMode
+from main import WEAPON_JSON, bootstrap_index
+
+# ---- Configuration ---------------------------------------------------------
+
+DEFAULT_CHUNKSIZE = 4
+TIMING_KEYS = ("capture_ms", "menu_check_ms", "slice_ms", "ocr_ms", "total_ms")
+CSV_FIELDS = (
+    ["frame", "layout", "menu_ok", "quality_ok", "stat1", "stat2", "stat3", "matches", "decode_ms", "lookup_ms"]
+    + list(TIMING_KEYS)
+    + ["error"]
+)
+
+
+# ---- Worker ----------------------------------------------------------------
+# Each pool process builds one driver in the initializer and reuses it for
+# every frame it is handed.
+
+_DRIVER: Optional[LookupDriver] = None
+_SLOT = PushFrameSource()
+_INDEX: Optional[WeaponIndex] = None
+
+
+def _init_worker(index: WeaponIndex, options: Dict[str, object]) -> None:
+    global _DRIVER, _INDEX
+    _INDEX = index
+    _DRIVER = LookupDriver(
+        guard_mode=GuardMode(options["guard_mode"]),
+        use_stat_cache=bool(options["use_stat_cache"]),
+        require_three_stats=bool(options["require_three_stats"]),
+        skip_unchanged=False,  # frames are independent; never reuse a neighbour's result
+        ocr_mode=OcrMode(options["ocr_mode"]),
+        ocr_threads=options["ocr_threads"],  # type: ignore[arg-type]
+        scale_sets=True,
+        frame_source=_SLOT,
+    )
+    _DRIVER.use_quality_guard = bool(options["use_quality_guard"])
+
+
+def _scan_one(path: str) -> Dict[str, object]:
+    assert _DRIVER is not None and _INDEX is not None
+    record: Dict[str, object] = {"frame": Path(path).name}
+    t0 = time.perf_counter()
+    frame = cv2.imread(path, cv2.IMREAD_COLOR)
+    record["decode_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    if frame is None:
+        record["error"] = "could not decode"
+        return record
+
+    _SLOT.push(frame)
+    ocr_before = _DRIVER.ocr_calls
+    result = _DRIVER.read()
+    t_lookup = time.perf_counter()
+    stats_tuple = _DRIVER.stat_tuple_from(result)
+    matches = _INDEX.lookup(*stats_tuple) if stats_tuple else []
+    record.update({
+        "layout": result.get("layout"),
+        "menu_ok": result["menu_ok"],
+        "quality_ok": result["quality_ok"],
+        "stats": [s.name if s is not None else None for s in result["stats"]],  # type: ignore[union-attr]
+        "raw_texts": result["raw_texts"],
+        "matches": matches,
+        "lookup_ms": round((time.perf_counter() - t_lookup) * 1000, 3),
+        "timings": {k: round(v, 3) for k, v in result.get("timings", {}).items()},  # type: ignore[union-attr]
+        "ocr_calls": _DRIVER.ocr_calls - ocr_before,
+        "worker": os.getpid(),
+    })
+    return record
+
+
+# ---- Parent ----------------------------------------------------------------
+
+def list_frames(directory: Path, patterns: Sequence[str] = FRAME_PATTERNS) -> List[Path]:
+    paths = sorted({p for pat in patterns for p in directory.glob(pat)})
+    if not paths:
+        raise FileNotFoundError(f"No frames found in {directory}")
+    return paths
+
+
+def scan(
+    paths: Sequence[Path],
+    index: WeaponIndex,
+    options: Dict[str, object],
+    workers: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[Dict[str, object]]:
+    """Yield one record per path, in order, as soon as each is ready."""
+    names = [str(p) for p in paths]
+    if workers <= 1:
+        _init_worker(index, options)
+        for name in names:
+            yield _scan_one(name)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(index, options)) as pool:
+        # imap keeps input order while later chunks are still being worked on
+        yield from pool.imap(_scan_one, names, chunksize=chunksize)
+
+
+class _JsonlWriter:
+    def __init__(self, fh: TextIO):
+        self.fh = fh
+
+    def write(self, record: Dict[str, object]) -> None:
+        self.fh.write(json.dumps(record) + "\n")
+
+
+class _CsvWriter:
+    def __init__(self, fh: TextIO):
+        self.writer = csv.DictWriter(fh, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, record: Dict[str, object]) -> None:
+        row = dict(record)
+        stats = record.get("stats") or [None, None, None]
+        for i, stat in enumerate(stats, 1):  # type: ignore[arg-type]
+            row[f"stat{i}"] = stat or ""
+        row["matches"] = "; ".join(record.get("matches") or [])  # type: ignore[arg-type]
+        row.update(record.get("timings") or {})  # type: ignore[arg-type]
+        self.writer.writerow(row)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("frames", type=Path, help="folder of full-window screenshots")
+    parser.add_argument("--out", type=Path, help="report file (.jsonl or .csv); JSONL to stdout if omitted")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--ocr-threads", type=int, default=None,
+                        help="onnxruntime threads per worker (default 1 with several workers)")
+    parser.add_argument("--ocr-mode", choices=[m.value for m in OcrMode], default=OcrMode.REC_ONLY.value)
+    parser.add_argument("--guard", choices=[m.value for m in GuardMode], default=GuardMode.IMAGE.value)
+    parser.add_argument("--no-stat-cache", action="store_true", help="OCR every stat line")
+    parser.add_argument("--quality-guard", action="store_true", help="require the gold quality pixel")
+    parser.add_argument("--allow-two-stats", action="store_true", help="look up frames with only two stats")
+    args = parser.parse_args(argv)
+
+    paths = list_frames(args.frames)
+    workers = max(1, min(args.workers, len(paths)))
+    ocr_threads = args.ocr_threads if args.ocr_threads is not None else (1 if workers > 1 else None)
+    options: Dict[str, object] = {
+        "guard_mode": args.guard,
+        "use_stat_cache": not args.no_stat_cache,
+        "require_three_stats": not args.allow_two_stats,
+        "ocr_mode": args.ocr_mode,
+        "ocr_threads": ocr_threads,
+        "use_quality_guard": args.quality_guard,
+    }
+    with contextlib.redirect_stdout(sys.stderr):  # keep stdout clean for the JSONL stream
+        index = bootstrap_index(WEAPON_JSON)
+
+    if args.out is None:
+        fh: TextIO = sys.stdout
+    else:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(args.out, "w", encoding="utf-8", newline="")
+    writer = _CsvWriter(fh) if args.out is not None and args.out.suffix.lower() == ".csv" else _JsonlWriter(fh)
+
+    t0 = time.perf_counter()
+    frames = hits = errors = ocr_calls = 0
+    try:
+        for record in scan(paths, index, options, workers, args.chunksize):
+            writer.write(record)
+            frames += 1
+            hits += bool(record.get("matches"))
+            errors += "error" in record
+            ocr_calls += int(record.get("ocr_calls", 0))  # type: ignore[arg-type]
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+    wall = time.perf_counter() - t0
+
+    print(
+        f"[INFO] {frames} frames in {wall:.2f}s ({frames / wall if wall > 0 else 0:.1f} frames/s) "
+        f"workers={workers} hits={hits} ocr_calls={ocr_calls} errors={errors}",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Scan a recorded inventory scroll-through for the unique essences in it.
+
+    python scan_video.py recording.mp4
+    python scan_video.py recording.mp4 --out essences.json --fps 10
+
+Three stages run concurrently, joined by bounded queues:
+
+    decode     cv2.VideoCapture, keeping every Nth frame (--fps)
+    keyframes  scene-change detection on the LAYOUTS stat regions; a frame
+               passes once the stat lines changed since the last keyframe
+               and have settled (unchanged since the previous sample)
+    recognise  LookupDriver.read() + WeaponIndex.lookup on keyframes only
+
+Decoding, resizing and OCR all release the GIL, so the stages overlap on
+separate cores.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from Essence_Helper import WeaponIndex
+from frame_source import PushFrameSource
+from lookup_driver import (
+    DELTA_THRESH,
+    DELTA_THUMB_SIZE,
+    LAYOUTS,
+    GuardMode,
+    LookupDriver,
+    OcrMode,
+    _region_bounds,
+    _to_gray,
+)
+from main import WEAPON_JSON, bootstrap_index
+
+# ---- Configuration ---------------------------------------------------------
+
+SAMPLE_FPS = 10.0  # frames per second of video actually looked at
+QUEUE_SIZE = 4  # frames buffered between stages
+SETTLE_SAMPLES = 1  # consecutive unchanged samples before a new selection counts
+
+_DONE = object()
+
+
+# ---- Keyframe filter -------------------------------------------------------
+
+class KeyframeFilter:
+    """
+    Passes a frame when any stat region differs from the last keyframe and
+    every stat region has held still for settle samples, so scroll motion and
+    fade-ins never reach recognition.
+    """
+
+    def __init__(self, threshold: float = DELTA_THRESH, settle: int = SETTLE_SAMPLES):
+        self.threshold = threshold
+        self.settle = settle
+        self._shape: Optional[Tuple[int, int]] = None
+        self._bounds: List[Tuple[int, int, int, int]] = []
+        self._prev: Optional[List[np.ndarray]] = None
+        self._key: Optional[List[np.ndarray]] = None
+        self._still = 0
+
+    def _stat_bounds(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        shape = frame.shape[:2]
+        if shape != self._shape:
+            h, w = shape
+            bounds = {
+                _region_bounds(layout["regions"][i], w, h)
+                for layout in LAYOUTS
+                for i in layout["stat_indices"]
+            }
+            self._bounds = sorted(bounds)
+            self._shape = shape
+            self._prev = self._key = None
+        return self._bounds
+
+    def _thumbs(self, frame: np.ndarray) -> List[np.ndarray]:
+        thumbs = []
+        for top, bottom, left, right in self._stat_bounds(frame):
+            gray = _to_gray(frame[top:bottom, left:right])
+            h, w = gray.shape
+            size = (min(w, DELTA_THUMB_SIZE[0]), min(h, DELTA_THUMB_SIZE[1]))
+            thumbs.append(cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.int16))
+        return thumbs
+
+    def _differs(self, a: List[np.ndarray], b: List[np.ndarray]) -> bool:
+        return any(float(np.abs(x - y).mean()) > self.threshold for x, y in zip(a, b))
+
+    def accept(self, frame: np.ndarray) -> bool:
+        thumbs = self._thumbs(frame)
+        prev, self._prev = self._prev, thumbs
+        if prev is None or self._differs(thumbs, prev):
+            self._still = 0
+            return False
+        self._still += 1
+        if self._still < self.settle:
+            return False
+        if self._key is not None and not self._differs(thumbs, self._key):
+            return False
+        self._key = thumbs
+        return True
+
+
+# ---- Stages ----------------------------------------------------------------
+
+def _put(q: "queue.Queue", item: object, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _decode(cap: cv2.VideoCapture, stride: int, fps: float, out: "queue.Queue", stop: threading.Event,
+            counters: Dict[str, int]) -> None:
+    idx = 0
+    try:
+        while not stop.is_set():
+            if idx % stride:
+                # grab() decodes without the BGR conversion/copy of retrieve()
+                if not cap.grab():
+                    break
+            else:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                counters["sampled"] += 1
+                if not _put(out, (idx / fps, frame), stop):
+                    break
+            idx += 1
+    finally:
+        counters["decoded"] = idx
+        _put(out, _DONE, stop)
+
+
+def _filter(keyframes: KeyframeFilter, src: "queue.Queue", out: "queue.Queue", stop: threading.Event,
+            counters: Dict[str, int]) -> None:
+    try:
+        while not stop.is_set():
+            try:
+                item = src.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                break
+            if keyframes.accept(item[1]):
+                counters["keyframes"] += 1
+                if not _put(out, item, stop):
+                    break
+    finally:
+        _put(out, _DONE, stop)
+
+
+class EssenceCollector:
+    """Recognises keyframes and keeps one entry per distinct stat set."""
+
+    def __init__(self, driver: LookupDriver, source: PushFrameSource, index: WeaponIndex):
+        self.driver = driver
+        self.source = source
+        self.index = index
+        self.essences: Dict[Tuple[str, ...], Dict[str, object]] = {}
+        self.recognised = 0
+
+    def add(self, t: float, frame: np.ndarray) -> None:
+        self.source.push(frame)
+        result = self.driver.read()
+        stats_tuple = self.driver.stat_tuple_from(result)
+        if not stats_tuple:
+            return
+        self.recognised += 1
+        key = tuple(sorted(s.name for s in stats_tuple))
+        entry = self.essences.get(key)
+        if entry is None:
+            self.essences[key] = {
+                "stats": [s.name for s in stats_tuple],
+                "matches": self.index.lookup(*stats_tuple),
+                "first_s": round(t, 3),
+                "last_s": round(t, 3),
+                "sightings": 1,
+            }
+        else:
+            entry["last_s"] = round(t, 3)
+            entry["sightings"] += 1  # type: ignore[operator]
+
+
+def scan_video(
+    path: Path,
+    collector: EssenceCollector,
+    sample_fps: float = SAMPLE_FPS,
+    keyframes: Optional[KeyframeFilter] = None,
+) -> Dict[str, float]:
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Could not open video {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    stride = max(1, int(round(fps / sample_fps))) if sample_fps > 0 else 1
+    counters = {"decoded": 0, "sampled": 0, "keyframes": 0}
+    decoded: "queue.Queue" = queue.Queue(QUEUE_SIZE)
+    selected: "queue.Queue" = queue.Queue(QUEUE_SIZE)
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_decode, args=(cap, stride, fps, decoded, stop, counters), name="video-decode", daemon=True),
+        threading.Thread(target=_filter, args=(keyframes or KeyframeFilter(), decoded, selected, stop, counters),
+                         name="video-keyframes", daemon=True),
+    ]
+
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = selected.get()
+            if item is _DONE:
+                break
+            collector.add(*item)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        cap.release()
+    wall = time.perf_counter() - t0
+
+    duration = counters["decoded"] / fps
+    return {
+        "video_s": round(duration, 2),
+        "wall_s": round(wall, 2),
+        "speed_x": round(duration / wall, 2) if wall > 0 else 0.0,
+        "decoded": counters["decoded"],
+        "sampled": counters["sampled"],
+        "keyframes": counters["keyframes"],
+        "recognised": collector.recognised,
+        "essences": len(collector.essences),
+    }
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--out", type=Path, help="write the essence list here (JSON); stdout if omitted")
+    parser.add_argument("--fps", type=float, default=SAMPLE_FPS, help="video frames per second to sample (0 = all)")
+    parser.add_argument("--settle", type=int, default=SETTLE_SAMPLES, help="still samples before a selection counts")
+    parser.add_argument("--ocr-mode", choices=[m.value for m in OcrMode], default=OcrMode.REC_ONLY.value)
+    parser.add_argument("--no-stat-cache", action="store_true", help="OCR every stat line")
+    parser.add_argument("--quality-guard", action="store_true", help="require the gold quality pixel")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):  # keep stdout for the result
+        index = bootstrap_index(WEAPON_JSON)
+    source = PushFrameSource()
+    driver = LookupDriver(
+        guard_mode=GuardMode.IMAGE,
+        use_stat_cache=not args.no_stat_cache,
+        skip_unchanged=False,  # the keyframe filter already dropped repeats
+        ocr_mode=OcrMode(args.ocr_mode),
+        scale_sets=True,
+        warm_ocr=True,
+        frame_source=source,
+    )
+    driver.use_quality_guard = args.quality_guard
+    collector = EssenceCollector(driver, source, index)
+
+    try:
+        summary = scan_video(args.video, collector, args.fps, KeyframeFilter(settle=args.settle))
+    except FileNotFoundError as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        return 1
+
+    payload = json.dumps(list(collector.essences.values()), indent=2)
+    if args.out is None:
+        print(payload)
+    else:
+        args.out.write_text(payload, encoding="utf-8")
+    print("[INFO] " + " ".join(f"{k}={v}" for k, v in summary.items()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
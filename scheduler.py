@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Mapping, Optional
+
+# ---- Configuration ---------------------------------------------------------
+
+FAST_INTERVAL = 0.025  # seconds between polls right after a guard hit / region change
+STEADY_INTERVAL = 0.1  # menu open, nothing changing
+MAX_INTERVAL = 1.0  # cap for the no-menu backoff
+BACKOFF_FACTOR = 2.0
+FAST_FRAMES = 8  # polls to stay fast after the last change
+CPU_BUDGET = 0.25  # max fraction of wall time spent in capture/recognition
+
+
+class Outcome:
+    HIT = "hit"  # guard matched and stats were recognised
+    CHANGED = "changed"  # guard matched, regions changed, no full stat set yet
+    UNCHANGED = "unchanged"  # frame-delta short-circuit reused the last read
+    MISS = "miss"  # no menu guard matched
+
+
+class CaptureScheduler:
+    """
+    Decides how long the lookup loop sleeps after each poll.
+
+    Polls fast just after a guard hit or a region change, settles to a steady
+    rate while the menu is open but idle, backs off exponentially while no
+    menu guard matches, and never lets recognition work exceed cpu_budget of
+    wall time. Every decision is counted in metrics().
+    """
+
+    def __init__(
+        self,
+        fast_interval: float = FAST_INTERVAL,
+        steady_interval: float = STEADY_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        backoff_factor: float = BACKOFF_FACTOR,
+        fast_frames: int = FAST_FRAMES,
+        cpu_budget: float = CPU_BUDGET,
+    ):
+        if not 0.0 < cpu_budget <= 1.0:
+            raise ValueError("cpu_budget must be in (0, 1]")
+        self.fast_interval = fast_interval
+        self.steady_interval = steady_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.fast_frames = fast_frames
+        self.cpu_budget = cpu_budget
+
+        self.outcomes: Counter = Counter()
+        self.reasons: Counter = Counter()
+        self.last_decision: Dict[str, object] = {}
+        self.work_seconds = 0.0
+        self.sleep_seconds = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """Start over in fast mode (e.g. when capture is toggled ON)."""
+        self._interval = self.fast_interval
+        self._fast_left = self.fast_frames
+
+    @staticmethod
+    def classify(result: Optional[Mapping[str, object]]) -> str:
+        if not result or not result.get("menu_ok"):
+            return Outcome.MISS
+        if result.get("unchanged"):
+            return Outcome.UNCHANGED
+        stats = result.get("stats") or []
+        if result.get("quality_ok") and any(s is not None for s in stats):  # type: ignore[union-attr]
+            return Outcome.HIT
+        return Outcome.CHANGED
+
+    def record(self, outcome: str, work_seconds: float) -> float:
+        """Register one poll and return the delay before the next one."""
+        self.outcomes[outcome] += 1
+        self.work_seconds += work_seconds
+
+        if outcome in (Outcome.HIT, Outcome.CHANGED):
+            self._fast_left = self.fast_frames
+            delay, reason = self.fast_interval, "fast"
+        elif outcome == Outcome.UNCHANGED:
+            if self._fast_left > 0:
+                self._fast_left -= 1
+                delay, reason = self.fast_interval, "fast"
+            else:
+                delay, reason = self.steady_interval, "steady"
+        else:
+            base = max(self._interval, self.steady_interval)
+            delay = min(base * self.backoff_factor, self.max_interval)
+            reason = "backoff" if delay < self.max_interval else "backoff_max"
+            self._fast_left = 0
+
+        # Hard CPU budget: work / (work + sleep) <= cpu_budget
+        floor = work_seconds * (1.0 - self.cpu_budget) / self.cpu_budget
+        if floor > delay:
+            delay, reason = floor, "budget"
+
+        self._interval = delay
+        self.reasons[reason] += 1
+        self.sleep_seconds += delay
+        self.last_decision = {
+            "outcome": outcome,
+            "reason": reason,
+            "delay_ms": round(delay * 1000, 1),
+            "work_ms": round(work_seconds * 1000, 1),
+        }
+        return delay
+
+    def metrics(self) -> Dict[str, object]:
+        total = self.work_seconds + self.sleep_seconds
+        return {
+            "polls": sum(self.outcomes.values()),
+            "outcomes": dict(self.outcomes),
+            "reasons": dict(self.reasons),
+            "interval_ms": round(self._interval * 1000, 1),
+            "work_s": round(self.work_seconds, 3),
+            "sleep_s": round(self.sleep_seconds, 3),
+            "cpu_fraction": round(self.work_seconds / total, 4) if total > 0 else 0.0,
+            "last": dict(self.last_decision),
+        }
+
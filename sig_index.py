@@ -0,0 +1,298 @@
+"""
+Multi-index hash over packed 256-bit signatures.
+
+Each signature is split into 8 substrings of 32 bits. Two signatures within
+radius r bits of each other agree to within r // 8 bits on at least one
+substring (pigeonhole), so a query only looks up rows whose substring equals
+one of the query's with at most r // 8 bits flipped, then measures those
+candidates exactly. Answers are the same as a linear hamming_many scan.
+
+Text crops leave many signature bits the same in every exemplar (background
+above and below the line), so build() deals the bits out to substrings by how
+much they vary across the library. Stat signatures are also dense: different
+stats sit as little as 7 bits apart, and a fifth of a large library lies
+within the 35 bits the margin rule looks at. So lookup() probes the index for
+strict hits only; margin and miss cases pay that probe and then a full linear
+scan, and overall it only draws level with a scan at about 20k exemplars.
+
+This is a standalone tool, not used by LookupDriver: the template store caps
+each stat at 8 exemplars (about 1000 rows with a scale set), where one
+hamming_many over the whole matrix is already the faster lookup. The index,
+its .npz form and the benchmark are here for a library grown by orders of
+magnitude (many locales and resolutions).
+
+    python sig_index.py build                          # data/stat_templates.npy -> data/tmp/stat_templates.idx.npz
+    python sig_index.py bench --sizes 1000 20000 50000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from signatures import SIG_BYTES, hamming_many
+
+# ---- Configuration ---------------------------------------------------------
+
+INDEX_PATH = Path("data/tmp/stat_templates.idx.npz")
+CHUNK_BITS = 32
+CHUNKS = SIG_BYTES * 8 // CHUNK_BITS
+MAX_FLIPS = 2  # probes per substring grow as C(32, flips); past this a query scans linearly
+INDEX_VERSION = 1
+BENCH_SIZES = (100, 1000, 5000, 20000, 50000)
+BENCH_QUERIES = 500
+
+_CHUNK_TAGS = np.arange(CHUNKS, dtype=np.uint64) << np.uint64(CHUNK_BITS)
+_CHUNK_WEIGHTS = (1 << np.arange(CHUNK_BITS - 1, -1, -1, dtype=np.uint64)).astype(np.uint64)
+_PROBE_MASKS: Dict[int, np.ndarray] = {}
+
+
+def _masks(flips: int) -> np.ndarray:
+    """Every CHUNK_BITS-bit mask with at most flips bits set, fewest bits first."""
+    masks = _PROBE_MASKS.get(flips)
+    if masks is None:
+        found = [0]
+        for n in range(1, flips + 1):
+            found.extend(sum(int(_CHUNK_WEIGHTS[b]) for b in bits) for bits in combinations(range(CHUNK_BITS), n))
+        masks = _PROBE_MASKS[flips] = np.array(found, dtype=np.uint64)
+    return masks
+
+
+def _chunks(sigs: np.ndarray, perm: np.ndarray) -> np.ndarray:
+    """(N, 32) uint8 -> (N, CHUNKS) uint64 substring values, each tagged with its substring number."""
+    bits = np.unpackbits(sigs.reshape(-1, SIG_BYTES), axis=1)[:, perm]
+    return (bits.reshape(-1, CHUNKS, CHUNK_BITS) @ _CHUNK_WEIGHTS) | _CHUNK_TAGS
+
+
+def _bit_order(matrix: np.ndarray) -> np.ndarray:
+    """Bit positions, substring by substring; each substring gets every CHUNKS-th bit by variance."""
+    p = np.unpackbits(matrix, axis=1).mean(axis=0) if len(matrix) else np.full(SIG_BYTES * 8, 0.5)
+    by_variance = np.argsort(-(p * (1 - p)), kind="stable").reshape(CHUNK_BITS, CHUNKS)
+    by_variance[1::2] = by_variance[1::2, ::-1]  # snake order so no substring always picks first
+    return np.ascontiguousarray(by_variance.T).ravel()
+
+
+class SignatureIndex:
+    def __init__(self, matrix: np.ndarray, ids: np.ndarray, perm: np.ndarray, keys: np.ndarray, rows: np.ndarray):
+        self.matrix = matrix  # (N, 32) uint8, the indexed signatures in matrix-row order
+        self.ids = ids  # (N,) label per row; the runner-up must carry a different one
+        self._perm = perm  # (256,) signature bit behind each substring bit
+        self._keys = keys  # (N * CHUNKS,) sorted tagged substring values
+        self._rows = rows  # (N * CHUNKS,) matrix row behind each key
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, ids: np.ndarray) -> "SignatureIndex":
+        matrix = np.ascontiguousarray(matrix, dtype=np.uint8).reshape(-1, SIG_BYTES)
+        perm = _bit_order(matrix)
+        flat = _chunks(matrix, perm).ravel()
+        order = np.argsort(flat, kind="stable")
+        return cls(matrix, np.asarray(ids), perm, flat[order], (order // CHUNKS).astype(np.int32))
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def _candidates(self, sig: np.ndarray, radius: int) -> np.ndarray:
+        probes = (_chunks(sig, self._perm).reshape(-1, 1) ^ _masks(radius // CHUNKS)).ravel()
+        lo = np.searchsorted(self._keys, probes, "left")
+        counts = np.searchsorted(self._keys, probes, "right") - lo
+        total = int(counts.sum())
+        # concatenate the key ranges [lo, lo + count) without a Python loop; a row found
+        # through several substrings repeats (measuring it twice beats deduping them all)
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        return self._rows[starts + np.arange(total)]
+
+    def query(self, sig: np.ndarray, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, distances) of every signature within radius bits, rows ascending."""
+        if radius // CHUNKS > MAX_FLIPS:
+            dists = hamming_many(sig, self.matrix)
+            near = np.flatnonzero(dists <= radius)
+            return near, dists[near]
+        cand = self._candidates(sig, radius)
+        dists = hamming_many(sig, self.matrix[cand])
+        near = dists <= radius
+        rows, first = np.unique(cand[near], return_index=True)
+        return rows, dists[near][first]
+
+    def nearest_two(self, sig: np.ndarray, radius: int) -> Tuple[Optional[int], int, int]:
+        """
+        (best row, best distance, runner-up distance), where the runner-up is
+        the nearest row with a different id. Matches argmin over a full scan
+        (lowest row wins ties) while best is within radius; a distance past
+        radius is reported as radius + 1, with best row None.
+        """
+        rows, dists = self.query(sig, radius)
+        if not rows.size:
+            return None, radius + 1, radius + 1
+        best = int(dists.argmin())
+        others = dists[self.ids[rows] != self.ids[rows[best]]]
+        return int(rows[best]), int(dists[best]), int(others.min()) if others.size else radius + 1
+
+    def lookup(self, sig: np.ndarray, strict: int, thresh: int, margin: int) -> Tuple[Optional[int], str]:
+        """
+        The stat cache's accept rule: (row, "strict") for a best match within
+        strict bits, (row, "margin") within thresh bits and at least margin
+        bits nearer than any other id, else (None, "miss"). Strict hits only
+        probe the index at radius strict. The margin check needs every row
+        within thresh + margin - 1, past MAX_FLIPS, so it is a linear scan.
+        """
+        rows, dists = self.query(sig, strict)
+        if rows.size:
+            return int(rows[int(dists.argmin())]), "strict"
+        row, best, runner = self.nearest_two(sig, thresh + margin - 1)
+        if row is not None and best <= thresh and runner - best >= margin:
+            return row, "margin"
+        return None, "miss"
+
+    def save(self, path: Union[str, Path] = INDEX_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as fh:
+            np.savez(
+                fh, version=np.array(INDEX_VERSION), matrix=self.matrix, ids=self.ids,
+                perm=self._perm, keys=self._keys, rows=self._rows,
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = INDEX_PATH) -> "SignatureIndex":
+        with np.load(str(path), allow_pickle=False) as data:
+            if int(data["version"]) != INDEX_VERSION:
+                raise ValueError(f"{path} is index version {int(data['version'])}, expected {INDEX_VERSION}")
+            return cls(data["matrix"], data["ids"], data["perm"], data["keys"], data["rows"])
+
+
+# ---- Benchmark -------------------------------------------------------------
+
+def linear_lookup(
+    sig: np.ndarray, matrix: np.ndarray, ids: np.ndarray, strict: int, thresh: int, margin: int
+) -> Tuple[Optional[int], str]:
+    """SignatureIndex.lookup by full scan, as LookupDriver._stat_from_cache does it."""
+    if not len(matrix):
+        return None, "miss"
+    dists = hamming_many(sig, matrix)
+    best = int(dists.argmin())
+    others = dists[ids != ids[best]]
+    runner = int(others.min()) if others.size else SIG_BYTES * 8
+    if dists[best] <= strict:
+        return best, "strict"
+    if dists[best] <= thresh and runner - dists[best] >= margin:
+        return best, "margin"
+    return None, "miss"
+
+
+def _flip(rng: np.random.Generator, sigs: np.ndarray, max_bits: int) -> np.ndarray:
+    bits = np.unpackbits(sigs, axis=1)
+    for row, k in zip(bits, rng.integers(0, max_bits + 1, len(bits))):
+        row[rng.choice(bits.shape[1], k, replace=False)] ^= 1
+    return np.packbits(bits, axis=1)
+
+
+def synthetic_library(seeds: np.ndarray, seed_ids: np.ndarray, size: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """size signatures clustered around seeds (0-20 bits off), like exemplar variants of each stat."""
+    rng = np.random.default_rng(seed)
+    pick = rng.integers(0, len(seeds), size)
+    return _flip(rng, seeds[pick], 20), seed_ids[pick]
+
+
+def bench(
+    seeds: np.ndarray,
+    seed_ids: np.ndarray,
+    sizes: Sequence[int],
+    rule: Tuple[int, int, int],
+    queries: int = BENCH_QUERIES,
+) -> Dict[int, Dict[str, float]]:
+    rng = np.random.default_rng(1)
+    results: Dict[int, Dict[str, float]] = {}
+    for size in sizes:
+        matrix, ids = synthetic_library(seeds, seed_ids, size)
+        # live captures: near a stat's exemplars, plus some unrelated crops
+        probes = np.vstack([
+            _flip(rng, seeds[rng.integers(0, len(seeds), queries - queries // 5)], 12),
+            rng.integers(0, 256, (queries // 5, SIG_BYTES), dtype=np.uint8),
+        ])
+        t0 = time.perf_counter()
+        index = SignatureIndex.build(matrix, ids)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        linear = [linear_lookup(q, matrix, ids, *rule) for q in probes]
+        linear_us = (time.perf_counter() - t0) * 1e6 / len(probes)
+        indexed, took = [], []
+        for q in probes:
+            t0 = time.perf_counter()
+            indexed.append(index.lookup(q, *rule))
+            took.append(time.perf_counter() - t0)
+        if indexed != linear:
+            raise AssertionError(f"index disagrees with the linear scan at size {size}")
+        is_strict = np.array([result == "strict" for _, result in linear])
+        took_us = np.array(took) * 1e6
+        cand = np.mean([len(np.unique(index._candidates(q, rule[0]))) for q in probes[:100]]) / size
+        results[size] = {
+            "build_ms": build_ms,
+            "linear_us": linear_us,
+            "index_us": float(took_us.mean()),
+            "speedup": linear_us / float(took_us.mean()),
+            "index_strict_us": float(took_us[is_strict].mean()) if is_strict.any() else 0.0,
+            "index_other_us": float(took_us[~is_strict].mean()) if not is_strict.all() else 0.0,
+            "strict_share": float(is_strict.mean()),
+            "strict_candidates": float(cand),
+        }
+    return results
+
+
+def _store_seeds(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    from Essence_Helper import Stat
+    from template_store import TemplateStore
+
+    store = TemplateStore.load(path, mmap=False)
+    return store.signatures(), np.array([Stat[n].value for n in store.stat_names], dtype=np.int16)
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from template_store import STORE_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="index a template store's 1080p signatures")
+    p_build.add_argument("store", type=Path, nargs="?", default=STORE_PATH)
+    p_build.add_argument("--out", type=Path, default=INDEX_PATH)
+    p_bench = sub.add_parser("bench", help="index vs linear scan on synthetic libraries grown from a store")
+    p_bench.add_argument("store", type=Path, nargs="?", default=STORE_PATH)
+    p_bench.add_argument("--sizes", type=int, nargs="+", default=list(BENCH_SIZES))
+    p_bench.add_argument("--queries", type=int, default=BENCH_QUERIES)
+    args = parser.parse_args(argv)
+
+    seeds, seed_ids = _store_seeds(args.store)
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        index = SignatureIndex.build(seeds, seed_ids)
+        index.save(args.out)
+        print(f"[INFO] Indexed {len(index)} signatures in {(time.perf_counter() - t0) * 1000:.1f} ms -> {args.out}")
+        return 0
+
+    from lookup_driver import STAT_HAMMING_MARGIN, STAT_HAMMING_STRICT, STAT_HAMMING_THRESH
+
+    rule = (STAT_HAMMING_STRICT, STAT_HAMMING_THRESH, STAT_HAMMING_MARGIN)
+    print(
+        f"{'rows':>8}{'build ms':>10}{'linear us':>11}{'index us':>10}{'speedup':>9}"
+        f"{'strict':>8}{'strict us':>11}{'other us':>10}{'cands':>8}"
+    )
+    for size, row in bench(seeds, seed_ids, args.sizes, rule, args.queries).items():
+        print(
+            f"{size:>8}{row['build_ms']:>10.1f}{row['linear_us']:>11.1f}{row['index_us']:>10.1f}"
+            f"{row['speedup']:>9.2f}{row['strict_share']:>8.0%}{row['index_strict_us']:>11.1f}"
+            f"{row['index_other_us']:>10.1f}{row['strict_candidates']:>8.1%}"
+        )
+    print("[INFO] every lookup matched the linear scan (strict / margin / miss and row)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
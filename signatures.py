@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import math
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# ---- Configuration ---------------------------------------------------------
+
+SIG_SIZE = 16  # resize to 16x16
+SIG_BYTES = SIG_SIZE * SIG_SIZE // 8  # 256-bit packed signature
+CANONICAL_TEXT_HEIGHT = 24  # px height of a stat/guard line at the 1920x1080 reference
+REFERENCE_SIZE = (1920, 1080)  # resolution the templates were captured at
+
+
+def _resize(img: np.ndarray, size: Tuple[int, int], dst: Optional[np.ndarray] = None) -> np.ndarray:
+    h, w = img.shape[:2]
+    interp = cv2.INTER_AREA if size[0] * size[1] < w * h else cv2.INTER_LINEAR
+    return cv2.resize(img, size, dst=dst, interpolation=interp)
+
+
+def canonical_size(
+    shape: Tuple[int, ...],
+    size: Optional[Tuple[int, int]] = None,
+    height: int = CANONICAL_TEXT_HEIGHT,
+) -> Tuple[int, int]:
+    """(w, h) canonicalize() resizes an image of this shape to."""
+    h, w = shape[:2]
+    if size is not None:
+        return size
+    if h == height or h == 0:
+        return w, h
+    return max(int(round(w * height / h)), 1), height
+
+
+def canonicalize(
+    img_gray: np.ndarray,
+    size: Optional[Tuple[int, int]] = None,
+    height: int = CANONICAL_TEXT_HEIGHT,
+    dst: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Resize a region into the 1080p reference space: to size (w, h) when the
+    region's reference size is known, else to the canonical text height with
+    its aspect kept. Returned unchanged when it is already that size; else
+    written into dst when given (shape from canonical_size).
+    """
+    h, w = img_gray.shape[:2]
+    size = canonical_size(img_gray.shape, size, height)
+    if (w, h) == size:
+        return img_gray
+    return _resize(img_gray, size, dst)
+
+
+def resample(img_gray: np.ndarray, scale_x: float, scale_y: float) -> np.ndarray:
+    """A reference-space image as it would be captured at (scale_x, scale_y) of 1080p."""
+    h, w = img_gray.shape[:2]
+    native = (max(int(round(w * scale_x)), 1), max(int(round(h * scale_y)), 1))
+    if native == (w, h):
+        return img_gray
+    return _resize(img_gray, native)
+
+
+_BIT_WEIGHTS = np.array([128, 64, 32, 16, 8, 4, 2, 1], dtype=np.uint8)
+
+
+def signature(img_gray: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    # dst: optional (SIG_SIZE, SIG_SIZE) uint8 scratch for the downsample
+    resized = cv2.resize(img_gray, (SIG_SIZE, SIG_SIZE), dst=dst, interpolation=cv2.INTER_AREA)
+    # pixel >= mean; rounding the mean up keeps the compare in uint8 (same bits,
+    # without numpy casting the crop to float64 through a temporary buffer)
+    bits = resized >= math.ceil(cv2.mean(resized)[0])
+    # big-endian bit order like np.packbits, which allocates ~20x more per call;
+    # each byte's weighted sum is at most 255, so uint8 matmul is exact
+    return bits.view(np.uint8).reshape(SIG_BYTES, 8) @ _BIT_WEIGHTS
+
+
+def hamming(sig1: np.ndarray, sig2: np.ndarray) -> int:
+    return int(np.unpackbits(np.bitwise_xor(sig1, sig2)).sum())
+
+
+_POPCOUNT_LUT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def hamming_many(
+    sig: np.ndarray,
+    sig_matrix: np.ndarray,
+    scratch: Optional[np.ndarray] = None,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Distances from one packed signature to every row of an (N, 32) uint8 matrix.
+    scratch ((N, 32) uint8) and out ((N, 1) int32) make the call allocation-free.
+    """
+    if not len(sig_matrix):
+        return np.zeros(0, dtype=np.int32)
+    xor = np.bitwise_xor(sig_matrix, sig, out=scratch)
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        bits = np.bitwise_count(xor, out=xor)
+    else:
+        bits = np.take(_POPCOUNT_LUT, xor, out=xor)
+    # cv2.reduce widens the per-byte counts to int32 without numpy's casting buffer
+    return cv2.reduce(bits, 1, cv2.REDUCE_SUM, dst=out, dtype=cv2.CV_32S).reshape(-1)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from Essence_Helper import Stat
+
+# ---- Configuration ---------------------------------------------------------
+
+MATCH_THRESHOLD = 0.90
+MATCH_MARGIN = 0.07
+MEMO_SIZE = 4096  # raw OCR strings remembered per matcher
+
+
+def normalize(text: str) -> str:
+    return "".join(ch.lower() for ch in text if ch.isalnum() or ch.isspace()).strip()
+
+
+def _ratio_bound(a: int, b: int) -> float:
+    # SequenceMatcher.ratio() = 2*M / (a+b) with M <= min(a, b)
+    return 2.0 * min(a, b) / (a + b) if a + b else 1.0
+
+
+class StatMatcher:
+    """
+    Fuzzy OCR-text -> Stat resolver built once from a STAT_MAPPING-style dict.
+
+    Gives the same answers as scoring every alias with SequenceMatcher (exact
+    match wins, else best >= threshold and best - runner-up >= margin), but:
+    aliases are normalised up front with their SequenceMatcher b-side tables
+    prebuilt, candidates are pre-filtered by length bucket and character
+    multiset (quick_ratio), and resolved strings are kept in a bounded LRU.
+
+    Pruning is exact: an alias whose upper bound is below threshold - margin
+    can neither be the accepted best nor sit within margin of it.
+    """
+
+    def __init__(
+        self,
+        mapping: Mapping[str, Union[Sequence[str], str]],
+        threshold: float = MATCH_THRESHOLD,
+        margin: float = MATCH_MARGIN,
+        memo_size: int = MEMO_SIZE,
+    ):
+        self.threshold = threshold
+        self.margin = margin
+        self.memo_size = memo_size
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+        self._aliases: List[Tuple[str, Stat]] = []
+        self._exact: Dict[str, Stat] = {}
+        self._by_len: Dict[int, List[int]] = {}
+        self._matchers: List[SequenceMatcher] = []
+        for key, values in mapping.items():
+            stat = Stat[key]
+            for opt in values if isinstance(values, list) else [values]:
+                norm_opt = normalize(opt)
+                pos = len(self._aliases)
+                self._aliases.append((norm_opt, stat))
+                self._exact.setdefault(norm_opt, stat)
+                self._by_len.setdefault(len(norm_opt), []).append(pos)
+                sm = SequenceMatcher(None)
+                sm.set_seq2(norm_opt)  # b-side index built once per alias
+                self._matchers.append(sm)
+        self._lengths = sorted(self._by_len)
+        self._memo: "OrderedDict[Tuple[str, float, float], Optional[Stat]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def _candidates(self, length: int, cut: float) -> List[int]:
+        picked: List[int] = []
+        for b in self._lengths:
+            if _ratio_bound(length, b) >= cut:
+                picked.extend(self._by_len[b])
+        picked.sort()  # keep mapping order so ties resolve like a full scan
+        return picked
+
+    def _resolve(self, norm_text: str, threshold: float, margin: float) -> Optional[Stat]:
+        exact = self._exact.get(norm_text)
+        if exact is not None:
+            return exact
+
+        cut = threshold - margin
+        best: Optional[Tuple[Stat, float]] = None
+        second: Optional[Tuple[Stat, float]] = None
+        for pos in self._candidates(len(norm_text), cut):
+            sm = self._matchers[pos]
+            sm.set_seq1(norm_text)
+            if sm.quick_ratio() < cut:
+                continue
+            score = sm.ratio()
+            stat = self._aliases[pos][1]
+            if best is None or score > best[1]:
+                second = best
+                best = (stat, score)
+            elif second is None or score > second[1]:
+                second = (stat, score)
+
+        if best and best[1] >= threshold:
+            if second is None or (best[1] - second[1] >= margin):
+                return best[0]
+        return None
+
+    def match(
+        self,
+        text: str,
+        threshold: Optional[float] = None,
+        margin: Optional[float] = None,
+    ) -> Optional[Stat]:
+        if not text:
+            return None
+        threshold = self.threshold if threshold is None else threshold
+        margin = self.margin if margin is None else margin
+
+        key = (text, threshold, margin)
+        memo = self._memo
+        if key in memo:
+            memo.move_to_end(key)
+            self.memo_hits += 1
+            return memo[key]
+
+        self.memo_misses += 1
+        stat = self._resolve(normalize(text), threshold, margin)
+        memo[key] = stat
+        if len(memo) > self.memo_size:
+            memo.popitem(last=False)
+        return stat
+
+    def scored(self, text: str, floor: float = 0.5) -> Tuple[Optional[Stat], float, float]:
+        """
+        (stat, score, margin) of the best-scoring alias, where margin is how far
+        it beats the best alias of any *other* stat. Aliases whose upper bound is
+        below floor are not scored, so with no other stat above floor the margin
+        is a lower bound (score - floor). Not memoised: meant for the occasional
+        OCR result, not every frame.
+        """
+        norm_text = normalize(text) if text else ""
+        if not norm_text:
+            return None, 0.0, 0.0
+        per_stat: Dict[Stat, float] = {}
+        for pos in self._candidates(len(norm_text), floor):
+            sm = self._matchers[pos]
+            sm.set_seq1(norm_text)
+            if sm.quick_ratio() < floor:
+                continue
+            stat = self._aliases[pos][1]
+            score = sm.ratio()
+            if score > per_stat.get(stat, -1.0):
+                per_stat[stat] = score
+        if not per_stat:
+            return None, 0.0, 0.0
+        # stable sort: ties keep mapping order, like _resolve
+        ranked = sorted(per_stat.items(), key=lambda kv: kv[1], reverse=True)
+        stat, score = ranked[0]
+        runner = max(ranked[1][1], floor) if len(ranked) > 1 else floor
+        return stat, score, score - runner
+
+
+_MATCHERS: Dict[int, Tuple[Mapping, StatMatcher]] = {}
+
+
+def matcher_for(mapping: Mapping[str, Union[Sequence[str], str]]) -> StatMatcher:
+    """Shared matcher per mapping object (the stat mappings are module constants)."""
+    entry = _MATCHERS.get(id(mapping))
+    if entry is None or entry[0] is not mapping:
+        entry = (mapping, StatMatcher(mapping))
+        _MATCHERS[id(mapping)] = entry
+    return entry[1]
@@ -0,0 +1,275 @@
+"""
+Packed multi-exemplar stat template store.
+
+One .npy file of fixed-size records (stat name, 256-bit signature, hit
+counter, last-used time, gray exemplar crop), memory-mapped at startup in
+place of decoding one PNG per stat. Each stat keeps up to max_per_stat
+exemplars (hover/selected highlight, brightness variants); the least
+recently used one is evicted when a new exemplar arrives. Exemplars are kept
+in the 1920x1080 reference space; LookupDriver resizes captures from other
+window sizes (down or up) to it before adding them.
+
+The shipped store is read-only at runtime. layer() turns the loaded rows into
+a seed layer and sends saves to a per-user file holding only what a session
+changed: counters of seed exemplars and exemplars added since. That file is
+loaded back on top of the seed next time. Added exemplars count against
+max_per_stat and are evicted among themselves; seed exemplars never are.
+
+    python template_store.py migrate                 # data/matched/*.png -> data/stat_templates.npy
+    python template_store.py info
+    python template_store.py export --out data/tmp/exemplars
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+from Essence_Helper import Stat
+from signatures import SIG_BYTES, hamming_many, signature
+
+# ---- Configuration ---------------------------------------------------------
+
+STORE_PATH = Path("data/stat_templates.npy")
+PNG_DIR = Path("data/matched")
+EXEMPLAR_SHAPE = (32, 384)  # (h, w) max gray crop kept per exemplar
+MAX_EXEMPLARS_PER_STAT = 8
+DEDUPE_HAMMING = 4  # this close to an existing exemplar of the same stat counts as a hit, not a new row
+
+STORE_DTYPE = np.dtype([
+    ("stat", "U32"),
+    ("sig", np.uint8, (SIG_BYTES,)),
+    ("hits", np.uint32),
+    ("last_used", np.float64),
+    ("h", np.uint16),
+    ("w", np.uint16),
+    ("img", np.uint8, EXEMPLAR_SHAPE),
+])
+
+
+def _fit(gray: np.ndarray) -> np.ndarray:
+    max_h, max_w = EXEMPLAR_SHAPE
+    h, w = gray.shape[:2]
+    if h <= max_h and w <= max_w:
+        return gray
+    scale = min(max_h / h, max_w / w)
+    size = (max(int(w * scale), 1), max(int(h * scale), 1))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+class TemplateStore:
+    def __init__(
+        self,
+        rows: Optional[np.ndarray] = None,
+        path: Optional[Union[str, Path]] = None,
+        max_per_stat: int = MAX_EXEMPLARS_PER_STAT,
+    ):
+        self._rows = rows if rows is not None else np.zeros(0, dtype=STORE_DTYPE)
+        self.path = Path(path) if path is not None else None
+        self.max_per_stat = max_per_stat
+        self.dirty = False  # rows added/evicted
+        self.hits_dirty = False  # only counters changed
+        self.base_rows = 0  # leading rows that belong to the read-only seed layer (see layer())
+        self._seed_hits = np.zeros(0, dtype=np.uint32)
+        self._seed_used = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path] = STORE_PATH,
+        max_per_stat: int = MAX_EXEMPLARS_PER_STAT,
+        mmap: bool = True,
+    ) -> "TemplateStore":
+        # copy-on-write map: counter updates stay private until save()
+        rows = np.load(str(path), mmap_mode="c" if mmap else None, allow_pickle=False)
+        if rows.dtype != STORE_DTYPE:
+            raise ValueError(f"{path} is not a stat template store (dtype {rows.dtype})")
+        return cls(rows, path, max_per_stat)
+
+    def layer(self, user_path: Union[str, Path]) -> int:
+        """
+        Freeze the current rows as the seed layer and save to user_path from
+        now on, loading what an earlier session saved there on top: counters of
+        the seed exemplars it matches (same stat and signature), then its added
+        exemplars. Returns the number of added exemplars loaded.
+        """
+        self.base_rows = len(self._rows)
+        self._seed_hits = np.array(self._rows["hits"])
+        self._seed_used = np.array(self._rows["last_used"])
+        self.path = Path(user_path)
+        if not self.path.exists():
+            return 0
+        user = np.load(str(self.path), allow_pickle=False)
+        if user.dtype != STORE_DTYPE:
+            raise ValueError(f"{self.path} is not a stat template store (dtype {user.dtype})")
+        added = []
+        for row in user:
+            idx = self.find(str(row["stat"]), row["sig"])
+            if idx is not None and idx < self.base_rows:
+                self._rows["hits"][idx] = row["hits"]
+                self._rows["last_used"][idx] = row["last_used"]
+            else:
+                added.append(row)
+        if added:
+            self._rows = np.concatenate([np.asarray(self._rows), np.array(added, dtype=STORE_DTYPE)])
+        return len(added)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def stat_names(self) -> List[str]:
+        return [str(s) for s in self._rows["stat"]]
+
+    def signatures(self) -> np.ndarray:
+        """(N, 32) uint8 copy, one row per exemplar in store order."""
+        return np.ascontiguousarray(self._rows["sig"])
+
+    def exemplar(self, idx: int) -> np.ndarray:
+        row = self._rows[idx]
+        return np.array(row["img"][: row["h"], : row["w"]])
+
+    def counts(self) -> Dict[str, int]:
+        names, counts = np.unique(self._rows["stat"], return_counts=True)
+        return {str(n): int(c) for n, c in zip(names, counts)}
+
+    def record_hit(self, idx: int) -> None:
+        self._rows["hits"][idx] += 1
+        self._rows["last_used"][idx] = time.time()
+        self.hits_dirty = True
+
+    def add(self, stat_name: str, gray: np.ndarray) -> Optional[int]:
+        """
+        Add an exemplar for stat_name. Returns the new row index, or None when
+        a near-identical exemplar already exists (its hit counter is bumped).
+        """
+        Stat[stat_name]  # validate
+        sig = signature(gray)
+        same = np.flatnonzero(self._rows["stat"] == stat_name)
+        if same.size:
+            dists = hamming_many(sig, self._rows["sig"][same])
+            nearest = int(dists.argmin())
+            if dists[nearest] <= DEDUPE_HAMMING:
+                self.record_hit(int(same[nearest]))
+                return None
+            same = same[same >= self.base_rows]  # seed exemplars neither count nor get evicted
+            if same.size >= self.max_per_stat:
+                # LRU eviction: oldest last_used first, fewest hits breaks ties
+                order = np.lexsort((self._rows["hits"][same], self._rows["last_used"][same]))
+                self._rows = np.delete(self._rows, int(same[order[0]]))
+
+        fitted = _fit(gray)
+        row = np.zeros(1, dtype=STORE_DTYPE)
+        row["stat"] = stat_name
+        row["sig"] = sig
+        row["last_used"] = time.time()
+        row["h"], row["w"] = fitted.shape[:2]
+        row["img"][0, : fitted.shape[0], : fitted.shape[1]] = fitted
+        self._rows = np.concatenate([np.asarray(self._rows), row])
+        self.dirty = True
+        return len(self._rows) - 1
+
+    def find(self, stat_name: str, sig: np.ndarray) -> Optional[int]:
+        """Row index of stat_name's exemplar with exactly this signature (indices shift on add/remove)."""
+        hits = np.flatnonzero((self._rows["stat"] == stat_name) & (self._rows["sig"] == sig).all(axis=1))
+        return int(hits[0]) if hits.size else None
+
+    def is_seed(self, idx: int) -> bool:
+        return idx < self.base_rows
+
+    def remove(self, idx: int) -> None:
+        if self.is_seed(idx):
+            raise ValueError("Seed exemplars are read-only")
+        self._rows = np.delete(self._rows, idx)
+        self.dirty = True
+
+    def save(self, path: Optional[Union[str, Path]] = None) -> Path:
+        path = Path(path) if path is not None else self.path
+        if path is None:
+            raise ValueError("No path to save the template store to")
+        if self.base_rows:
+            # Layered: only seed rows whose counters moved, then the added exemplars
+            seed = self._rows[: self.base_rows]
+            moved = (seed["hits"] != self._seed_hits) | (seed["last_used"] != self._seed_used)
+            rows = np.concatenate([seed[moved], self._rows[self.base_rows :]])
+        else:
+            # Materialise first so the old file is no longer mapped when it is replaced
+            self._rows = rows = np.array(self._rows)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")  # several worker processes may save at once
+        with open(tmp, "wb") as fh:
+            np.save(fh, rows, allow_pickle=False)
+        os.replace(tmp, path)
+        self.path = path
+        self.dirty = self.hits_dirty = False
+        return path
+
+
+def _stat_from_filename(path: Path) -> Optional[str]:
+    # "ATTACK_BOOST.png" or variants such as "ATTACK_BOOST@hover.png"
+    name = path.stem.split("@", 1)[0]
+    return name if name in Stat.__members__ else None
+
+
+def migrate_png_dir(src: Union[str, Path], store: TemplateStore) -> int:
+    """Add every <STAT>.png / <STAT>@variant.png in src as an exemplar; returns rows added."""
+    added = 0
+    for path in sorted(Path(src).glob("*.png")):
+        stat_name = _stat_from_filename(path)
+        if stat_name is None:
+            continue
+        gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            continue
+        if store.add(stat_name, gray) is not None:
+            added += 1
+    return added
+
+
+# ---- CLI -------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_mig = sub.add_parser("migrate", help="pack a PNG template folder into the store")
+    p_mig.add_argument("--src", type=Path, default=PNG_DIR)
+    p_mig.add_argument("--dst", type=Path, default=STORE_PATH)
+    p_info = sub.add_parser("info", help="exemplar counts per stat")
+    p_info.add_argument("store", type=Path, nargs="?", default=STORE_PATH)
+    p_exp = sub.add_parser("export", help="write every exemplar back out as PNG")
+    p_exp.add_argument("store", type=Path, nargs="?", default=STORE_PATH)
+    p_exp.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "migrate":
+        store = TemplateStore.load(args.dst) if args.dst.exists() else TemplateStore(path=args.dst)
+        added = migrate_png_dir(args.src, store)
+        store.save(args.dst)
+        print(f"[INFO] Added {added} exemplars from {args.src} -> {args.dst} ({len(store)} total)")
+        return 0
+
+    store = TemplateStore.load(args.store, mmap=False)
+    if args.cmd == "info":
+        for name, count in sorted(store.counts().items()):
+            print(f"{name:<28}{count}")
+        print(f"[INFO] {len(store)} exemplars, {len(store.counts())} stats")
+        return 0
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    seen: Dict[str, int] = {}
+    for idx, name in enumerate(store.stat_names):
+        n = seen[name] = seen.get(name, -1) + 1
+        fname = f"{name}.png" if n == 0 else f"{name}@{n}.png"
+        cv2.imwrite(str(args.out / fname), store.exemplar(idx))
+    print(f"[INFO] Exported {len(store)} exemplars -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
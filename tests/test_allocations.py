@@ -0,0 +1,33 @@
+import pytest
+
+import lookup_driver
+from bench_pipeline import read_allocations, synthetic_frames
+from frame_source import MemoryFrameSource
+from lookup_driver import GuardMode, LookupDriver
+
+PEAK_BUDGET_BYTES = 16 * 1024  # p95 of what one steady-state read allocates at once
+RETAINED_BUDGET_BYTES = 8  # per read: only a constant few hundred bytes (counters, last result) may stay
+
+
+@pytest.fixture
+def driver(tmp_path, monkeypatch):
+    # Keep the test away from a real user store under data/tmp
+    monkeypatch.setattr(lookup_driver, "USER_STAT_STORE_PATH", tmp_path / "stat_templates.user.npy")
+    frames = synthetic_frames(8)
+    drv = LookupDriver(
+        guard_mode=GuardMode.IMAGE,
+        use_stat_cache=True,
+        frame_source=MemoryFrameSource(frames),
+        skip_unchanged=False,  # full recognition on every read
+        scale_sets=True,
+    )
+    drv.use_quality_guard = False
+    return drv, len(frames)
+
+
+def test_steady_state_read_stays_within_allocation_budget(driver):
+    drv, frames = driver
+    alloc = read_allocations(drv, frames, reads=500)
+    assert not drv.ocr_ready  # every stat slot hit the image cache; OCR never loaded
+    assert alloc["peak_p95_bytes"] <= PEAK_BUDGET_BYTES, alloc
+    assert alloc["retained_bytes_per_read"] <= RETAINED_BUDGET_BYTES, alloc
@@ -0,0 +1,30 @@
+import numpy as np
+
+from debug_writer import DebugImageWriter
+
+
+def _session(directory, session, frames=3, **kwargs):
+    writer = DebugImageWriter(directory, **kwargs)
+    writer.session = session
+    for _ in range(frames):
+        writer.begin_frame()
+        writer.submit("region", np.full((8, 8), 128, dtype=np.uint8))
+    writer.close()
+    return writer
+
+
+def test_sessions_do_not_overwrite_each_other(tmp_path):
+    _session(tmp_path, "20260101-000000")
+    writer = _session(tmp_path, "20260101-000100")
+    assert len(list(tmp_path.iterdir())) == 6
+    assert writer.stats()["files"] == 6
+
+
+def test_rewritten_path_is_counted_once(tmp_path):
+    _session(tmp_path, "same")
+    writer = _session(tmp_path, "same", max_files=3)
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == [f"same_{n:06d}_region.png" for n in (1, 2, 3)]
+    stats = writer.stats()
+    assert stats["files"] == 3 and stats["deleted"] == 0
+    assert stats["bytes"] == sum(p.stat().st_size for p in tmp_path.iterdir())
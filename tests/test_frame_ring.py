@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from frame_ring import FrameRing, RingFrameSource
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create((4, 4, 3), slots=4, readers=1)
+    yield ring
+    ring.close()
+
+
+def _frame(value):
+    return np.full((4, 4, 3), value, dtype=np.uint8)
+
+
+def test_grab_returns_a_private_copy(ring):
+    ring.write(_frame(1))
+    source = RingFrameSource(ring, 0, timeout=1.0)
+    frame = source.grab()
+    frame[:] = 9
+    assert ring.acquire_latest(0)[1][0, 0, 0] == 1
+    source.close()
+
+
+def test_torn_copy_is_discarded(ring, monkeypatch):
+    ring.write(_frame(1))
+    source = RingFrameSource(ring, 0, timeout=1.0)
+    is_current = ring.is_current
+    calls = []
+
+    def writer_lands_mid_copy(reader, seq):
+        calls.append(seq)
+        if len(calls) == 1:
+            ring.write(_frame(2))
+            return False
+        return is_current(reader, seq)
+
+    monkeypatch.setattr(ring, "is_current", writer_lands_mid_copy)
+    frame = source.grab()
+    assert frame[0, 0, 0] == 2
+    assert source.stats()["torn"] == 1 and source.stats()["frames"] == 1
+    source.close()
+
+
+def test_in_place_view_reports_when_rewritten(ring):
+    ring.write(_frame(1))
+    source = RingFrameSource(ring, 0, timeout=1.0, copy=False)
+    source.grab()
+    assert source.intact()
+    ring._slot_seq[ring._pins[0, 0]] = -1  # the writer claimed the pinned slot anyway
+    assert not source.intact()
+    source.close()
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from frame_source import FrameSource, FrameSourceExhausted, MemoryFrameSource
+
+
+def test_incomplete_source_fails_on_creation():
+    class _NoGrab(FrameSource):
+        pass
+
+    with pytest.raises(TypeError):
+        _NoGrab()
+
+
+def test_memory_source_replays_then_runs_out():
+    frames = [np.full((4, 4, 3), n, dtype=np.uint8) for n in range(2)]
+    source = MemoryFrameSource(frames, loop=False)
+    assert [int(source.grab()[0, 0, 0]) for _ in frames] == [0, 1]
+    with pytest.raises(FrameSourceExhausted):
+        source.grab()
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+import lookup_driver
+from audio_helper import AudioSink, StubSink
+from bench_pipeline import synthetic_frames
+from frame_source import FrameSource, MemoryFrameSource, PushFrameSource
+from lookup_driver import GuardMode, LookupDriver
+from pipeline import LookupPipeline, _demo_index
+
+FRAMES = 8
+
+
+class _FailingSource(FrameSource):
+    def grab(self):
+        raise RuntimeError("capture failed")
+
+
+@pytest.fixture
+def driver(tmp_path, monkeypatch):
+    monkeypatch.setattr(lookup_driver, "USER_STAT_STORE_PATH", tmp_path / "stat_templates.user.npy")
+    drv = LookupDriver(
+        guard_mode=GuardMode.IMAGE, use_stat_cache=True, skip_unchanged=False, frame_source=PushFrameSource()
+    )
+    drv.use_quality_guard = False
+    return drv
+
+
+def _run(pipeline, timeout=10.0):
+    pipeline.start(active=True)
+    deadline = time.monotonic() + timeout
+    while pipeline.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+
+
+def test_replay_counts_hits_and_drops_overlapping_chimes(driver):
+    sink = StubSink(duration=2.0)  # longer than the whole replay, so only the first chime plays
+    source = MemoryFrameSource(synthetic_frames(FRAMES), loop=False)
+    pipeline = LookupPipeline(driver, _demo_index(FRAMES), source, sink)
+    _run(pipeline)
+
+    metrics = pipeline.metrics()
+    assert metrics["error"] is None
+    assert metrics["captured"] == metrics["recognised"] == FRAMES
+    assert metrics["lookups"] == FRAMES  # every synthetic frame reads three stats
+    assert metrics["hits"] == metrics["notified"] == FRAMES // 2  # the demo index has every other set
+    assert len(sink.times) == 1
+    assert sink.dropped == FRAMES // 2 - 1
+
+
+def test_stage_exception_surfaces_as_error(driver):
+    pipeline = LookupPipeline(driver, _demo_index(FRAMES), _FailingSource(), StubSink())
+    _run(pipeline)
+
+    assert isinstance(pipeline.error, RuntimeError)
+    assert "capture failed" in pipeline.metrics()["error"]
+    assert not pipeline.running
+
+
+def test_incomplete_sink_fails_on_creation():
+    class _Silent(AudioSink):
+        pass
+
+    with pytest.raises(TypeError):
+        _Silent()
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from template_store import TemplateStore
+
+
+def _crop(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (24, 180), dtype=np.uint8)
+
+
+def test_hit_counters_survive_save_and_load(tmp_path):
+    path = tmp_path / "stat_templates.npy"
+    store = TemplateStore(path=path)
+    store.add("ATTACK_BOOST", _crop(0))
+    store.add("ATTACK_BOOST", _crop(1))
+    store.save()
+
+    # Counters change on the copy-on-write map, as in a running session
+    loaded = TemplateStore.load(path)
+    loaded.record_hit(1)
+    loaded.record_hit(1)
+    loaded.record_hit(0)
+    assert loaded.hits_dirty
+    hits = np.array(loaded._rows["hits"])
+    last_used = np.array(loaded._rows["last_used"])
+    loaded.save()
+
+    reloaded = TemplateStore.load(path)
+    assert list(reloaded._rows["hits"]) == list(hits) == [1, 2]
+    assert np.array_equal(reloaded._rows["last_used"], last_used)
+
+
+def test_lru_eviction_uses_saved_last_used(tmp_path):
+    path = tmp_path / "stat_templates.npy"
+    store = TemplateStore(path=path, max_per_stat=2)
+    store.add("ATTACK_BOOST", _crop(0))
+    store.add("ATTACK_BOOST", _crop(1))
+    store._rows["last_used"][:] = [200.0, 100.0]  # row 1 is the least recently used
+    store.save()
+
+    reloaded = TemplateStore.load(path, max_per_stat=2)
+    kept = reloaded.signatures()[0].copy()
+    reloaded.add("ATTACK_BOOST", _crop(2))
+    assert len(reloaded) == 2
+    assert np.array_equal(reloaded.signatures()[0], kept)
+
+
+def _seed(path, crops, max_per_stat=2):
+    store = TemplateStore(path=path, max_per_stat=max_per_stat)
+    for seed in crops:
+        store.add("ATTACK_BOOST", _crop(seed))
+    store.save()
+    return TemplateStore.load(path, max_per_stat=max_per_stat)
+
+
+def test_layered_store_leaves_seed_file_alone(tmp_path):
+    seed_path, user_path = tmp_path / "seed.npy", tmp_path / "user.npy"
+    store = _seed(seed_path, [0, 1])
+    shipped = seed_path.read_bytes()
+    store.layer(user_path)
+    store.record_hit(1)
+    store.add("HP_BOOST", _crop(2))
+    store.save()
+    assert seed_path.read_bytes() == shipped
+    assert len(np.load(user_path)) == 2  # the moved seed counter and the added exemplar
+
+    reloaded = TemplateStore.load(seed_path, max_per_stat=2)
+    assert reloaded.layer(user_path) == 1
+    assert len(reloaded) == 3 and reloaded.base_rows == 2
+    assert list(reloaded._rows["hits"]) == [0, 1, 0]
+    assert reloaded.stat_names[2] == "HP_BOOST"
+
+
+def test_added_exemplars_never_evict_seed_exemplars(tmp_path):
+    store = _seed(tmp_path / "seed.npy", [0, 1])
+    store.layer(tmp_path / "user.npy")
+    seed_sigs = store.signatures()
+    for seed in range(2, 6):
+        store.add("ATTACK_BOOST", _crop(seed))
+    assert len(store) == 4  # 2 seed + max_per_stat added
+    assert np.array_equal(store.signatures()[:2], seed_sigs)
+    with pytest.raises(ValueError):
+        store.remove(0)